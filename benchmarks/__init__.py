@@ -0,0 +1,5 @@
+# coding: utf-8
+
+"""Benchmarks of the ``clg`` module. Each module of this package is runnable
+(ie: ``python -m benchmarks.cold_start``) and can write its results in JSON for
+comparing runs."""
@@ -0,0 +1,166 @@
+# coding: utf-8
+
+"""Cold start benchmark of programs using ``clg``.
+
+For each configuration of the *examples* directory, a new interpreter is
+started (in the directory of the configuration, like the program of the
+example) for each run and measures:
+
+    * the import time of ``clg`` (cumulative time given by
+      ``python -X importtime``),
+    * the wall time of ``clg.init`` (loading of the configuration, build of the
+      parsers and print of the help),
+    * the wall time of the whole process.
+
+Custom types used by the examples are replaced by ``str``. Directories of
+commands (having a manifest, see the *directory* keyword of subparsers) are
+skipped as their files are parts of other configurations. Configurations that
+can't be loaded (ie: ``yamlloader`` module is not installed) are reported with
+the error.
+
+Usage::
+
+    python -m benchmarks.cold_start [--runs RUNS] [--output FILE]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXAMPLES_DIR = os.path.join(ROOT_DIR, 'examples')
+FORMATS = {'.yml': 'yaml', '.yaml': 'yaml', '.json': 'json'}
+MANIFEST = 'manifest'
+
+# Code executed by each new interpreter.
+_CHILD_CODE = '''
+import os, sys, json, time
+start = time.perf_counter()
+import clg
+imported = time.perf_counter()
+clg.TYPES.update(dict.fromkeys({types!r}, str))
+sys.stdout = open(os.devnull, 'w')
+try:
+    clg.init(format={format!r}, data={data!r}, args=['--help'])
+except SystemExit:
+    pass
+end = time.perf_counter()
+sys.__stdout__.write(json.dumps({{'import': imported - start, 'init': end - imported}}))
+'''
+_IMPORTTIME_RE = re.compile(r'^import time:\s+\d+ \|\s+(\d+) \| clg$', re.M)
+
+
+def find_configs(directory=EXAMPLES_DIR):
+    """Return the configuration files (and their format) of the examples,
+    without the directories of commands."""
+    configs = []
+    for dirpath, dirnames, filenames in os.walk(directory):
+        if any(os.path.splitext(filename) in [(MANIFEST, ext) for ext in FORMATS]
+               for filename in filenames):
+            dirnames[:] = []
+            continue
+        for filename in filenames:
+            fmt = FORMATS.get(os.path.splitext(filename)[1])
+            if fmt is not None:
+                configs.append((os.path.join(dirpath, filename), fmt))
+    return sorted(configs)
+
+def custom_types(config):
+    """Return the types used in **config** that are not builtins."""
+    import builtins
+    types = set()
+    def walk(conf):
+        if isinstance(conf, dict):
+            if isinstance(conf.get('type'), str) and not hasattr(builtins, conf['type']):
+                types.add(conf['type'])
+            for value in conf.values():
+                walk(value)
+        elif isinstance(conf, list):
+            for value in conf:
+                walk(value)
+    walk(config)
+    return sorted(types)
+
+def load(path, fmt):
+    """Load a configuration file (without ``clg``)."""
+    with open(path) as fhandler:
+        if fmt == 'json':
+            return json.load(fhandler)
+        import yaml
+        return yaml.safe_load(fhandler)
+
+def run_once(path, fmt, types):
+    """Start a new interpreter and return its timings (in seconds)."""
+    code = _CHILD_CODE.format(types=types, format=fmt, data=path)
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(
+        filter(None, (ROOT_DIR, os.environ.get('PYTHONPATH')))))
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                          stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                          stderr=subprocess.PIPE, env=env, universal_newlines=True,
+                          cwd=os.path.dirname(path))
+    wall = time.perf_counter() - start
+    if proc.returncode:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    timings = json.loads(proc.stdout)
+    timings.update(wall=wall,
+                   importtime=int(_IMPORTTIME_RE.search(proc.stderr).group(1)) / 1e6)
+    return timings
+
+def summarize(values):
+    """Return statistics (in milliseconds) of a list of timings."""
+    values = [value * 1000 for value in values]
+    return {'min': min(values),
+            'median': statistics.median(values),
+            'mean': statistics.mean(values)}
+
+def bench(configs, runs):
+    """Run the benchmark for each configuration."""
+    results = []
+    for path, fmt in configs:
+        result = {'config': os.path.relpath(path, ROOT_DIR), 'format': fmt}
+        try:
+            types = custom_types(load(path, fmt))
+            timings = [run_once(path, fmt, types) for _ in range(runs)]
+        except Exception as err:
+            result['error'] = str(err)
+        else:
+            result.update((key, summarize([timing[key] for timing in timings]))
+                          for key in ('importtime', 'import', 'init', 'wall'))
+        results.append(result)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('-r', '--runs', type=int, default=20,
+                        help='number of runs for each configuration (default: %(default)s)')
+    parser.add_argument('-o', '--output',
+                        help='write the results (in JSON) in this file')
+    args = parser.parse_args()
+
+    results = bench(find_configs(), args.runs)
+    line = '{:<48} {:>12} {:>12} {:>12} {:>12}'
+    print(line.format('config (median in ms)', 'importtime', 'import', 'init', 'wall'))
+    for result in results:
+        if 'error' in result:
+            print('{:<48} error: {}'.format(result['config'], result['error']))
+            continue
+        print(line.format(result['config'], *('%.2f' % result[key]['median']
+                                              for key in ('importtime', 'import',
+                                                          'init', 'wall'))))
+
+    if args.output:
+        import clg
+        with open(args.output, 'w') as fhandler:
+            json.dump({'python': sys.version.split()[0],
+                       'clg': clg.__version__,
+                       'runs': args.runs,
+                       'results': results}, fhandler, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+# coding: utf-8
+
+"""Stress test of a **CommandLine** object shared by many threads.
+
+Commands (valid ones, invalid ones and help requests) are parsed concurrently
+with the same object, each call having its own output. Results and outputs are
+checked against the ones of a sequential run, and the throughput is measured
+for each number of threads.
+
+As parsing is CPU bound, throughput only scales with the number of threads on
+an interpreter without GIL (or when commands wait for I/O, simulated with the
+``--io`` option).
+
+Usage::
+
+    python -m benchmarks.concurrency [--threads N ...] [--commands N] [--io MS]
+                                     [--lazy] [--output FILE]
+"""
+
+import io
+import sys
+import json
+import time
+import argparse
+import concurrent.futures
+
+import clg
+from benchmarks.generator import generate, generate_argv
+
+CONFIG = dict(commands=10, depth=2, options=10, need=0.5, conflict=0.5, match=0.5)
+
+
+def gen_commands(config, count):
+    """Generate **count** command-lines: valid ones for each subcommand, ones
+    with an invalid value and help requests."""
+    nb_cmds = CONFIG['commands']
+    commands = []
+    for index in range(count):
+        argv = generate_argv(config, index % nb_cmds)
+        kind = index % 4
+        if kind == 2:
+            argv[argv.index('--opt0-1') + 1] = 'invalid'
+        elif kind == 3:
+            argv = [list(config['subparsers'])[index % nb_cmds], '--help']
+        commands.append(argv)
+    return commands
+
+def run_command(cmd, argv, io_delay):
+    """Parse **argv** with **cmd** and return the result and the output."""
+    output = io.StringIO()
+    try:
+        result = sorted(cmd.parse(argv, output=output))
+    except SystemExit as err:
+        result = err.code
+    if io_delay:
+        time.sleep(io_delay)
+    return result, output.getvalue()
+
+def bench(cmd, commands, threads, io_delay, expected):
+    """Run **commands** with **threads** threads and return the throughput
+    (commands per second)."""
+    with concurrent.futures.ThreadPoolExecutor(threads) as executor:
+        start = time.perf_counter()
+        results = list(executor.map(lambda argv: run_command(cmd, argv, io_delay),
+                                    commands))
+        duration = time.perf_counter() - start
+    errors = sum(result != expected_result
+                 for result, expected_result in zip(results, expected))
+    if errors:
+        raise AssertionError('%d results differ from the sequential run' % errors)
+    return len(commands) / duration
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('-t', '--threads', nargs='+', type=int, default=[1, 2, 4, 8],
+                        help='numbers of threads (default: %(default)s)')
+    parser.add_argument('-c', '--commands', type=int, default=2000,
+                        help='number of commands (default: %(default)s)')
+    parser.add_argument('-i', '--io', type=float, default=0,
+                        help='simulated I/O time (in ms) of each command')
+    parser.add_argument('-l', '--lazy', action='store_true',
+                        help='use the lazy mode of CommandLine (parsers are '
+                             'built by the threads)')
+    parser.add_argument('-o', '--output',
+                        help='write the results (in JSON) in this file')
+    args = parser.parse_args()
+
+    config = generate(**CONFIG)
+    commands = gen_commands(config, args.commands)
+    reference = clg.CommandLine(config)
+    expected = [run_command(reference, argv, 0) for argv in commands]
+
+    results = []
+    print('{:>8} {:>14} {:>8}'.format('threads', 'commands/s', 'speedup'))
+    for threads in args.threads:
+        # Use a new object for each run so lazy builds happen concurrently.
+        cmd = clg.CommandLine(config, lazy=args.lazy)
+        throughput = bench(cmd, commands, threads, args.io / 1000, expected)
+        results.append({'threads': threads, 'throughput': throughput})
+        print('{:>8} {:>14.0f} {:>7.2f}x'.format(
+            threads, throughput, throughput / results[0]['throughput']))
+        sys.stdout.flush()
+
+    if args.output:
+        with open(args.output, 'w') as fhandler:
+            json.dump({'python': sys.version.split()[0],
+                       'clg': clg.__version__,
+                       'commands': args.commands,
+                       'io': args.io,
+                       'lazy': args.lazy,
+                       'results': results}, fhandler, indent=2)
+
+if __name__ == '__main__':
+    main()
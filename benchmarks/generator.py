@@ -0,0 +1,119 @@
+# coding: utf-8
+
+"""Generator of synthetic configurations (and of matching command-lines) for
+benchmarking ``clg``.
+
+Configurations are generated along theses axes:
+
+    * `commands`: number of subcommands of each (non leaf) command,
+    * `depth`: depth of the tree of subcommands (*0* for no subcommands),
+    * `options`: number of options of each command,
+    * `args`: number of positional arguments of leaf commands,
+    * `groups`: number of groups of each command,
+    * `exclusive_groups`: number of exclusive groups of each command,
+    * `group_options`: number of options of each (exclusive) group,
+    * `need`, `conflict`, `match`: ratio (between 0 and 1) of options using
+      theses post processing keywords.
+
+Options are named *opt<level>_<index>* (ie: *opt0_0*, *opt0_1*, ... for the
+options of the main command). Every fourth option is an integer. An option
+needs the previous one, conflicts with the option *unused<level>* (never set in
+command-lines) and strings values must match *^value[0-9]+$*.
+"""
+
+from collections import OrderedDict
+
+MATCH_PATTERN = '^value[0-9]+$'
+
+
+def _ratio(index, ratio):
+    """Spread evenly **ratio** of the elements."""
+    return int((index + 1) * ratio) != int(index * ratio)
+
+def _gen_option(level, index, need, conflict, match):
+    """Generate the configuration of the option *opt<level>_<index>*."""
+    conf = OrderedDict(help='Option %d (default: __DEFAULT__).' % index)
+    if index % 4 == 3:
+        conf['type'] = 'int'
+    elif _ratio(index, match):
+        conf['match'] = MATCH_PATTERN
+    if index and _ratio(index, need):
+        conf['need'] = ['opt%d_%d' % (level, index - 1)]
+    if _ratio(index, conflict):
+        conf['conflict'] = ['unused%d' % level]
+    return conf
+
+def _gen_parser(level, params, name='prog'):
+    """Generate the configuration of a command at **level**."""
+    conf = OrderedDict(description='Command %s.' % name, help='Command %s.' % name)
+    post = (params['need'], params['conflict'], params['match'])
+
+    index = 0
+    options = OrderedDict([('unused%d' % level, OrderedDict(help='Never set.'))])
+    for _ in range(params['options']):
+        options['opt%d_%d' % (level, index)] = _gen_option(level, index, *post)
+        index += 1
+    conf['options'] = options
+
+    for grp_type in ('groups', 'exclusive_groups'):
+        groups = []
+        for grp_index in range(params[grp_type]):
+            group = OrderedDict(options=OrderedDict())
+            if grp_type == 'groups':
+                group['title'] = 'Group %d' % grp_index
+            for _ in range(params['group_options']):
+                # Post processing keywords are not used in exclusive groups as
+                # only one option of the group is set.
+                group['options']['opt%d_%d' % (level, index)] = (
+                    _gen_option(level, index, *post)
+                    if grp_type == 'groups'
+                    else OrderedDict(action='store_true',
+                                     help='Exclusive option %d.' % index))
+                index += 1
+            groups.append(group)
+        if groups:
+            conf[grp_type] = groups
+
+    if level < params['depth']:
+        conf['subparsers'] = OrderedDict(
+            ('cmd%d' % cmd_index,
+             _gen_parser(level + 1, params, '%s-cmd%d' % (name, cmd_index)))
+            for cmd_index in range(params['commands']))
+    elif params['args']:
+        conf['args'] = OrderedDict(('arg%d' % arg_index,
+                                    OrderedDict(help='Argument %d.' % arg_index))
+                                   for arg_index in range(params['args']))
+    return conf
+
+def generate(commands=10, depth=1, options=10, args=1, groups=0,
+             exclusive_groups=0, group_options=2, need=0.0, conflict=0.0,
+             match=0.0):
+    """Generate a configuration."""
+    params = locals()
+    return _gen_parser(0, params)
+
+def generate_argv(config, command=-1):
+    """Generate a valid command-line for **config** which sets all the options
+    of the commands in the path. The subcommand used at each level is at the
+    index **command** (the last one by default)."""
+    argv = []
+    conf = config
+    while True:
+        exclusive_opts = [next(iter(group['options']))
+                          for group in conf.get('exclusive_groups', [])]
+        options = list(conf['options'].items())
+        for group in conf.get('groups', []):
+            options.extend(group['options'].items())
+        for option, opt_conf in options:
+            if not option.startswith('unused'):
+                index = option.split('_')[1]
+                value = index if opt_conf.get('type') == 'int' else 'value' + index
+                argv.extend(('--%s' % option.replace('_', '-'), value))
+        argv.extend('--%s' % option.replace('_', '-') for option in exclusive_opts)
+
+        if 'subparsers' not in conf:
+            argv.extend('value%d' % index for index in range(len(conf.get('args', {}))))
+            return argv
+        name = list(conf['subparsers'])[command]
+        argv.append(name)
+        conf = conf['subparsers'][name]
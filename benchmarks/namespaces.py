@@ -0,0 +1,99 @@
+# coding: utf-8
+
+"""Benchmark of the namespaces returned by **CommandLine** with and without
+the *slots* parameter (see **SlotsNamespace**).
+
+For each number of options of the command, the same command-line is parsed
+``--records`` times and all the namespaces are kept (like the results of a
+batch), and these values are measured:
+
+    * `memory`: memory (in bytes, with ``tracemalloc``) taken by each kept
+      namespace,
+    * `parse`: time of **CommandLine.parse**,
+    * `access`: time of reading all the arguments by attribute,
+    * `item`: time of reading all the arguments with ``namespace[key]``.
+
+Usage::
+
+    python -m benchmarks.namespaces [--options N ...] [--records N]
+                                    [--repeat N] [--output FILE]
+"""
+
+import gc
+import sys
+import json
+import argparse
+import tracemalloc
+
+import clg
+from benchmarks.suite import timeit
+from benchmarks.generator import generate, generate_argv
+
+
+def record_memory(cmd, argv, records):
+    """Return the memory (in bytes) taken by each of **records** namespaces
+    parsed by **cmd**."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        kept = [cmd.parse(argv) for _ in range(records)]
+        size = tracemalloc.get_traced_memory()[0] - start
+    finally:
+        tracemalloc.stop()
+    del kept
+    return size / records
+
+def bench(nb_options, records, repeat):
+    """Run the benchmark for a command having **nb_options** options."""
+    config = generate(commands=1, depth=1, options=nb_options)
+    argv = generate_argv(config)
+    result = {'options': nb_options}
+    for name, slots in (('dict', False), ('slots', True)):
+        cmd = clg.CommandLine(config, slots=slots)
+        args = cmd.parse(argv)
+        keys = [key for key, _ in args]
+        result[name] = {
+            'memory': record_memory(cmd, argv, records),
+            'parse': timeit(lambda: cmd.parse(argv), repeat),
+            'access': timeit(lambda: [getattr(args, key) for key in keys], repeat),
+            'item': timeit(lambda: [args[key] for key in keys], repeat)}
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--options', nargs='+', type=int, default=[5, 20, 100],
+                        help='numbers of options of the command (default: %(default)s)')
+    parser.add_argument('-n', '--records', type=int, default=2000,
+                        help='number of kept namespaces (default: %(default)s)')
+    parser.add_argument('-r', '--repeat', type=int, default=100,
+                        help='number of runs of timed phases (default: %(default)s)')
+    parser.add_argument('-o', '--output',
+                        help='write the results (in JSON) in this file')
+    args = parser.parse_args()
+
+    line = '{:>8} {:>8} {:>12} {:>12} {:>12} {:>12}'
+    print(line.format('options', '', 'memory (B)', 'parse (ms)', 'access (us)',
+                      'item (us)'))
+    results = []
+    for nb_options in args.options:
+        result = bench(nb_options, args.records, args.repeat)
+        results.append(result)
+        for name in ('dict', 'slots'):
+            print(line.format(nb_options, name,
+                              '%.0f' % result[name]['memory'],
+                              '%.3f' % result[name]['parse']['median'],
+                              '%.2f' % (result[name]['access']['median'] * 1000),
+                              '%.2f' % (result[name]['item']['median'] * 1000)))
+        sys.stdout.flush()
+
+    if args.output:
+        with open(args.output, 'w') as fhandler:
+            json.dump({'python': sys.version.split()[0],
+                       'clg': clg.__version__,
+                       'records': args.records,
+                       'repeat': args.repeat,
+                       'results': results}, fhandler, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+# coding: utf-8
+
+"""Benchmark of the lookup of options by **NoAbbrevParser** for parsers with
+many options.
+
+``argparse`` looks for the option of each argument that is not exactly an
+option string (short options with their value like ``-n5``, concatenated
+short flags, values beginning with ``-``, unknown options, ...). The indexed
+lookup of **NoAbbrevParser** is compared with the previous implementation,
+scanning every option string of the parser, which is kept here as
+**ScanParser**. Results of both implementations are checked to be the same
+before timing them.
+
+For each number of options, the parsed command-line has ``--tokens``
+arguments needing a lookup.
+
+Usage::
+
+    python -m benchmarks.options [--options N ...] [--tokens N] [--repeat N]
+                                 [--output FILE]
+"""
+
+import sys
+import json
+import argparse
+
+import clg
+from benchmarks.suite import timeit
+
+
+class ScanParser(clg.NoAbbrevParser):
+    """**NoAbbrevParser** with the previous lookup of options, scanning all the
+    option strings of the parser for each argument."""
+    def _get_option_tuples(self, option_string):
+        result = []
+        chars = self.prefix_chars
+        if option_string[0] in chars and option_string[1] in chars:
+            if '=' in option_string:
+                option_prefix, explicit_arg = option_string.split('=', 1)
+            else:
+                option_prefix = option_string
+                explicit_arg = None
+            for option_string in self._option_string_actions:
+                if option_string == option_prefix:
+                    action = self._option_string_actions[option_string]
+                    result.append((action, option_string, explicit_arg))
+        elif option_string[0] in chars and option_string[1] not in chars:
+            option_prefix = option_string
+            explicit_arg = None
+            short_option_prefix = option_string[:2]
+            short_explicit_arg = option_string[2:]
+            for option_string in self._option_string_actions:
+                if option_string == short_option_prefix:
+                    action = self._option_string_actions[option_string]
+                    result.append((action, option_string, short_explicit_arg))
+                elif option_string.startswith(option_prefix):
+                    action = self._option_string_actions[option_string]
+                    result.append((action, option_string, explicit_arg))
+        else:
+            self.error('unexpected option string: %s' % option_string)
+        return result
+
+def build_parser(parser_class, nb_options):
+    """Build a parser with **nb_options** long options, some short options
+    and options with a single prefix character."""
+    parser = parser_class(prog='bench')
+    parser.add_argument('-n', '--number', type=int, action='append')
+    parser.add_argument('-v', '--verbose', action='count')
+    parser.add_argument('-q', '--quiet', action='store_true')
+    parser.add_argument('-value', type=int, action='append')
+    parser.add_argument('-values', type=int, action='append')
+    for index in range(nb_options):
+        parser.add_argument('--opt%d' % index, action='append')
+    return parser
+
+def gen_argv(nb_tokens):
+    """Generate a command-line of **nb_tokens** arguments needing a lookup."""
+    tokens = ['-n%d', '-vvq', '--opt0', '-%d', '-value=%d']
+    argv = []
+    for index in range(nb_tokens):
+        token = tokens[index % len(tokens)]
+        argv.append(token % index if '%' in token else token)
+    return argv
+
+def check(nb_options):
+    """Check both implementations give the same results (including errors)."""
+    tokens = ['-n5', '-vvq', '-val', '-value', '-values', '-v', '-x', '-5',
+              '--opt1=a', '--opt', '--opt1', '--unknown=a', '-value=1', '-q=1']
+    parsers = [build_parser(parser_class, nb_options)
+               for parser_class in (ScanParser, clg.NoAbbrevParser)]
+    for token in tokens:
+        results = []
+        for parser in parsers:
+            try:
+                results.append([(action.dest, option_string, explicit_arg)
+                                for action, option_string, explicit_arg
+                                in parser._get_option_tuples(token)])
+            except SystemExit as err:
+                results.append(err.code)
+        if results[0] != results[1]:
+            raise AssertionError('%s: %r != %r' % (token, *results))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--options', nargs='+', type=int, default=[10, 100, 1000, 5000],
+                        help='numbers of options of the parser (default: %(default)s)')
+    parser.add_argument('-t', '--tokens', type=int, default=500,
+                        help='number of arguments needing a lookup (default: '
+                             '%(default)s)')
+    parser.add_argument('-r', '--repeat', type=int, default=10,
+                        help='number of runs (default: %(default)s)')
+    parser.add_argument('-o', '--output',
+                        help='write the results (in JSON) in this file')
+    args = parser.parse_args()
+
+    argv = gen_argv(args.tokens)
+    results = []
+    print('{:>8} {:>12} {:>12} {:>8}'.format('options', 'scan (ms)', 'index (ms)',
+                                             'speedup'))
+    for nb_options in args.options:
+        check(nb_options)
+        result = {'options': nb_options}
+        for name, parser_class in (('scan', ScanParser), ('index', clg.NoAbbrevParser)):
+            bench_parser = build_parser(parser_class, nb_options)
+            result[name] = timeit(lambda: bench_parser.parse_args(argv), args.repeat)
+        results.append(result)
+        print('{:>8} {:>12.3f} {:>12.3f} {:>7.1f}x'.format(
+            nb_options, result['scan']['median'], result['index']['median'],
+            result['scan']['median'] / result['index']['median']))
+        sys.stdout.flush()
+
+    if args.output:
+        with open(args.output, 'w') as fhandler:
+            json.dump({'python': sys.version.split()[0],
+                       'clg': clg.__version__,
+                       'tokens': args.tokens,
+                       'repeat': args.repeat,
+                       'results': results}, fhandler, indent=2)
+
+if __name__ == '__main__':
+    main()
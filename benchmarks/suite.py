@@ -0,0 +1,171 @@
+# coding: utf-8
+
+"""Benchmark suite of ``clg`` based on synthetic configurations (see
+**benchmarks.generator**).
+
+For each scenario, theses phases are timed separately:
+
+    * `build`: initialization of **CommandLine** (checks and build of parsers),
+    * `parse`: **CommandLine.parse** (``argparse`` parsing and post processing),
+    * `argparse`: parsing of the command-line by ``argparse`` only,
+    * `post`: post processing (*need*, *conflict* and *match* keywords),
+    * `help`: the tree of commands printed by the ``help`` command,
+    * `complete`: completion of options of the last command with
+      ``argcomplete`` (if installed),
+    * `index`: the same completion from the completion index of the
+      configuration (used by **init** for answering completion requests).
+
+The peak of memory allocated while building and parsing is measured (with
+``tracemalloc``) in a separate run.
+
+Usage::
+
+    python -m benchmarks.suite [--repeat REPEAT] [--lazy]
+                               [--scenario NAME PARAM=VALUE ...] [--output FILE]
+"""
+
+import io
+import sys
+import json
+import time
+import argparse
+import statistics
+import tracemalloc
+import contextlib
+
+import clg
+from benchmarks.generator import generate, generate_argv
+
+SCENARIOS = {
+    'small': dict(commands=5, depth=1, options=5),
+    'wide': dict(commands=200, depth=1, options=10),
+    'deep': dict(commands=4, depth=5, options=5),
+    'options': dict(commands=5, depth=1, options=500),
+    'groups': dict(commands=10, depth=2, options=5, groups=5,
+                   exclusive_groups=5, group_options=5),
+    'post': dict(commands=10, depth=2, options=50, need=0.5, conflict=0.5,
+                 match=0.5),
+}
+
+
+def timeit(func, repeat):
+    """Call **func** **repeat** times and return statistics of the timings (in
+    milliseconds)."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {'min': min(timings),
+            'median': statistics.median(timings),
+            'mean': statistics.mean(timings)}
+
+def peak_memory(func):
+    """Return the peak of memory (in KiB) allocated by **func**."""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+def quiet(func):
+    """Wrap **func** for ignoring its output and its exit."""
+    def wrapper():
+        with contextlib.redirect_stdout(io.StringIO()):
+            try:
+                func()
+            except SystemExit:
+                pass
+    return wrapper
+
+def complete_func(cmd, commands):
+    """Return a function completing the options of the last command of
+    **commands** with ``argcomplete`` (or ``None`` if it is not installed)."""
+    try:
+        import argcomplete
+    except ImportError:
+        return None
+    cmd.build()
+    finder = argcomplete.CompletionFinder(cmd.parser)
+    return lambda: finder._get_completions(['prog'] + commands, '--', '', None)
+
+def bench(name, params, repeat, lazy=False):
+    """Run the benchmark of a scenario."""
+    config = generate(**params)
+    argv = generate_argv(config)
+    init = lambda: clg.CommandLine(config, lazy=lazy)
+
+    cmd = init()
+    args_values = cmd.parse(argv)
+    path = [elt
+            for arg, value in sorted(args_values) if value
+            for elt in ('subparsers', value)
+            if arg.startswith(cmd.keyword) and arg[len(cmd.keyword):].isdigit()]
+
+    result = {'scenario': name, 'params': params, 'lazy': lazy,
+              'argv_length': len(argv)}
+    result['build'] = timeit(init, repeat)
+    result['parse'] = timeit(lambda: cmd.parse(argv), repeat)
+    result['argparse'] = timeit(lambda: cmd.parser.parse_args(argv), repeat)
+    result['post'] = timeit(lambda: cmd._post_process('/'.join(path), args_values), repeat)
+    if 'subparsers' in config:
+        help_args = clg.Namespace({'page': False})
+        def print_help():
+            # The rendered tree is cached by the object.
+            cmd._help_tree = None
+            cmd.print_help(help_args)
+        result['help'] = timeit(quiet(print_help), repeat)
+    complete = complete_func(init(), path[1::2])
+    if complete is not None:
+        result['complete'] = timeit(complete, repeat)
+        index = clg._completion_index(config)
+        result['index'] = timeit(
+            lambda: clg._index_completions(index, path[1::2], '--'), repeat)
+    result['memory'] = {'build': peak_memory(init),
+                        'parse': peak_memory(lambda: cmd.parse(argv))}
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('-r', '--repeat', type=int, default=10,
+                        help='number of runs of each phase (default: %(default)s)')
+    parser.add_argument('-l', '--lazy', action='store_true',
+                        help='use the lazy mode of CommandLine')
+    parser.add_argument('-s', '--scenario', nargs='+', action='append',
+                        metavar=('NAME', 'PARAM=VALUE'),
+                        help='run a custom scenario (parameters of '
+                             'benchmarks.generator.generate)')
+    parser.add_argument('-o', '--output',
+                        help='write the results (in JSON) in this file')
+    args = parser.parse_args()
+
+    scenarios = dict(SCENARIOS)
+    if args.scenario:
+        scenarios = {}
+        for name, *params in args.scenario:
+            scenarios[name] = {param: json.loads(value)
+                               for param, value in (elt.split('=', 1) for elt in params)}
+
+    phases = ('build', 'parse', 'argparse', 'post', 'help', 'complete', 'index')
+    line = '{:<12}' + ' {:>10}' * (len(phases) + 2)
+    print(line.format('(median ms)', *phases + ('mem build', 'mem parse')))
+    results = []
+    for name, params in scenarios.items():
+        result = bench(name, params, args.repeat, args.lazy)
+        results.append(result)
+        print(line.format(name,
+                          *['%.3f' % result[phase]['median'] if phase in result else '-'
+                            for phase in phases]
+                          + ['%dK' % result['memory'][phase] for phase in ('build', 'parse')]))
+        sys.stdout.flush()
+
+    if args.output:
+        with open(args.output, 'w') as fhandler:
+            json.dump({'python': sys.version.split()[0],
+                       'clg': clg.__version__,
+                       'repeat': args.repeat,
+                       'results': results}, fhandler, indent=2)
+
+if __name__ == '__main__':
+    main()
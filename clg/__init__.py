@@ -1,16 +1,22 @@
 # coding: utf-8
 
 """This module is a wrapper to ``argparse`` module. It allow to generate a
-command-line from a predefined directory (ie: a YAML, JSON, ... file)."""
+command-line from a predefined directory (ie: a YAML, JSON, ... file).
+
+As this module is imported at each execution of a program, modules that are not
+needed for parsing the command-line (``pydoc``, ``importlib``, ...) are only
+imported when they are used."""
 
 import os
 import re
 import sys
-import importlib
-import copy
-import pydoc
+import time
+import bisect
 import argparse
-from collections import OrderedDict
+import functools
+from collections import OrderedDict, namedtuple
+
+__version__ = '3.4.0'
 
 #
 # Constants.
@@ -20,12 +26,15 @@ _SELF = sys.modules[__name__]
 
 # Get types.
 _BUILTINS = sys.modules['builtins']
-TYPES = {builtin: getattr(_BUILTINS, builtin) for builtin in vars(_BUILTINS)}
+TYPES = dict(vars(_BUILTINS))
 TYPES['suppress'] = argparse.SUPPRESS
 # Allow custom actions.
 ACTIONS = {}
 # Allow argcomplete completers.
 COMPLETERS = {}
+# Batch converters of types, converting all the values of an argument at once
+# (see *batch* keyword). Converters of 'int' and 'float' are added below.
+BATCH_TYPES = {}
 
 # Keywords (argparse and clg).
 KEYWORDS = {
@@ -35,20 +44,27 @@ KEYWORDS = {
                 'clg': ['anchors', 'subparsers', 'options', 'args', 'groups',
                         'exclusive_groups', 'execute', 'negative_value']},
     'subparsers': {'argparse': ['title', 'description', 'prog', 'help', 'metavar'],
-                   'clg': ['required', 'parsers']},
+                   'clg': ['required', 'parsers', 'directory', 'package']},
     'groups': {'argparse': ['title', 'description'],
                'clg': ['options', 'args', 'exclusive_groups']},
     'exclusive_groups': {'argparse': ['required'],
                          'clg': ['options']},
     'options': {'argparse': ['action', 'nargs', 'const', 'default', 'choices',
                              'required', 'help', 'metavar', 'type', 'version'],
-                'clg': ['short', 'completer'],
+                'clg': ['short', 'completer', 'completer_cache', 'stream', 'batch'],
                 'post': ['match', 'need', 'conflict']},
     'args': {'argparse': ['action', 'nargs', 'const', 'default', 'choices',
                           'required', 'help', 'metavar', 'type'],
-             'clg': ['short', 'completer'],
+             'clg': ['short', 'completer', 'completer_cache', 'stream', 'batch'],
              'post': ['match', 'need', 'conflict']},
-    'execute': {'clg': ['module', 'file', 'function']}}
+    'execute': {'clg': ['module', 'file', 'function', 'fanout']},
+    'fanout': {'clg': ['arg', 'pool', 'workers', 'ordered']},
+    'completer_cache': {'clg': ['ttl', 'key', 'prefix', 'timeout', 'dir']}}
+# Sets of the valid keywords of each section (for checks).
+_VALID_KEYWORDS = {section: frozenset(keyword
+                                      for keywords in section_keywords.values()
+                                      for keyword in keywords)
+                   for section, section_keywords in KEYWORDS.items()}
 
 # Help command description.
 _HELP_PARSER = OrderedDict(
@@ -56,7 +72,22 @@ _HELP_PARSER = OrderedDict(
               'description': "Print commands' tree with theirs descriptions.",
               'options': {'page':{'short': 'p',
                                   'action': 'store_true',
-                                  'help': 'page output'}}}})
+                                  'help': 'page output'},
+                          'depth': {'short': 'd',
+                                    'type': 'int',
+                                    'help': 'maximum depth of the tree'},
+                          'filter': {'short': 'f',
+                                     'metavar': 'KEYWORD',
+                                     'help': 'only print commands having a word of '
+                                             'their name or description starting '
+                                             'with KEYWORD (and their parents)'}},
+              'args': {'commands': {'nargs': '*',
+                                    'metavar': 'COMMAND',
+                                    'help': 'only print the tree of this command'}}}})
+
+# Widths (in columns) of terminals for which the usage and the help of parsers
+# are rendered in snapshots (see **init**).
+_HELP_WIDTHS = (60, 80, 100, 120, 160)
 
 # Errors messages.
 _INVALID_SECTION = "this section is not of type '{type}'"
@@ -66,14 +97,31 @@ _ONE_KEYWORDS = "this section need (only) one of theses keywords: '{keywords}'"
 _MISSING_KEYWORD = "keyword '{keyword}' is missing"
 _UNKNOWN_ARG = "unknown {type} '{arg}'"
 _SHORT_ERR = 'this must be a single letter'
+_EXCLUSIVE_KEYWORDS = "keywords '{0}' and '{1}' can not be used together"
 _NEED_ERR = "{type} '{arg}' need {need_type} '{need_arg}'"
 _NEED_VALUE_ERR = "{type} '{arg}' need {need_type} '{need_arg}' with value '{need_value}'"
 _CONFLICT_ERR = "{type} '{arg}' conflict with {conflict_type} '{conflict_arg}'"
 _CONFLICT_VALUE_ERR = ("{type} '{arg}' conflict with value '{conflict_value}' "
                        "of {conflict_type} '{conflict_arg}'")
 _MATCH_ERR = "value '{val}' of {type} '{arg}' does not match pattern '{pattern}'"
+_PATTERN_ERR = "invalid pattern '{pattern}': {err}"
 _FILE_ERR = "Unable to load file: {err}"
 _LOAD_ERR = "Unable to load module: {err}"
+_POOL_ERR = "invalid pool '{pool}' (choose from 'thread', 'process')"
+_POOL_FILE_ERR = "functions of files can not be executed in a pool of processes"
+_WORKERS_ERR = 'this must be a positive integer'
+_DEPTH_ERR = 'argument -d/--depth: this must be a positive integer'
+_COMMAND_ERR = "Unable to find the configuration of command '{cmd}' in '{dir}'"
+
+# Result of a command run by CommandLine.parse_many.
+BatchResult = namedtuple('BatchResult', ('lineno', 'argv', 'args', 'status', 'error'))
+# Result of the execution of a command for a value of its *fanout* argument.
+FanoutResult = namedtuple('FanoutResult', ('index', 'value', 'result', 'status', 'error'))
+
+# Configuration files of the commands of a directory (by order of preference)
+# and name of the manifest of the directory (see *directory* keyword).
+_CONFIG_FILES = (('.yml', 'yaml'), ('.yaml', 'yaml'), ('.json', 'json'))
+_MANIFEST = 'manifest'
 
 # Argparse group's methods.
 _GRP_METHODS = {'groups': 'add_argument_group',
@@ -102,17 +150,19 @@ class CLGError(Exception):
 # Utils functions.
 #
 def _deepcopy(config):
-    """When using YAML anchors, parts of configurations are just references to
-    an other part. CLG parameters (like the 'short' parameter of an option or
-    the title of a group) are deleted from the current configuration, so theses
-    informations are lost in parts of configuration using anchors ... This
-    function replace references by a copy of the datas.
+    """Copy dictionaries and lists of the configuration in a single pass. When
+    using YAML anchors, parts of configurations are just references to an other
+    part. Unlike ``copy.deepcopy``, which keeps theses references, each
+    reference is replaced by its own copy of the datas.
     """
-    new_config = copy.deepcopy(config)
-    for key, value in new_config.items():
-        if isinstance(value, dict):
-            new_config[key] = _deepcopy(value)
-    return new_config
+    if isinstance(config, _CommandsDirectory):
+        # Configurations of commands are loaded for this directory only.
+        return config
+    if isinstance(config, dict):
+        return config.__class__((key, _deepcopy(value)) for key, value in config.items())
+    if isinstance(config, list):
+        return [_deepcopy(value) for value in config]
+    return config
 
 def _gen_parser(parser_conf, subparser=False):
     """Retrieve arguments pass to **argparse.ArgumentParser** from
@@ -142,6 +192,179 @@ def _get_args(parser_conf):
             args.update(_get_args(group))
     return args
 
+def _check_arg(path, arg_conf, arg_type, refs, errors=None):
+    """Check the configuration of an option/argument. Arguments referenced by
+    *need* and *conflict* keywords are added to **refs** (as ``(path, arg)``)
+    for being checked once all the arguments of the parser are known (see
+    **_check_refs**)."""
+    if not _check_section(path, arg_conf, arg_type, errors=errors):
+        return
+    for keyword in ('need', 'conflict'):
+        if (keyword in arg_conf
+        and _check_type(path + [keyword], arg_conf[keyword], list, errors)):
+            refs.extend((path + [keyword], str(cur_arg).split(':')[0])
+                        for cur_arg in arg_conf[keyword])
+
+    if 'completer_cache' in arg_conf:
+        cache_path = path + ['completer_cache']
+        cache_conf = arg_conf['completer_cache']
+        if 'completer' not in arg_conf:
+            _error(errors, path, _MISSING_KEYWORD.format(keyword='completer'))
+        if (_check_section(cache_path, cache_conf, 'completer_cache', errors=errors)
+        and 'key' in cache_conf):
+            _check_type(cache_path + ['key'], cache_conf['key'], list, errors)
+
+    if arg_type == 'options' and 'short' in arg_conf and len(arg_conf['short']) != 1:
+        _error(errors, path + ['short'], _SHORT_ERR)
+
+    if arg_conf.get('stream', False) and arg_conf.get('batch', False):
+        _error(errors, path, _EXCLUSIVE_KEYWORDS.format('stream', 'batch'))
+
+    if 'type' in arg_conf and not (isinstance(arg_conf['type'], str)
+                                   and arg_conf['type'] in TYPES):
+        _error(errors, path, "invalid type '%s'" % arg_conf['type'])
+
+    if 'match' in arg_conf:
+        try:
+            re.compile(arg_conf['match'])
+        except (re.error, TypeError) as err:
+            err_str = _PATTERN_ERR.format(pattern=arg_conf['match'], err=err)
+            _error(errors, path + ['match'], err_str)
+
+def _check_fanout(path, exec_conf, refs, errors=None):
+    """Check the *fanout* section of the execute section **exec_conf**. Its
+    argument is added to **refs** (see **_check_arg**)."""
+    fanout_path, fanout_conf = path + ['fanout'], exec_conf['fanout']
+    # Empty sections have already been reported with the keywords.
+    if not fanout_conf or not _check_section(fanout_path, fanout_conf, 'fanout',
+                                             need=('arg',), errors=errors):
+        return
+    if 'arg' in fanout_conf:
+        refs.append((fanout_path + ['arg'], fanout_conf['arg']))
+    pool = fanout_conf.get('pool', 'thread')
+    if pool not in ('thread', 'process'):
+        _error(errors, fanout_path + ['pool'], _POOL_ERR.format(pool=pool))
+    elif pool == 'process' and 'file' in exec_conf:
+        _error(errors, fanout_path + ['pool'], _POOL_FILE_ERR)
+    workers = fanout_conf.get('workers', 1)
+    if not isinstance(workers, int) or isinstance(workers, bool) or workers < 1:
+        _error(errors, fanout_path + ['workers'], _WORKERS_ERR)
+
+def _check_refs(refs, parser_args, errors=None):
+    """Check arguments referenced by *need* and *conflict* keywords (**refs**
+    collected by **_check_arg**) are in **parser_args**."""
+    for path, arg in refs:
+        if arg not in parser_args:
+            _error(errors, path, _UNKNOWN_ARG.format(type='option/argument', arg=arg))
+
+def _check_parser(path, parser_conf, errors=None, section='parsers', parser_index=None,
+                  load=True):
+    """Recursively check the configuration of a parser without building it, in
+    a single pass. Errors are raised or, when **errors** is a list, added to it
+    so the whole configuration is checked. Without **load**, commands of
+    directories are not loaded (they are checked when their parser is built).
+
+    This is also used for groups, in which case **parser_index** is the index
+    of the parser containing the group: the names of its arguments and the
+    references to resolve once all of them are known."""
+    if not _check_section(path, parser_conf, section, errors=errors):
+        return
+    if 'execute' in parser_conf:
+        exec_path, exec_conf = path + ['execute'], parser_conf['execute']
+        _check_section(exec_path, exec_conf, 'execute', one=('module', 'file'),
+                       errors=errors)
+
+    root = parser_index is None
+    parser_args, refs = parser_index = parser_index or (set(), [])
+    exec_conf = parser_conf.get('execute', None)
+    if isinstance(exec_conf, dict) and 'fanout' in exec_conf:
+        _check_fanout(path + ['execute'], exec_conf, refs, errors)
+    for arg_type in ('options', 'args'):
+        arg_type_path = path + [arg_type]
+        arg_type_conf = parser_conf.get(arg_type, None)
+        # Empty sections have already been reported with the keywords.
+        if arg_type_conf and _check_type(arg_type_path, arg_type_conf, dict, errors):
+            parser_args.update(arg_type_conf)
+            for arg, arg_conf in arg_type_conf.items():
+                _check_arg(arg_type_path + [arg], arg_conf, arg_type, refs, errors)
+
+    for grp_type in ('groups', 'exclusive_groups'):
+        if (parser_conf.get(grp_type, None)
+        and _check_type(path, parser_conf[grp_type], list, errors)):
+            for index, group in enumerate(parser_conf[grp_type]):
+                grp_path = path + [grp_type, '#%d' % index]
+                _check_parser(grp_path, group, errors, grp_type, parser_index)
+
+    # All the arguments of the command are known once its groups are checked
+    # (groups have no subcommands).
+    if not root:
+        return
+    _check_refs(refs, parser_args, errors)
+
+    if 'subparsers' in parser_conf:
+        subparsers_path = path + ['subparsers']
+        subparsers_conf = parser_conf['subparsers']
+        if isinstance(subparsers_conf, dict) and 'parsers' in subparsers_conf:
+            _check_section(subparsers_path, subparsers_conf, 'subparsers', errors=errors)
+            subparsers_path = subparsers_path + ['parsers']
+            subparsers_conf = subparsers_conf['parsers']
+        if isinstance(subparsers_conf, _CommandsDirectory):
+            if not load:
+                return
+            for parser_name in subparsers_conf:
+                try:
+                    subparser_conf = subparsers_conf[parser_name]
+                except CLGError as err:
+                    if errors is None:
+                        raise
+                    errors.append(err)
+                    continue
+                _check_parser(subparsers_path + [parser_name], subparser_conf, errors)
+        elif _check_type(subparsers_path, subparsers_conf, dict, errors):
+            for parser_name, subparser_conf in subparsers_conf.items():
+                _check_parser(subparsers_path + [parser_name], subparser_conf, errors,
+                              load=load)
+
+def validate(config):
+    """Check the whole configuration **config** without building any parser
+    and return the list of errors (**CLGError** objects, ordered by command).
+    An empty list means the configuration is valid, in which case a
+    **CommandLine** can be initialized with ``validated=True`` for not
+    checking it again."""
+    errors = []
+    if not (_check_empty([], config, errors) and _check_type([], config, dict, errors)):
+        return errors
+
+    try:
+        config = _load_directories(config)
+    except CLGError as err:
+        errors.append(err)
+        return errors
+    config = config.copy()
+    config.pop('page_help', None)
+    config.pop('add_batch_option', None)
+    if config.pop('add_help_cmd', False):
+        if not config.get('subparsers', None):
+            errors.append(CLGError([], 'unable to add help command: no subparsers'))
+            return errors
+        if isinstance(config['subparsers'], dict):
+            config['subparsers'] = _add_help_cmd(config['subparsers'])
+    _check_parser([], config, errors)
+    return errors
+
+def _add_help_cmd(subparsers_conf):
+    """Return a copy of **subparsers_conf** beginning with the help command."""
+    if isinstance(subparsers_conf.get('parsers', None), _CommandsDirectory):
+        subparsers_conf = OrderedDict(subparsers_conf)
+        subparsers_conf['parsers'] = subparsers_conf['parsers'].add_commands(_HELP_PARSER)
+        return subparsers_conf
+    if 'parsers' in subparsers_conf:
+        subparsers_conf = OrderedDict(subparsers_conf)
+        subparsers_conf['parsers'] = OrderedDict(
+            list(_HELP_PARSER.items()) + list(subparsers_conf['parsers'].items()))
+        return subparsers_conf
+    return OrderedDict(list(_HELP_PARSER.items()) + list(subparsers_conf.items()))
+
 def _set_builtin(value):
     """Replace configuration values which begin and end by ``__`` by the
     respective builtin function."""
@@ -162,10 +385,10 @@ def _print_help(parser):
     import types
 
     def _parse_known_args(self, arg_strings, namespace):
-        # Manage argcomplete monkey patching.
+        # Manage argcomplete monkey patching (the method of its class, which
+        # is not shadowed by this one, is used).
         if self.__class__.__name__ == 'MonkeyPatchedIntrospectiveArgumentParser':
-            from argcomplete.my_argparse import IntrospectiveArgumentParser
-            return IntrospectiveArgumentParser._parse_known_args(self, arg_strings, namespace)
+            return type(self)._parse_known_args(self, arg_strings, namespace)
 
         if not arg_strings:
             arg_strings = ['--help']
@@ -173,6 +396,209 @@ def _print_help(parser):
     parser._parse_known_args = types.MethodType(_parse_known_args, parser)
 
 
+#
+# Completion functions.
+#
+# Actions of options that take no value.
+_FLAG_ACTIONS = ('store_true', 'store_false', 'store_const', 'append_const',
+                 'count', 'help', 'version', 'page_help', 'BooleanOptionalAction')
+
+def _completion_nvalues(arg_conf):
+    """Get the number of values taken by an option/argument or ``None`` if it
+    is variable (or unknown for custom actions)."""
+    action = arg_conf.get('action', 'store')
+    if action in _FLAG_ACTIONS:
+        return 0
+    if action in ('store', 'append', 'extend'):
+        nargs = arg_conf.get('nargs', None)
+        if nargs is None:
+            return 1
+        if isinstance(nargs, int):
+            return nargs
+    return None
+
+def _completion_index(config, path=(), load=True):
+    """Build the completion index of **config** (the command **path**). For
+    each command (indexed by the tuple of the names of the subcommands leading
+    to it), it contains the elements needed for completing the command-line
+    without building parsers:
+
+        * `options`: list of ``(option strings, number of values, choices,
+          completer, help, exclusive group)``,
+        * `args`: list of ``(number of values, choices, completer, help)``,
+        * `subcommands`: names and helps of subcommands (or ``None``),
+        * `directory`: the commands of the directory of the subcommands when
+          they are not loaded (without **load**), in which case they are
+          indexed when they are reached (see **_index_completions**).
+    """
+    index = {}
+    if not path:
+        config = _load_directories(config)
+
+    def add_args(entry, conf, exclusive=None):
+        for arg, arg_conf in conf.get('options', {}).items():
+            option_strings = ['--%s' % _format_optname(arg)]
+            if 'short' in arg_conf:
+                option_strings.insert(0, '-%s' % arg_conf['short'])
+            if arg_conf.get('action', None) == 'BooleanOptionalAction':
+                option_strings.append('--no-%s' % _format_optname(arg))
+            entry['options'].append((
+                option_strings, _completion_nvalues(arg_conf),
+                _set_builtin(arg_conf.get('choices', None)),
+                arg_conf.get('completer', None),
+                _format_help(arg_conf.get('help', ''), arg_conf),
+                exclusive))
+        for arg_conf in conf.get('args', {}).values():
+            entry['args'].append((_completion_nvalues(arg_conf),
+                                  _set_builtin(arg_conf.get('choices', None)),
+                                  arg_conf.get('completer', None),
+                                  _format_help(arg_conf.get('help', ''), arg_conf)))
+        for group in conf.get('groups', []):
+            if group.get('args', None):
+                # Arguments of groups are after subcommands in argparse.
+                entry['args'].append((None, None, None, ''))
+            add_args(entry, group)
+        for group in conf.get('exclusive_groups', []):
+            entry['exclusive'] += 1
+            add_args(entry, group, entry['exclusive'])
+
+    def add_command(path, parser_conf, root=False):
+        entry = {'options': [], 'args': [], 'subcommands': None, 'exclusive': 0}
+        if parser_conf.get('add_help', True):
+            entry['options'].append((['-h', '--help'], 0, None, None,
+                                     argparse._('show this help message and exit'), None))
+        if root and parser_conf.get('add_batch_option', False):
+            entry['options'].append((['--batch'], 1, None, None, '', None))
+        add_args(entry, parser_conf)
+
+        if 'subparsers' in parser_conf:
+            subparsers_conf = parser_conf['subparsers']
+            subparsers_conf = subparsers_conf.get('parsers', subparsers_conf)
+            if root and parser_conf.get('add_help_cmd', False):
+                subparsers_conf = (subparsers_conf.add_commands(_HELP_PARSER)
+                                   if isinstance(subparsers_conf, _CommandsDirectory)
+                                   else OrderedDict(list(_HELP_PARSER.items())
+                                                    + list(subparsers_conf.items())))
+            if isinstance(subparsers_conf, _CommandsDirectory) and not load:
+                entry['subcommands'] = OrderedDict(
+                    (name, help or '') for name, help in subparsers_conf.helps.items())
+                entry['directory'] = subparsers_conf
+            else:
+                entry['subcommands'] = OrderedDict()
+                for name, subparser_conf in subparsers_conf.items():
+                    entry['subcommands'][name] = subparser_conf.get('help', '')
+                    add_command(path + (name,), subparser_conf)
+        index[path] = entry
+
+    add_command(path, config, root=not path)
+    return index
+
+def _index_completions(index, words, prefix):
+    """Get the completions of **prefix** for the command-line **words** from
+    the completion **index**. Return a list of ``(completion, help)`` or
+    ``None`` when the index is not enough (a completer is needed or the
+    command-line is ambiguous without parsing it) or if the command-line is
+    invalid."""
+    path, entry = (), index[()]
+    options = {option_string: option
+               for option in entry['options'] for option_string in option[0]}
+    arg_index, option, pending, seen = 0, None, 0, {}
+
+    for word in words:
+        if pending:
+            if word.startswith('-'):
+                return None
+            pending -= 1
+        elif word.startswith('-'):
+            option = options.get(word.split('=', 1)[0], None)
+            if word == '--' or option is None or option[1] is None:
+                return None
+            pending = option[1] - 1 if '=' in word else option[1]
+            if pending < 0:
+                return None
+            if option[5] is not None:
+                seen.setdefault(option[5], set()).add(option[0][0])
+        elif arg_index < len(entry['args']):
+            if entry['args'][arg_index][0] != 1:
+                return None
+            arg_index += 1
+        elif entry['subcommands'] is not None and word in entry['subcommands']:
+            path += (word,)
+            if path not in index:
+                try:
+                    index.update(_completion_index(entry['directory'][word], path, False))
+                except CLGError:
+                    return None
+            entry = index[path]
+            options = {option_string: option
+                       for option in entry['options'] for option_string in option[0]}
+            arg_index, seen = 0, {}
+        else:
+            return None
+
+    def values(choices, completer, help):
+        if completer is not None:
+            return None
+        if choices is not None:
+            return [(str(choice), help or '') for choice in choices
+                    if str(choice).startswith(prefix)]
+        import argcomplete.completers
+        return [(completion, '')
+                for completion in argcomplete.completers.FilesCompleter()(prefix=prefix)]
+
+    # The current word is a value of an option.
+    if pending:
+        if prefix.startswith('-'):
+            return None
+        return values(option[2], option[3], option[4])
+
+    if prefix.startswith('-') and '=' in prefix:
+        return None
+    # Options conflicting with options of exclusive groups already used are
+    # not completed.
+    completions = [(option_string, help)
+                   for option_strings, _, _, _, help, group in entry['options']
+                   if not seen.get(group, set()) - {option_strings[0]}
+                   for option_string in option_strings
+                   if option_string.startswith(prefix)]
+    if prefix.startswith('-'):
+        return completions
+
+    # The current word is an argument or a subcommand.
+    if arg_index < len(entry['args']):
+        nvalues, choices, completer, help = entry['args'][arg_index]
+        if nvalues != 1:
+            return None
+        arg_completions = values(choices, completer, help)
+        return None if arg_completions is None else completions + arg_completions
+    if entry['subcommands'] is not None:
+        completions.extend((name, help)
+                           for name, help in entry['subcommands'].items()
+                           if name.startswith(prefix))
+    return completions
+
+def _complete(index, build):
+    """Answer the completion request of ``argcomplete`` from the completion
+    **index**, without building the parsers unless it is needed (**build** is
+    then called for getting the main parser). This exits the program."""
+    import argcomplete
+
+    class IndexCompletionFinder(argcomplete.CompletionFinder):
+        def _get_completions(self, comp_words, cword_prefix, cword_prequote,
+                             last_wordbreak_pos):
+            completions = _index_completions(index, comp_words[1:], cword_prefix)
+            if completions is None:
+                self._parser = build()
+                return argcomplete.CompletionFinder._get_completions(
+                    self, comp_words, cword_prefix, cword_prequote, last_wordbreak_pos)
+
+            self._display_completions.update(completions)
+            completions = self.filter_completions([elt for elt, _ in completions])
+            return self.quote_completions(completions, cword_prequote, last_wordbreak_pos)
+
+    IndexCompletionFinder()(argparse.ArgumentParser(add_help=False))
+
+
 #
 # Formatting functions.
 #
@@ -195,6 +621,17 @@ def _format_optdisplay(value, conf):
             if 'short' in conf
             else '--%s' % _format_optname(value))
 
+def _format_help(value, arg_conf):
+    """Replace builtins (``__DEFAULT__``, ``__CHOICES__``, ...) in the help
+    **value** of an option/argument."""
+    default = str(arg_conf.get('default', '?'))
+    match = str(arg_conf.get('match', '?'))
+    choices = ', '.join(map(str, arg_conf.get('choices', ['?'])))
+    return (value.replace('__DEFAULT__', default)
+                 .replace('__CHOICES__', choices)
+                 .replace('__MATCH__', match)
+                 .replace('__FILE__', sys.path[0]))
+
 def _format_arg(arg, arg_conf, arg_type):
     return _format_optdisplay(arg, arg_conf) if arg_type == 'options' else arg
 
@@ -202,49 +639,59 @@ def _format_arg(arg, arg_conf, arg_type):
 #
 # Check functions.
 #
-def _check_empty(path, conf):
+def _error(errors, path, msg):
+    """Raise a **CLGError** or add it to **errors** when they are collected
+    (see **validate**)."""
+    if errors is None:
+        raise CLGError(path, msg)
+    errors.append(CLGError(path, msg))
+
+def _check_empty(path, conf, errors=None):
     """Check **conf** is not ``None`` or an empty iterable."""
     if conf is None or (hasattr(conf, '__iter__') and not len(conf)):
-        raise CLGError(path, _EMPTY_CONF)
+        _error(errors, path, _EMPTY_CONF)
+        return False
+    return True
 
-def _check_type(path, conf, conf_type=dict):
+def _check_type(path, conf, conf_type=dict, errors=None):
     """Check the **conf** is of **conf_type** type and raise an error if not."""
     if not isinstance(conf, conf_type):
         type_str = str(conf_type).split()[1][1:-2]
-        raise CLGError(path, _INVALID_SECTION.format(type=type_str))
+        _error(errors, path, _INVALID_SECTION.format(type=type_str))
+        return False
+    return True
 
-def _check_keywords(path, conf, section, one=None, need=None):
+def _check_keywords(path, conf, section, one=None, need=None, errors=None):
     """Check items of **conf** from **KEYWORDS[section]**. **one** indicate
     whether a check must be done on the number of elements or not."""
-    valid_keywords = [keyword
-                      for keywords in KEYWORDS[section].values()
-                      for keyword in keywords]
-
+    valid_keywords = _VALID_KEYWORDS[section]
     for keyword in conf:
         if keyword not in valid_keywords:
-            raise CLGError(path, _INVALID_KEYWORD.format(keyword=keyword))
-        if keyword != 'default':
-            _check_empty(path + [keyword], conf[keyword])
+            _error(errors, path, _INVALID_KEYWORD.format(keyword=keyword))
+        elif keyword != 'default':
+            _check_empty(path + [keyword], conf[keyword], errors)
 
     if one and len([arg for arg in conf if arg in one]) != 1:
-        raise CLGError(path, _ONE_KEYWORDS.format(keywords="', '".join(one)))
+        _error(errors, path, _ONE_KEYWORDS.format(keywords="', '".join(one)))
 
     if need:
         for keyword in need:
             if keyword not in conf:
-                raise CLGError(path, _MISSING_KEYWORD.format(keyword=keyword))
+                _error(errors, path, _MISSING_KEYWORD.format(keyword=keyword))
 
-def _check_section(path, conf, section, one=None, need=None):
-    """Check section is not empty, is a dict and have not extra keywords."""
-    _check_empty(path, conf)
-    _check_type(path, conf, dict)
-    _check_keywords(path, conf, section, one=one, need=need)
+def _check_section(path, conf, section, one=None, need=None, errors=None):
+    """Check section is not empty, is a dict and have not extra keywords.
+    Return whether the content of the section can be checked."""
+    if not (_check_empty(path, conf, errors) and _check_type(path, conf, dict, errors)):
+        return False
+    _check_keywords(path, conf, section, one=one, need=need, errors=errors)
+    return True
 
 
 #
 # Post processing functions.
 #
-def _has_value(value, conf):
+def _has_value(value, action):
     """The value of an argument not passed in the command is *None*, except:
         * if **action** is ``store_true`` or ``store_false``: in this case, the
           value is respectively ``False`` and ``True``.
@@ -254,98 +701,403 @@ def _has_value(value, conf):
     if value is None:
         return False
 
-    action = conf.get('action', None)
     return ((not action and value) or
             (action and action == 'store_true' and value) or
             (action and action == 'store_false' and not value) or
             # Manage boolean values like BooleanOptional action
             (isinstance(value, bool) and value))
 
+def _compile_post(parser_args):
+    """Compile post processing keywords (*match*, *need* and *conflict*) of the
+    arguments of a parser to a list of ``(arg, action, checks)``, *checks*
+    being a list of ``(function, *params)``. References to other arguments are
+    resolved, patterns are compiled and error messages are formatted, so
+    only values of arguments have to be checked when parsing."""
+    plan, conversions = [], []
+    for arg, (arg_type, arg_conf) in parser_args.items():
+        if any((arg_conf.get('default', '') == '__SUPPRESS__',
+                arg_conf.get('action', '') == 'version')):
+            continue
+
+        # Values of streamed arguments are converted and matched while
+        # iterating on them and values of batch arguments are converted at
+        # once, and their choices are checked after the conversion. Values are
+        # replaced once the other arguments have been checked.
+        choices = _set_builtin(arg_conf.get('choices', None))
+        if arg_conf.get('batch', False) and 'type' in arg_conf:
+            conversions.append((arg, arg_conf.get('action', None), [(
+                _post_batch, arg, BATCH_TYPES.get(arg_conf['type'], None),
+                TYPES[arg_conf['type']], choices)]))
+        if arg_conf.get('stream', False):
+            conversions.append((arg, arg_conf.get('action', None), [(
+                _post_stream, arg,
+                TYPES[arg_conf['type']] if 'type' in arg_conf else None,
+                re.compile(arg_conf['match']) if 'match' in arg_conf else None,
+                {'type': arg_type, 'arg': arg, 'pattern': arg_conf.get('match', None)},
+                choices)]))
+
+        checks = []
+        if 'match' in arg_conf and not arg_conf.get('stream', False):
+            msg_elts = {'type': arg_type, 'arg': arg, 'pattern': arg_conf['match']}
+            checks.append((_post_match, re.compile(arg_conf['match']),
+                           arg_conf.get('nargs', None) in ('*', '+'), msg_elts))
 
-def _post_need(parser, parser_args, args_values, arg):
-    """Post processing that check all for needing options."""
-    arg_type, arg_conf = parser_args[arg]
-    for cur_arg in arg_conf['need']:
-        cur_arg_split = cur_arg.split(':')
-        cur_arg = cur_arg_split[0]
-        need_value = cur_arg_split[1] if len(cur_arg_split) == 2 else None
-        cur_arg_type, cur_arg_conf = parser_args[cur_arg]
-        cur_value = args_values[cur_arg]
-        if not _has_value(cur_value, cur_arg_conf):
-            strings = {'type': arg_type[:-1],
-                       'arg': _format_arg(arg, arg_conf, arg_type),
-                       'need_type': cur_arg_type[:-1],
-                       'need_arg': _format_arg(cur_arg, cur_arg_conf, cur_arg_type)}
-            parser.error(_NEED_ERR.format(**strings))
-
-        if (need_value is not None
-        and (isinstance(cur_value, (list, tuple)) and need_value not in cur_value)
-        and cur_value != need_value):
-            strings = {'type': arg_type[:-1],
-                       'arg': _format_arg(arg, arg_conf, arg_type),
-                       'need_type': cur_arg_type[:-1],
-                       'need_arg': _format_arg(cur_arg, cur_arg_conf, cur_arg_type),
-                       'need_value': need_value}
-            parser.error(_NEED_VALUE_ERR.format(**strings))
-
-def _post_conflict(parser, parser_args, args_values, arg):
-    """Post processing that check for conflicting options."""
-    arg_type, arg_conf = parser_args[arg]
-    for cur_arg in arg_conf['conflict']:
-        cur_arg_split = cur_arg.split(':')
-        cur_arg = cur_arg_split[0]
-        conflict_value = cur_arg_split[1] if len(cur_arg_split) == 2 else None
-        cur_arg_type, cur_arg_conf = parser_args[cur_arg]
-        cur_value = args_values[cur_arg]
-        if _has_value(args_values[cur_arg], cur_arg_conf):
-            strings = {'type': arg_type[:-1],
-                       'arg': _format_arg(arg, arg_conf, arg_type),
-                       'conflict_type': cur_arg_type[:-1],
-                       'conflict_arg': _format_arg(cur_arg, cur_arg_conf, cur_arg_type)}
-            if conflict_value is None:
-                parser.error(_CONFLICT_ERR.format(**strings))
-                return
-
-            if ((isinstance(cur_value, (list, tuple)) and conflict_value in cur_value)
-            or cur_value == conflict_value):
-                strings.update(conflict_value=conflict_value)
-                parser.error(_CONFLICT_VALUE_ERR.format(**strings))
-
-def _post_match(parser, parser_args, args_values, arg):
-    """Post processing that check the value."""
-    arg_type, arg_conf = parser_args[arg]
-    pattern = arg_conf['match']
-
-    msg_elts = {'type': arg_type, 'arg': arg, 'pattern': pattern}
-    if arg_conf.get('nargs', None) in ('*', '+'):
-        for value in args_values[arg] or []:
-            if not re.match(pattern, value):
-                parser.error(_MATCH_ERR.format(val=value, **msg_elts))
-    elif not re.match(pattern, args_values[arg]):
-        parser.error(_MATCH_ERR.format(val=args_values[arg], **msg_elts))
-
-def _exec_module(path, exec_conf, args_values):
-    """Load and execute a function of a module according to **exec_conf**."""
+        for keyword in ('need', 'conflict'):
+            for cur_arg in arg_conf.get(keyword, []):
+                cur_arg_split = cur_arg.split(':')
+                cur_arg = cur_arg_split[0]
+                cur_value = cur_arg_split[1] if len(cur_arg_split) == 2 else None
+                cur_arg_type, cur_arg_conf = parser_args[cur_arg]
+                strings = {'type': arg_type[:-1],
+                           'arg': _format_arg(arg, arg_conf, arg_type),
+                           '%s_type' % keyword: cur_arg_type[:-1],
+                           '%s_arg' % keyword: _format_arg(cur_arg, cur_arg_conf,
+                                                           cur_arg_type)}
+                err_msg, value_err_msg = {
+                    'need': (_NEED_ERR, _NEED_VALUE_ERR),
+                    'conflict': (_CONFLICT_ERR, _CONFLICT_VALUE_ERR)}[keyword]
+                checks.append((getattr(_SELF, '_post_%s' % keyword),
+                               cur_arg, cur_arg_conf.get('action', None), cur_value,
+                               err_msg.format(**strings),
+                               value_err_msg.format(**dict(strings, **{
+                                   '%s_value' % keyword: cur_value}))))
+
+        if checks:
+            plan.append((arg, arg_conf.get('action', None), checks))
+    return plan + conversions
+
+def _post_need(parser, args_values, value, need_arg, need_action, need_value,
+               err_msg, value_err_msg):
+    """Post processing that check for a needed option."""
+    cur_value = args_values[need_arg]
+    if not _has_value(cur_value, need_action):
+        parser.error(err_msg)
+
+    if (need_value is not None
+    and (isinstance(cur_value, (list, tuple)) and need_value not in cur_value)
+    and cur_value != need_value):
+        parser.error(value_err_msg)
+
+def _post_conflict(parser, args_values, value, conflict_arg, conflict_action,
+                   conflict_value, err_msg, value_err_msg):
+    """Post processing that check for a conflicting option."""
+    cur_value = args_values[conflict_arg]
+    if _has_value(cur_value, conflict_action):
+        if conflict_value is None:
+            parser.error(err_msg)
+            return
+
+        if ((isinstance(cur_value, (list, tuple)) and conflict_value in cur_value)
+        or cur_value == conflict_value):
+            parser.error(value_err_msg)
+
+def _post_match(parser, args_values, value, pattern, multiple, msg_elts):
+    """Post processing that check the value. All the values are checked at
+    once and looked at one by one only when one of them does not match."""
+    values = (value or []) if multiple else [value]
+    if all(map(pattern.match, values)):
+        return
+    for cur_value in values:
+        if not pattern.match(cur_value):
+            parser.error(_MATCH_ERR.format(val=cur_value, **msg_elts))
+
+def _get_action(parser, dest):
+    """Get the action of **parser** storing its value in **dest**."""
+    return next(action for action in parser._actions if action.dest == dest)
+
+def _type_error(parser, action, type_func, value):
+    """Exit with the error of ``argparse`` for an invalid **value** of
+    **action**."""
+    msg = argparse._('invalid %(type)s value: %(value)r') % {
+        'type': getattr(type_func, '__name__', repr(type_func)), 'value': value}
+    parser.error(str(argparse.ArgumentError(action, msg)))
+
+def _choice_error(parser, action, choices, value):
+    """Exit with the error of ``argparse`` for a **value** of **action** that
+    is not in **choices**."""
+    msg = argparse._('invalid choice: %(value)r (choose from %(choices)s)') % {
+        'value': value, 'choices': ', '.join(map(repr, choices))}
+    parser.error(str(argparse.ArgumentError(action, msg)))
+
+def _post_batch(parser, args_values, value, arg, converter, type_func, choices):
+    """Post processing that converts all the values of a *batch* argument at
+    once, with **converter** (from **BATCH_TYPES**) or by mapping
+    **type_func** on them, and checks converted values are in **choices**
+    (if any). When a value is invalid, values are converted one by one with
+    **type_func** for finding it."""
+    values = value if isinstance(value, list) else [value]
+    try:
+        result = (list(map(type_func, values))
+                  if converter is None
+                  else converter(values))
+    except argparse.ArgumentTypeError as err:
+        parser.error(str(argparse.ArgumentError(_get_action(parser, arg), str(err))))
+    except (TypeError, ValueError) as err:
+        action = _get_action(parser, arg)
+        for cur_value in values:
+            try:
+                type_func(cur_value)
+            except argparse.ArgumentTypeError as cur_err:
+                parser.error(str(argparse.ArgumentError(action, str(cur_err))))
+            except (TypeError, ValueError):
+                _type_error(parser, action, type_func, cur_value)
+        parser.error(str(argparse.ArgumentError(action, str(err))))
+    if choices is not None:
+        for cur_value in result:
+            if cur_value not in choices:
+                _choice_error(parser, _get_action(parser, arg), choices, cur_value)
+    args_values[arg] = result if isinstance(value, list) else result[0]
+
+def _batch_int(values):
+    """Batch converter of *int* values, stored in an array of 64 bits
+    integers (or in a list when they do not fit)."""
+    import array
+    try:
+        return array.array('q', map(int, values))
+    except OverflowError:
+        return list(map(int, values))
+
+def _batch_float(values):
+    """Batch converter of *float* values, stored in an array of doubles."""
+    import array
+    return array.array('d', map(float, values))
+
+BATCH_TYPES.update(int=_batch_int, float=_batch_float)
+
+def _post_stream(parser, args_values, value, arg, type_func, pattern, msg_elts,
+                 choices):
+    """Post processing that replaces the values of a *stream* argument by an
+    iterator on them (see **_stream_values**)."""
+    action = _get_action(parser, arg)
+    items = _stream_values(parser, action, value if isinstance(value, list) else [value],
+                           type_func, pattern, msg_elts, choices)
+    # Items are read after the parse: errors are written in the output of the
+    # call (see **CommandLine.parse**).
+    get_output = getattr(parser, '_get_output', None)
+    output = None if get_output is None else get_output()
+    args_values[arg] = items if output is None else _output_items(parser, output, items)
+
+def _output_items(parser, output, items):
+    """Iterate on **items** with **output** as the output of **parser** while
+    each item is read."""
+    while True:
+        previous = parser._set_output(output)
+        try:
+            item = next(items)
+        except StopIteration:
+            return
+        finally:
+            parser._set_output(previous)
+        yield item
+
+def _stream_source(parser, action, value):
+    """Iterate on the items of a value of a *stream* argument: lines of the
+    standard input for ``-``, lines of the file for ``@FILE`` or the value
+    itself. Empty lines are ignored."""
+    if value == '-' or (isinstance(value, str) and value.startswith('@')):
+        try:
+            fhandler = sys.stdin if value == '-' else open(value[1:])
+        except OSError as err:
+            msg = argparse._("can't open '%(filename)s': %(error)s")
+            parser.error(str(argparse.ArgumentError(
+                action, msg % {'filename': value[1:], 'error': err})))
+        try:
+            for line in fhandler:
+                line = line.rstrip('\r\n')
+                if line:
+                    yield line
+        finally:
+            if fhandler is not sys.stdin:
+                fhandler.close()
+    else:
+        yield value
+
+def _stream_values(parser, action, values, type_func, pattern, msg_elts, choices):
+    """Iterate on the items of the values of a *stream* argument (see
+    **_stream_source**), checking each item with **pattern**, converting it
+    with **type_func** and checking it is in **choices** (if any) as it is
+    read, so items are never all in memory. Invalid items exit with the error,
+    like ``argparse`` does."""
+    for value in values:
+        for item in _stream_source(parser, action, value):
+            if isinstance(item, str):
+                if pattern is not None and not pattern.match(item):
+                    parser.error(_MATCH_ERR.format(val=item, **msg_elts))
+                if type_func is not None:
+                    try:
+                        item = type_func(item)
+                    except argparse.ArgumentTypeError as err:
+                        parser.error(str(argparse.ArgumentError(action, str(err))))
+                    except (TypeError, ValueError):
+                        _type_error(parser, action, type_func, item)
+                if choices is not None and item not in choices:
+                    _choice_error(parser, action, choices, item)
+            yield item
+
+def _page(parser, text, pager_cmd):
+    """Page **text** (a string or an iterable of strings, written to the pager
+    as they are produced) with the **pager_cmd** command if the output of
+    **parser** (``None`` for the standard output) is a terminal, else print it.
+    The environment (``$PAGER``) is not modified so it is safe to use in
+    threads."""
+    if isinstance(text, str):
+        text = [text]
+    get_output = getattr(parser, '_get_output', None)
+    if ((get_output is None or get_output() is None)
+    and sys.stdin.isatty() and sys.stdout.isatty()):
+        import subprocess
+        proc = subprocess.Popen(pager_cmd, shell=True, stdin=subprocess.PIPE,
+                                universal_newlines=True)
+        try:
+            with proc.stdin as pipe:
+                for chunk in text:
+                    pipe.write(chunk)
+        except (BrokenPipeError, KeyboardInterrupt):
+            # The pager has been quit before the end of the text.
+            pass
+        while True:
+            try:
+                proc.wait()
+                break
+            except KeyboardInterrupt:
+                pass
+    elif parser is None:
+        sys.stdout.write(''.join(text))
+    else:
+        parser._print_message(''.join(text), sys.stdout)
+
+def _exit_status(err):
+    """Get the exit status and the error message (if any) of a
+    ``SystemExit`` exception like the interpreter does."""
+    if err.code is None:
+        return 0, None
+    if isinstance(err.code, int):
+        return err.code, None
+    return 1, '%s\n' % err.code
+
+def _run_coroutine(result):
+    """Run **result** of an executed function on a new event loop if it is a
+    coroutine (ie: the function is a coroutine function)."""
+    if result is None:
+        return
+    import inspect
+    if inspect.iscoroutine(result):
+        import asyncio
+        asyncio.run(result)
+
+def _fanout_call(func, args):
+    """Call **func** with **args** in a worker of a fan-out (see
+    **_fanout_results**) and return its result (coroutines are run on a new
+    event loop of the worker)."""
+    result = func(args)
+    import inspect
+    if inspect.iscoroutine(result):
+        import asyncio
+        return asyncio.run(result)
+    return result
+
+def _fanout_results(func, fanout_conf, args_values):
+    """Call **func** for each value of the argument *arg* of **fanout_conf**
+    (a single value being a list of one value), with a copy of
+    **args_values** having this value, in a pool of threads or processes. A
+    **FanoutResult** is yielded for each value once its call is done, in the
+    order of the values if *ordered*. Values are submitted as workers are
+    available, so values of *stream* arguments are not all read at once."""
+    import concurrent.futures
+
+    arg = fanout_conf['arg']
+    values = args_values[arg]
+    if values is None:
+        values = []
+    elif isinstance(values, (str, bytes)) or not hasattr(values, '__iter__'):
+        values = [values]
+    ordered = fanout_conf.get('ordered', True)
+    process = fanout_conf.get('pool', 'thread') == 'process'
+    workers = fanout_conf.get('workers', None)
+    if workers is None:
+        # Defaults of concurrent.futures executors.
+        cpus = os.cpu_count() or 1
+        workers = cpus if process else min(32, cpus + 4)
+    executor = (concurrent.futures.ProcessPoolExecutor
+                if process
+                else concurrent.futures.ThreadPoolExecutor)(workers)
+
+    def result(future):
+        index, value = pending.pop(future)
+        try:
+            return FanoutResult(index, value, future.result(), 0, None)
+        except SystemExit as err:
+            return FanoutResult(index, value, None, *_exit_status(err))
+        except Exception as err:
+            return FanoutResult(index, value, None, 1,
+                                '%s: %s\n' % (err.__class__.__name__, err))
+
+    def done():
+        if ordered:
+            return [result(next(iter(pending)))]
+        finished, _ = concurrent.futures.wait(
+            pending, return_when=concurrent.futures.FIRST_COMPLETED)
+        return [result(future) for future in finished]
+
+    pending = OrderedDict()
+    with executor:
+        try:
+            for index, value in enumerate(values):
+                item_args = args_values.__class__(OrderedDict(args_values))
+                item_args[arg] = value
+                pending[executor.submit(_fanout_call, func, item_args)] = (index, value)
+                while len(pending) >= 2 * workers:
+                    for item_result in done():
+                        yield item_result
+            while pending:
+                for item_result in done():
+                    yield item_result
+        finally:
+            # Values not started yet are not executed when the iteration is
+            # stopped.
+            for future in pending:
+                future.cancel()
+
+def _fanout(func, fanout_conf, args_values, output=None):
+    """Execute **func** for each value of the *fanout* argument (see
+    **_fanout_results**), writing the error of each failed value in
+    **output** (default: standard error) as soon as it is known, and exit
+    with the highest status if some values failed."""
+    output = sys.stderr if output is None else output
+    status = 0
+    for result in _fanout_results(func, fanout_conf, args_values):
+        if result.status:
+            output.write('%s: %s' % (result.value,
+                                     result.error or 'exit status %d\n' % result.status))
+            output.flush()
+            status = max(status, result.status)
+    if status:
+        sys.exit(status)
+
+def _load_module(path, exec_conf):
+    """Load the function to execute of a module according to **exec_conf**."""
     mdl_func = exec_conf.get('function', 'main')
     mdl_tree = exec_conf['module']
 
+    import importlib
     try:
         mdl = importlib.import_module(mdl_tree)
     except (ImportError, ModuleNotFoundError) as err:
         raise CLGError(path, _LOAD_ERR.format(err=err))
-    getattr(mdl, mdl_func)(args_values)
+    return getattr(mdl, mdl_func)
 
-def _exec_file(path, exec_conf, args_values):
-    """Load and execute a function of a file according to **exec_conf**."""
+def _load_file(path, exec_conf):
+    """Load the function to execute of a file according to **exec_conf**."""
     mdl_path = _set_builtin(exec_conf['file'])  # Allow __FILE__ builtin.
     mdl_name = os.path.splitext(os.path.basename(mdl_path))[0]
     mdl_func = exec_conf.get('function', 'main')
 
+    import importlib.util
     try:
         spec = importlib.util.spec_from_file_location(mdl_name, mdl_path)
         module = importlib.util.module_from_spec(spec)
         spec.loader.exec_module(module)
-        getattr(module, mdl_func)(args_values)
+        return getattr(module, mdl_func)
     except FileNotFoundError as err:
         raise CLGError(path, _FILE_ERR.format(err=err.filename))
     except (IOError, ImportError, AttributeError) as err:
@@ -355,43 +1107,65 @@ def _exec_file(path, exec_conf, args_values):
 # Classes.
 #
 class NoAbbrevParser(argparse.ArgumentParser):
-    """Child class of **ArgumentParser** allowing to disable abbravetions."""
+    """Child class of **ArgumentParser** allowing to disable abbravetions.
+
+    Option strings are looked up in the dictionary of options of the parser
+    and, for the prefix matching of options with a single prefix character, in
+    a sorted list of them, so lookups do not depend on the number of options."""
+    def _get_single_prefix_options(self):
+        """Return the sorted option strings having a single prefix character.
+        The list is built once and rebuilt when options are added (option
+        strings are never removed, even when resolving conflicts, as the new
+        option takes them)."""
+        option_strings = self._option_string_actions
+        index = self.__dict__.get('_single_prefix_options', None)
+        if index is None or index[0] != len(option_strings):
+            chars = self.prefix_chars
+            index = (len(option_strings),
+                     sorted(option_string
+                            for option_string in option_strings
+                            if len(option_string) > 1
+                            and option_string[0] in chars
+                            and option_string[1] not in chars))
+            self._single_prefix_options = index
+        return index[1]
+
     def _get_option_tuples(self, option_string):
+        actions = self._option_string_actions
         result = []
 
         # option strings starting with two prefix characters are only
         # split at the '='
         chars = self.prefix_chars
         if option_string[0] in chars and option_string[1] in chars:
-            if '=' in option_string:
-                option_prefix, explicit_arg = option_string.split('=', 1)
-            else:
-                option_prefix = option_string
-                explicit_arg = None
-            for option_string in self._option_string_actions:
-                if option_string == option_prefix:
-                    action = self._option_string_actions[option_string]
-                    tup = action, option_string, explicit_arg
-                    result.append(tup)
+            option_prefix, sep, explicit_arg = option_string.partition('=')
+            if option_prefix in actions:
+                result.append((actions[option_prefix], option_prefix,
+                               explicit_arg if sep else None))
 
         # single character options can be concatenated with their arguments
         # but multiple character options always have to have their argument
         # separate
         elif option_string[0] in chars and option_string[1] not in chars:
             option_prefix = option_string
-            explicit_arg = None
             short_option_prefix = option_string[:2]
             short_explicit_arg = option_string[2:]
 
-            for option_string in self._option_string_actions:
-                if option_string == short_option_prefix:
-                    action = self._option_string_actions[option_string]
-                    tup = action, option_string, short_explicit_arg
-                    result.append(tup)
-                elif option_string.startswith(option_prefix):
-                    action = self._option_string_actions[option_string]
-                    tup = action, option_string, explicit_arg
-                    result.append(tup)
+            if short_option_prefix in actions:
+                result.append((actions[short_option_prefix], short_option_prefix,
+                               short_explicit_arg))
+            options = self._get_single_prefix_options()
+            index = bisect.bisect_left(options, option_prefix)
+            while index < len(options) and options[index].startswith(option_prefix):
+                if options[index] != short_option_prefix:
+                    result.append((actions[options[index]], options[index], None))
+                index += 1
+
+            # keep the order of the options in the parser (for the message of
+            # ambiguous options)
+            if len(result) > 1:
+                order = {option: idx for idx, option in enumerate(actions)}
+                result.sort(key=lambda tup: order[tup[1]])
 
         # shouldn't ever get here
         else:
@@ -413,13 +1187,697 @@ class HelpPager(argparse.Action):
                                  help=help)
 
     def __call__(self, parser, namespace, values, option_string=None):
-        """Page help using `pydoc.pager` method (which use $PAGER environment
-        variable)."""
-        os.environ['PAGER'] = 'less -c'
-        pydoc.pager(parser.format_help())
+        """Page help with the `less -c` command."""
+        _page(parser, parser.format_help(), 'less -c')
         parser.exit()
 ACTIONS.update(page_help=HelpPager)
 
+class BatchAction(argparse.Action):
+    """Action running the commands of a file (or of the standard input if the
+    value is ``-``), one command per line (see **CommandLine.parse_many**).
+    The **CommandLine** object is passed with the *const* parameter. Errors are
+    printed with the line number of the command (in the output of the current
+    call, see **CommandLine.parse**) and the parser exits with the highest
+    exit status of the commands."""
+    def __init__(self, option_strings, dest=argparse.SUPPRESS,
+                 default=argparse.SUPPRESS, const=None, metavar='FILE', help=None):
+        argparse.Action.__init__(self,
+                                 option_strings=option_strings,
+                                 dest=dest,
+                                 default=default,
+                                 const=const,
+                                 metavar=metavar,
+                                 help=help)
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        try:
+            fhandler = sys.stdin if values == '-' else open(values)
+        except OSError as err:
+            parser.error("can't open '%s': %s" % (values, err.strerror))
+
+        status = 0
+        try:
+            for result in self.const.parse_many(fhandler, self.const._get_output()):
+                if result.error:
+                    parser._print_message('%s:%d: %s\n' % (
+                        values, result.lineno, result.error.strip().split('\n')[-1]),
+                        sys.stderr)
+                status = max(status, result.status)
+        finally:
+            if fhandler is not sys.stdin:
+                fhandler.close()
+        parser.exit(status)
+
+class _LazySubParsersAction(argparse._SubParsersAction):
+    """Subparsers action that postpones the build of a subparser until it is
+    selected on the command-line (*lazy* mode of **CommandLine**)."""
+    def __init__(self, *args, **kwargs):
+        import threading
+        argparse._SubParsersAction.__init__(self, *args, **kwargs)
+        self.pending = OrderedDict()
+        self.lock = threading.Lock()
+
+    def build(self, parser_name):
+        """Build the subparser **parser_name** if it has not been built yet.
+        The subparser is only removed from pending subparsers once built, so
+        other threads wait for the end of the build."""
+        if parser_name not in self.pending:
+            return
+        with self.lock:
+            build_func = self.pending.get(parser_name, None)
+            if build_func is not None:
+                build_func()
+                del self.pending[parser_name]
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        self.build(values[0])
+        argparse._SubParsersAction.__call__(self, parser, namespace, values, option_string)
+
+def _replace_subparser(subparsers, name, **kwargs):
+    """Create the parser of the subcommand **name** of **subparsers** like
+    its *add_parser* method, replacing the parser already added for it (see
+    **_CommandsDirectory**)."""
+    kwargs.pop('help', None)
+    if kwargs.get('prog') is None:
+        kwargs['prog'] = '%s %s' % (subparsers._prog_prefix, name)
+    parser = subparsers._parser_class(**kwargs)
+    subparsers._name_parser_map[name] = parser
+    return parser
+
+class _CommandsDirectory(OrderedDict):
+    """Configurations of the commands of a directory (*directory* and
+    *package* keywords of subparsers), indexed by name. Names and helps of the
+    commands (*helps*) come from the manifest of the directory so the
+    configuration of a command is only loaded when it is accessed. **path**
+    is the path of the commands in the configuration and **commands** are
+    configurations of commands that are not in the directory, added first
+    (like the ``help`` command).
+
+    Methods returning configurations (``items``, ``values``, ...) load all the
+    commands."""
+    def __init__(self, path, directory, helps, commands=None):
+        OrderedDict.__init__(self)
+        self.path = path
+        self.directory = directory
+        self.helps = OrderedDict()
+        self.added = set(commands or ())
+        for name, conf in (commands or {}).items():
+            OrderedDict.__setitem__(self, name, conf)
+            self.helps[name] = conf.get('help', None)
+        for name, help in helps.items():
+            OrderedDict.__setitem__(self, name, None)
+            self.helps[name] = help
+
+    def __getitem__(self, name):
+        conf = OrderedDict.__getitem__(self, name)
+        if conf is None:
+            conf_path = self.path + [name]
+            for ext, format in _CONFIG_FILES:
+                conf_file = os.path.join(self.directory, name + ext)
+                if os.path.exists(conf_file):
+                    break
+            else:
+                raise CLGError(conf_path, _COMMAND_ERR.format(cmd=name, dir=self.directory))
+            try:
+                conf = _load_config(format, conf_file)
+            except Exception as err:
+                raise CLGError(conf_path, _FILE_ERR.format(err=err))
+            conf = _load_directories(conf, conf_path)
+            OrderedDict.__setitem__(self, name, conf)
+        return conf
+
+    def get(self, name, default=None):
+        return self[name] if name in self else default
+
+    def items(self):
+        return [(name, self[name]) for name in self]
+
+    def values(self):
+        return [self[name] for name in self]
+
+    def loaded(self, name):
+        """Return the configuration of the command **name** if it has already
+        been loaded (or *None*)."""
+        return OrderedDict.__getitem__(self, name)
+
+    def subdirectory(self, name):
+        """Return the commands of the subdirectory having the name of the
+        command **name** if it has a manifest (or *None*), without loading the
+        configuration of the command. This is used for the tree of the
+        ``help`` command."""
+        directory = os.path.join(self.directory, name)
+        for ext, _ in _CONFIG_FILES:
+            if os.path.exists(os.path.join(directory, _MANIFEST + ext)):
+                return _commands_directory(self.path + [name, 'subparsers'], directory)
+        return None
+
+    def add_commands(self, commands):
+        """Return a copy of the directory beginning with **commands**."""
+        directory = _CommandsDirectory(self.path, self.directory, {}, commands)
+        directory.added.update(self.added)
+        for name in self:
+            OrderedDict.__setitem__(directory, name, OrderedDict.__getitem__(self, name))
+            directory.helps[name] = self.helps[name]
+        return directory
+
+def _get_directory(path, subparsers_conf):
+    """Get the directory of the commands of the subparsers **subparsers_conf**
+    (at **path**) from its *directory* or *package* keyword."""
+    if 'directory' in subparsers_conf:
+        return _set_builtin(subparsers_conf['directory'])
+
+    import importlib.util
+    try:
+        spec = importlib.util.find_spec(subparsers_conf['package'])
+    except (ImportError, ValueError) as err:
+        raise CLGError(path, _LOAD_ERR.format(err=err))
+    if spec is None or not spec.submodule_search_locations:
+        raise CLGError(path, _LOAD_ERR.format(err="no package named '%s'"
+                                                  % subparsers_conf['package']))
+    return list(spec.submodule_search_locations)[0]
+
+def _commands_directory(path, directory):
+    """Get the commands of **directory** (subparsers at **path** in the
+    configuration).
+    Their names and helps are read from the manifest of the directory (a
+    mapping of the names of the commands to their help). Without manifest,
+    all the configuration files of the directory are loaded."""
+    for ext, format in _CONFIG_FILES:
+        manifest_file = os.path.join(directory, _MANIFEST + ext)
+        if os.path.exists(manifest_file):
+            try:
+                manifest = _load_config(format, manifest_file)
+            except Exception as err:
+                raise CLGError(path, _FILE_ERR.format(err=err))
+            if not isinstance(manifest, dict):
+                raise CLGError(path, '%s: %s' % (manifest_file,
+                                                 _INVALID_SECTION.format(type='dict')))
+            return _CommandsDirectory(path + ['parsers'], directory, manifest)
+
+    try:
+        filenames = sorted(os.listdir(directory))
+    except OSError as err:
+        raise CLGError(path, _FILE_ERR.format(err=err))
+    exts = [ext for ext, _ in _CONFIG_FILES]
+    names = OrderedDict.fromkeys(os.path.splitext(filename)[0]
+                                 for filename in filenames
+                                 if os.path.splitext(filename)[1] in exts)
+    commands = _CommandsDirectory(path + ['parsers'], directory, names)
+    for name in commands:
+        commands.helps[name] = commands[name].get('help', None)
+    return commands
+
+def _load_directories(config, path=None):
+    """Return **config** with its subparsers having a *directory* (or
+    *package*) keyword replaced by subparsers whose *parsers* are the
+    commands of the directory (see **_CommandsDirectory**). Only the sections
+    leading to them are copied, so **config** itself is returned when there
+    is no directory."""
+    path = path or []
+    subparsers_conf = config.get('subparsers', None) if isinstance(config, dict) else None
+    if not isinstance(subparsers_conf, dict):
+        return config
+
+    subparsers_path = path + ['subparsers']
+    keywords = [keyword for keyword in ('parsers', 'directory', 'package')
+                if keyword in subparsers_conf]
+    if 'directory' in keywords or 'package' in keywords:
+        if len(keywords) != 1:
+            raise CLGError(subparsers_path, _ONE_KEYWORDS.format(
+                keywords="', '".join(('parsers', 'directory', 'package'))))
+        directory = _get_directory(subparsers_path, subparsers_conf)
+        subparsers_conf = OrderedDict((keyword, value)
+                                      for keyword, value in subparsers_conf.items()
+                                      if keyword not in ('directory', 'package'))
+        subparsers_conf['parsers'] = _commands_directory(subparsers_path, directory)
+    else:
+        parsers_conf = subparsers_conf.get('parsers', subparsers_conf)
+        if isinstance(parsers_conf, _CommandsDirectory) or not isinstance(parsers_conf, dict):
+            return config
+        parsers_path = subparsers_path + (['parsers'] if 'parsers' in subparsers_conf else [])
+        loaded = OrderedDict((name, _load_directories(parser_conf, parsers_path + [name]))
+                             for name, parser_conf in parsers_conf.items())
+        if all(loaded[name] is parser_conf for name, parser_conf in parsers_conf.items()):
+            return config
+        if 'parsers' in subparsers_conf:
+            subparsers_conf = subparsers_conf.copy()
+            subparsers_conf['parsers'] = loaded
+        else:
+            subparsers_conf = loaded
+
+    config = config.copy()
+    config['subparsers'] = subparsers_conf
+    return config
+
+class CachedCompleter(object):
+    """Wrapper of an ``argcomplete`` **completer** caching its completions on
+    disk, so they are shared between shell sessions, and limiting the time
+    spent waiting for it.
+
+    Completions are cached for **ttl** seconds. The cache key is built from
+    the **name** of the completer, the prefix (unless **prefix** is *False*,
+    in which case the completer is called with an empty prefix and its
+    completions are filtered) and the values of the arguments **key** of the
+    parsed arguments. If the completer does not answer within **timeout**
+    seconds, expired completions of the cache are returned (or nothing) and its
+    completions are cached when it returns; it is not called again for the
+    same cache key until then. The cache is stored in **dir**
+    (default: ``$XDG_CACHE_HOME/clg/completers``).
+    """
+    def __init__(self, completer, name, ttl=60, key=None, prefix=True,
+                 timeout=None, dir=None):
+        self.completer = completer
+        self.name = name
+        self.ttl = ttl
+        self.key = key or []
+        self.prefix = prefix
+        self.timeout = timeout
+        self.dir = os.path.expanduser(dir or os.path.join(
+            os.environ.get('XDG_CACHE_HOME', '~/.cache'), 'clg', 'completers'))
+
+    def _cache_file(self, prefix, parsed_args):
+        """Get the path of the cache file of the completions."""
+        import json
+        import hashlib
+        key = json.dumps([self.name, prefix if self.prefix else None,
+                          [getattr(parsed_args, arg, None) for arg in self.key]],
+                         default=str)
+        return os.path.join(self.dir, '%s-%s.json' % (
+            self.name, hashlib.sha256(key.encode()).hexdigest()[:32]))
+
+    def _read(self, cache_file):
+        """Return the time and the completions of **cache_file** (or
+        ``(None, None)`` if it does not exist or is invalid)."""
+        import json
+        try:
+            with open(cache_file) as fhandler:
+                cache = json.load(fhandler, object_pairs_hook=OrderedDict)
+            return cache['time'], cache['completions']
+        except (OSError, ValueError, KeyError, TypeError):
+            return None, None
+
+    def _write(self, cache_file, completions):
+        """Atomically write **completions** in **cache_file**. As the cache is
+        only an optimization, errors are ignored."""
+        import json
+        import time
+        import tempfile
+        try:
+            os.makedirs(self.dir, exist_ok=True)
+            fd, tmp_file = tempfile.mkstemp(prefix='.', dir=self.dir)
+            try:
+                with os.fdopen(fd, 'w') as fhandler:
+                    json.dump({'time': time.time(), 'completions': completions}, fhandler)
+                os.replace(tmp_file, cache_file)
+            except BaseException:
+                os.remove(tmp_file)
+                raise
+        except (OSError, TypeError, ValueError):
+            pass
+
+    def _lock_file(self, cache_file):
+        """Get the path of the lock file of **cache_file**, containing the pid
+        of the process calling the completer."""
+        return '%s.lock' % os.path.splitext(cache_file)[0]
+
+    def _locked(self, cache_file):
+        """Check whether the completer is being called for **cache_file** by a
+        running process."""
+        if os.name != 'posix':
+            return False
+        try:
+            with open(self._lock_file(cache_file)) as fhandler:
+                os.kill(int(fhandler.read()), 0)
+            return True
+        except PermissionError:
+            # Process of another user.
+            return True
+        except (OSError, ValueError):
+            return False
+
+    def _lock(self, cache_file):
+        """Mark the completer as being called for **cache_file** by the current
+        process. *False* is returned if another running process is calling it
+        (locks of processes that have been killed are replaced). As locks are
+        only an optimization, errors are ignored."""
+        import tempfile
+        if os.name != 'posix':
+            return True
+        lock_file = self._lock_file(cache_file)
+        try:
+            os.makedirs(self.dir, exist_ok=True)
+            fd, tmp_file = tempfile.mkstemp(prefix='.', dir=self.dir)
+            try:
+                with os.fdopen(fd, 'w') as fhandler:
+                    fhandler.write(str(os.getpid()))
+                for _ in range(2):
+                    try:
+                        os.link(tmp_file, lock_file)
+                        return True
+                    except FileExistsError:
+                        if self._locked(cache_file):
+                            return False
+                        os.remove(lock_file)
+            finally:
+                os.remove(tmp_file)
+        except OSError:
+            pass
+        return True
+
+    def _unlock(self, cache_file):
+        """Remove the lock of **cache_file** if it is owned by the current
+        process."""
+        lock_file = self._lock_file(cache_file)
+        try:
+            with open(lock_file) as fhandler:
+                if fhandler.read() == str(os.getpid()):
+                    os.remove(lock_file)
+        except OSError:
+            pass
+
+    def _call(self, prefix, kwargs, cache_file, lock=False):
+        """Call the completer and cache its completions (a list or a
+        dictionnary of completions with their descriptions). ``None`` is
+        returned if it failed or, with **lock**, if another process is already
+        calling it for the same cache key."""
+        if lock and not self._lock(cache_file):
+            return None
+        try:
+            completions = self.completer(prefix=prefix if self.prefix else '', **kwargs)
+            completions = (OrderedDict(completions)
+                           if hasattr(completions, 'items')
+                           else list(completions))
+        except Exception:
+            completions = None
+        else:
+            self._write(cache_file, completions)
+        finally:
+            if lock:
+                self._unlock(cache_file)
+        return completions
+
+    def _fork(self, prefix, kwargs, cache_file):
+        """Call the completer in a child process, detached from the shell, and
+        return its completions if it answers within the time limit. As the
+        process answering a completion request of the shell exits as soon as
+        completions are printed, the child keeps running for caching them."""
+        import json
+        import select
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                os.close(read_fd)
+                os.setsid()
+                # Release the outputs read by the shell (``argcomplete`` writes
+                # completions on the file descriptor 8 and debug on 9).
+                devnull = os.open(os.devnull, os.O_RDWR)
+                for fd in (0, 1, 2):
+                    os.dup2(devnull, fd)
+                for fd in (8, 9):
+                    try:
+                        os.close(fd)
+                    except OSError:
+                        pass
+                completions = self._call(prefix, kwargs, cache_file, lock=True)
+                with os.fdopen(write_fd, 'w') as fhandler:
+                    json.dump(completions, fhandler)
+            finally:
+                os._exit(0)
+
+        os.close(write_fd)
+        with os.fdopen(read_fd) as fhandler:
+            if not select.select([fhandler], [], [], self.timeout)[0]:
+                return None
+            data = fhandler.read()
+        os.waitpid(pid, 0)
+        try:
+            return json.loads(data, object_pairs_hook=OrderedDict)
+        except ValueError:
+            return None
+
+    def _complete(self, prefix, kwargs, cache_file):
+        """Call the completer, within the time limit, and return its
+        completions or ``None`` if it failed or is too long. Completions are
+        written in the cache as soon as the completer returns, even after the
+        time limit, so they are used by next calls. With a time limit, the
+        completer is not called while a previous call for the same cache key
+        is still running."""
+        if self.timeout is None:
+            return self._call(prefix, kwargs, cache_file)
+        if self._locked(cache_file):
+            return None
+        if '_ARGCOMPLETE' in os.environ and hasattr(os, 'fork'):
+            return self._fork(prefix, kwargs, cache_file)
+
+        import threading
+        result = []
+        thread = threading.Thread(
+            target=lambda: result.append(self._call(prefix, kwargs, cache_file, lock=True)),
+            daemon=True)
+        thread.start()
+        thread.join(self.timeout)
+        return result[0] if result else None
+
+    def __call__(self, prefix, parsed_args=None, **kwargs):
+        import time
+        cache_file = self._cache_file(prefix, parsed_args)
+        cache_time, completions = self._read(cache_file)
+        if cache_time is None or time.time() - cache_time >= self.ttl:
+            new_completions = self._complete(prefix, dict(kwargs, parsed_args=parsed_args),
+                                             cache_file)
+            if new_completions is not None:
+                completions = new_completions
+
+        completions = completions or []
+        if not self.prefix:
+            completions = (OrderedDict((completion, desc)
+                                       for completion, desc in completions.items()
+                                       if completion.startswith(prefix))
+                           if hasattr(completions, 'items')
+                           else [completion for completion in completions
+                                 if completion.startswith(prefix)])
+        return completions
+
+class _HelpTree(object):
+    """Tree of commands printed by the ``help`` command. The configuration is
+    walked once and the full tree is only rendered once. Commands are filtered
+    with a sorted index of the words of their name and description (built on
+    the first search).
+
+    Commands are stored in flat lists (indexed by the identifier of the command)
+    instead of one object by command as creating many objects triggers the
+    garbage collector on the whole (possibly huge) configuration."""
+    def __init__(self, config, width=80):
+        self.names = []
+        self.descs = []
+        self.parents = []
+        # Identifiers of the subcommands of a command (*None* for the first
+        # level) and identifiers of commands by path.
+        self.children = {}
+        self.paths = {}
+        self.desc_start = self._add_commands(config, None, '', 0) + 4
+        self.desc_len = width - self.desc_start
+        self._words = None
+        self._text = None
+
+    def _add_commands(self, config, parent, path, level):
+        """Add the subcommands of the command **config** and return the maximum
+        length of the names of commands in the tree (with indentation)."""
+        subparsers_conf = config['subparsers']
+        subparsers_conf = subparsers_conf.get('parsers', subparsers_conf)
+        helps = getattr(subparsers_conf, 'helps', None)
+        if helps is not None:
+            # Only the manifests of directories (see **_CommandsDirectory**)
+            # are read: the subcommands of a command that is not loaded are
+            # read from the manifest of the subdirectory having its name.
+            directory, subparsers_conf = subparsers_conf, OrderedDict()
+            for cmd, help in helps.items():
+                cmd_conf = directory.loaded(cmd)
+                if cmd_conf is None:
+                    cmd_conf = {'help': help or ''}
+                    subdirectory = directory.subdirectory(cmd)
+                    if subdirectory is not None:
+                        cmd_conf['subparsers'] = subdirectory
+                subparsers_conf[cmd] = cmd_conf
+        length = 0
+        children = self.children[parent] = []
+        for cmd, cmd_conf in subparsers_conf.items():
+            cmd_id = len(self.names)
+            cmd_path = '%s %s' % (path, cmd) if path else cmd
+            self.names.append(cmd)
+            self.descs.append(cmd_conf.get('help', ''))
+            self.parents.append(parent)
+            self.paths[cmd_path] = cmd_id
+            children.append(cmd_id)
+            length = max(length, 4 * level + 4 + len(cmd))
+            if 'subparsers' in cmd_conf:
+                length = max(length, self._add_commands(cmd_conf, cmd_id, cmd_path,
+                                                        level + 1))
+        return length
+
+    def _wrap(self, desc):
+        """Wrap the description **desc**."""
+        lines, cur_line = [], ''
+        for cur_word in desc.split():
+            if (len(cur_line) + 1 + len(cur_word)) > self.desc_len:
+                lines.append(cur_line)
+                cur_line = ''
+            cur_line += ' ' + cur_word
+        lines.append(cur_line)
+        return lines
+
+    def search(self, keyword):
+        """Return the identifiers of the commands having words starting with
+        each word of **keyword**, and of their parents."""
+        if self._words is None:
+            self._words = sorted(
+                (word, cmd_id)
+                for cmd_id, (name, desc) in enumerate(zip(self.names, self.descs))
+                for word in set(re.findall(r'\w+', ('%s %s' % (name, desc)).lower())
+                                + [name.lower()]))
+        words = self._words
+
+        matches = None
+        for word in re.findall(r'\w+', keyword.lower()) or ['']:
+            word_matches = set()
+            index = bisect.bisect_left(words, (word,))
+            while index < len(words) and words[index][0].startswith(word):
+                word_matches.add(words[index][1])
+                index += 1
+            matches = word_matches if matches is None else matches & word_matches
+
+        visible = set()
+        for cmd_id in matches:
+            while cmd_id is not None and cmd_id not in visible:
+                visible.add(cmd_id)
+                cmd_id = self.parents[cmd_id]
+        return visible
+
+    def render(self, roots=None, depth=None, visible=None):
+        """Generate the lines of the tree of the **roots** commands (default to
+        the commands of the first level), limited to **depth** levels and to
+        **visible** commands."""
+        def filter_cmds(cmd_ids):
+            if visible is None:
+                return cmd_ids
+            return [cmd_id for cmd_id in cmd_ids if cmd_id in visible]
+
+        # The tree is walked with a stack of the commands of each level (with
+        # the index of the next command and the prefix of lines).
+        stack = [[filter_cmds(self.children[None] if roots is None else roots), 0, '']]
+        while stack:
+            frame = stack[-1]
+            cmd_ids, index, prefix = frame
+            if index == len(cmd_ids):
+                stack.pop()
+                continue
+            frame[1] += 1
+            cmd_id = cmd_ids[index]
+            last = index == len(cmd_ids) - 1
+            children = ([] if depth is not None and len(stack) >= depth
+                        else filter_cmds(self.children.get(cmd_id, [])))
+
+            desc = self.descs[cmd_id]
+            for line_index, line in enumerate(self._wrap(desc) if desc else ['']):
+                if line_index == 0:
+                    symbols = '└── ' if last else '├── '
+                else:
+                    symbols = ('    ' if last else '│   ') + ('│   ' if children else '')
+                yield '%s%s%s \033[%sG%s\n' % (prefix, symbols,
+                                               '' if line_index else self.names[cmd_id],
+                                               self.desc_start, line)
+            if children:
+                stack.append([children, 0, prefix + ('    ' if last else '│   ')])
+
+    @property
+    def text(self):
+        """Full tree of commands."""
+        if self._text is None:
+            self._text = ''.join(self.render())
+        return self._text
+
+
+class Stats(object):
+    """Timings (in seconds) of the phases of a **CommandLine**: loading of the
+    configuration by **init** (*load*, or *cache* when it is read from the
+    cache), copy of the configuration (*deepcopy*), *validate* and *build* of
+    the parsers, then, for each command-line, parsing by ``argparse``
+    (*parse*), checks of the values (*post*) and the function to execute
+    (*execute*). Durations of the phases of many command-lines are summed.
+
+    *commands* contains the time spent building the subtree of each command
+    (the command and its subcommands), indexed by the names of the commands
+    separated by spaces (``''`` for the main command). In *lazy* mode,
+    commands built when they are selected are added when they are built.
+    *command* is the last command parsed.
+
+    When **path** is set, `write` appends the timings in this file as a JSON
+    line."""
+    def __init__(self, path=None):
+        self.path = path
+        self.phases = OrderedDict()
+        self.commands = OrderedDict()
+        self.command = None
+
+    def add(self, phase, start):
+        """Add the time elapsed since **start** (a value of
+        ``time.perf_counter``) to **phase** and return the current time."""
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0) + now - start
+        return now
+
+    def call(self, phase, func, *args):
+        """Call **func** with **args**, adding the duration of the call to
+        **phase**. When the result is a coroutine, the coroutine returned
+        adds the duration of its run when it is awaited."""
+        start = time.perf_counter()
+        try:
+            result = func(*args)
+        finally:
+            self.add(phase, start)
+
+        import inspect
+        return self._timed(phase, result) if inspect.iscoroutine(result) else result
+
+    async def _timed(self, phase, coroutine):
+        start = time.perf_counter()
+        try:
+            return await coroutine
+        finally:
+            self.add(phase, start)
+
+    def as_dict(self):
+        """Return the timings as a dictionnary."""
+        return OrderedDict((('command', self.command),
+                            ('phases', OrderedDict(self.phases)),
+                            ('commands', OrderedDict(self.commands))))
+
+    def write(self):
+        """Append the timings, with the time, the process and the name of the
+        program, as a JSON line in the file **path** (if any). As timings are
+        only informative, errors are ignored."""
+        if not self.path:
+            return
+
+        import json
+        line = OrderedDict((('time', time.time()),
+                            ('pid', os.getpid()),
+                            ('prog', os.path.basename(sys.argv[0]))))
+        line.update(self.as_dict())
+        try:
+            with open(self.path, 'a') as fhandler:
+                fhandler.write(json.dumps(line) + '\n')
+        except OSError:
+            pass
+
+def _env_stats():
+    """Return a **Stats** object if timings are enabled by the ``CLG_TIMINGS``
+    environment variable (the file in which timings are appended), ``None``
+    otherwise."""
+    path = os.environ.get('CLG_TIMINGS', None)
+    return Stats(path) if path else None
+
 class Namespace(argparse.Namespace):
     """Iterable and editable namespace."""
     def __init__(self, args):
@@ -451,43 +1909,225 @@ class Namespace(argparse.Namespace):
     def __iter__(self):
         return ((key, value) for key, value in self.__dict__.items())
 
+class SlotsNamespace(object):
+    """Iterable and editable namespace storing the arguments in slots instead
+    of a dictionary, which takes less memory when many namespaces are kept.
+    A subclass having a slot for each argument is generated for each command
+    (see the *slots* parameter of **CommandLine** and **_namespace_class**)."""
+    __slots__ = ()
+    _fields = ()
+    _fields_set = frozenset()
+
+    def __init__(self, args=()):
+        for key, value in (args.items() if hasattr(args, 'items') else args):
+            setattr(self, key, value)
+
+    def __getitem__(self, key):
+        if key not in self._fields_set:
+            raise KeyError(key)
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in self._fields_set or not hasattr(self, key):
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __delitem__(self, key):
+        if key not in self._fields_set or not hasattr(self, key):
+            raise KeyError(key)
+        delattr(self, key)
+
+    def _get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __iter__(self):
+        for key in self._fields:
+            value = getattr(self, key, _UNSET)
+            if value is not _UNSET:
+                yield key, value
+
+    def __contains__(self, key):
+        return key in self._fields_set and hasattr(self, key)
+
+    @property
+    def __dict__(self):
+        """Arguments in a new dictionary (for ``vars``)."""
+        return dict(self)
+
+    def __eq__(self, other):
+        if not isinstance(other, (SlotsNamespace, argparse.Namespace)):
+            return NotImplemented
+        return dict(self) == dict(other if isinstance(other, SlotsNamespace)
+                                  else vars(other))
+
+    def __repr__(self):
+        return 'Namespace(%s)' % ', '.join('%s=%r' % (key, value)
+                                           for key, value in self)
+
+    def __reduce__(self):
+        # Generated classes can not be pickled by reference.
+        return _new_namespace, (self._fields, tuple(self))
+
+# Value of the slots of arguments not set.
+_UNSET = object()
+# Classes of namespaces with slots (indexed by their fields).
+_NAMESPACE_CLASSES = {}
+
+def _namespace_class(fields):
+    """Get the class of namespaces with a slot for each of **fields** (a tuple
+    of names of arguments). When a name can not be a slot (not an identifier
+    or the name of an attribute of **SlotsNamespace**), **Namespace** is
+    used."""
+    cls = _NAMESPACE_CLASSES.get(fields, None)
+    if cls is None:
+        if all(field.isidentifier()
+               and not field.startswith('__')
+               and not hasattr(SlotsNamespace, field)
+               for field in fields):
+            cls = type('Namespace', (SlotsNamespace,), {'__slots__': fields,
+                                                        '__module__': __name__,
+                                                        '_fields': fields,
+                                                        '_fields_set': frozenset(fields)})
+        else:
+            cls = Namespace
+        cls = _NAMESPACE_CLASSES.setdefault(fields, cls)
+    return cls
+
+def _new_namespace(fields, args):
+    """Create a namespace with slots for **fields** (used for unpickling)."""
+    return _namespace_class(fields)(args)
+
 class CommandLine(object):
     """CommandLine object that parse a preformatted dictionnary and generate
     ``argparse`` parser."""
-    def __init__(self, config, keyword='command', deepcopy=True):
+    def __init__(self, config, keyword='command', deepcopy=False, lazy=False,
+                 compiled=None, prefetch=False, snapshots=None, validated=False,
+                 slots=False, stats=None):
         """Initialize the command from **config** which is a dictionnary
         (preferably an OrderedDict). **keyword** is the name use for knowing the
         path of subcommands (ie: 'command0', 'command1', ... in the namespace of
-        arguments)."""
+        arguments). **config** is never modified so it is only copied (with
+        **deepcopy**) if it may be modified later by the program.
+
+        With **lazy**, the whole configuration is checked but subcommands are
+        only built when they are selected on the command-line. The `build`
+        method allows to build all the remaining subcommands. They are all
+        built when completing (``_ARGCOMPLETE`` environment variable set by
+        ``argcomplete``).
+
+        **compiled** is the `compiled` attribute of a previous **CommandLine**
+        built from the same configuration. It contains the parameters passed to
+        ``argparse`` for each parser and argument, indexed by their path in the
+        configuration. Elements in it are considered valid and are not checked
+        again.
+
+        With **prefetch**, the function to execute for the command is loaded
+        in a background thread as soon as the command is known from the
+        command-line, while arguments are parsed and checked.
+
+        **snapshots** are the usage and the help of the parsers rendered for
+        some widths of terminal (see **init**), or a function returning them
+        that is called the first time they are needed. Parsers then use them
+        instead of formatting their usage and help.
+
+        The whole configuration is checked before building parsers and the
+        first error is raised (see **validate** for getting all the errors).
+        With **validated**, the configuration is considered valid (it has
+        already been checked by **validate**) and is not checked again.
+
+        With **slots**, arguments are returned in a **SlotsNamespace** instead
+        of a **Namespace**: its class, generated for each command, has a slot
+        for each argument so namespaces take less memory (for example when
+        keeping the results of `parse_many`).
+
+        **stats** is a **Stats** object in which the timings of the phases are
+        recorded (`stats` attribute). By default, one is created when the
+        ``CLG_TIMINGS`` environment variable is set to a file, in which the
+        timings are appended after each call of `parse` and `parse_async`.
+        Otherwise, `stats` is ``None`` and nothing is timed.
+
+        Once initialized, the object can be shared by many threads: parsing
+        does not modify any global state and the output (help, usage and
+        errors) can be redirected for each call."""
         _check_empty('', config)
         _check_type('', config, dict)
-        self.config = _deepcopy(config) if deepcopy else config
+        self.stats = stats = stats if stats is not None else _env_stats()
+        if stats is not None:
+            start = time.perf_counter()
+        config = _load_directories(config)
+        if stats is not None:
+            start = stats.add('load', start)
+        self.config = _deepcopy(config) if deepcopy else config.copy()
+        if stats is not None:
+            stats.add('deepcopy', start)
         self.keyword = keyword
+        self.lazy = lazy
+        self.prefetch = prefetch
+        self.slots = slots
+        self.compiled = OrderedDict()
+        self._precompiled = compiled or {}
         self._parsers = OrderedDict()
+        self._post_plans = {}
+        self._exec_cache = {}
+        self._prefetches = {}
+        self._prefetch_index = None
+        self._lazy_actions = []
+        self._snapshots = snapshots
         self.parser = None
 
-        # Allows to page to all helps by replacing the default 'help' action.
-        if self.config.pop('page_help', False):
-            argparse._HelpAction = HelpPager
-            ACTIONS.update(help=HelpPager)
+        # Allows to page to all helps by replacing the default 'help' action
+        # of the parsers.
+        self.page_help = self.config.pop('page_help', False)
 
         # Manage the case when we want a help command that prints a description
         # of all commands.
         self.help_cmd = self.config.pop('add_help_cmd', False)
+        self._help_tree = None
+
+        # Manage the case when we want an option for running commands of a file.
+        self.batch_option = self.config.pop('add_batch_option', False)
         if self.help_cmd:
             subparsers_conf = self.config.get('subparsers', None)
             if not subparsers_conf:
                 raise CLGError([], 'unable to add help command: no subparsers')
 
-            if 'parsers' in subparsers_conf:
-                subparsers_conf['parsers'] = OrderedDict(
-                    list(_HELP_PARSER.items()) + list(subparsers_conf['parsers'].items()))
-            else:
-                subparsers_conf = OrderedDict(
-                    list(_HELP_PARSER.items()) + list(subparsers_conf.items()))
-            self.config['subparsers'] = subparsers_conf
-
-        self._add_parser([])
+            self.config['subparsers'] = _add_help_cmd(subparsers_conf)
+
+        # Check the whole configuration once, so it is not checked again when
+        # building parsers. When some elements are precompiled, only the
+        # others are checked while building them.
+        self.validated = validated
+        if not validated and compiled is None:
+            if stats is not None:
+                start = time.perf_counter()
+            errors = []
+            _check_parser([], self.config, errors, load=False)
+            if errors:
+                raise errors[0]
+            self.validated = True
+            if stats is not None:
+                stats.add('validate', start)
+
+        if stats is None:
+            self._add_parser([])
+        else:
+            # Time the subtree of each command (lazy builds included, as they
+            # use this attribute).
+            self._add_parser = self._timed_add_parser
+            start = time.perf_counter()
+            self._add_parser([])
+            stats.add('build', start)
+
+        # ``argcomplete`` patches the whole tree of parsers when completing, so
+        # subcommands are not built on demand.
+        if '_ARGCOMPLETE' in os.environ:
+            self.build()
 
     def _get_config(self, path, ignore=True):
         """Retrieve an element configuration (based on **path**) in the
@@ -518,29 +2158,105 @@ class CommandLine(object):
                 pass
         return cmd_number
 
-    def _add_parser(self, path, parser=None):
+    def _create_parser(self, factory, params):
+        """Create a parser with **factory** (a parser class or the *add_parser*
+        method of subparsers) and **params**. When paging help, the default
+        help option is replaced by one using **HelpPager**. Messages of the
+        parser are written in the output of the current call."""
+        import types
+
+        paged = self.page_help and params.get('add_help', True)
+        parser = factory(**(dict(params, add_help=False) if paged else params))
+        if paged:
+            parser.add_argument('-h', '--help', action=HelpPager,
+                                help=argparse._('show this help message and exit'))
+
+        get_output = self._get_output
+        def _print_message(self, message, file=None):
+            output = get_output()
+            argparse.ArgumentParser._print_message(self, message,
+                                                   file if output is None else output)
+        parser._print_message = types.MethodType(_print_message, parser)
+        parser._get_output = get_output
+        parser._set_output = self._set_output
+        return parser
+
+    def _use_snapshots(self, parser, key):
+        """Make **parser** (indexed by **key**) use the snapshots of its usage
+        and help when there are some for the width of the terminal."""
+        import types
+
+        get_snapshot = self._get_snapshot
+        def format_usage(self):
+            snapshot = get_snapshot(key)
+            return type(self).format_usage(self) if snapshot is None else snapshot[0]
+        def format_help(self):
+            snapshot = get_snapshot(key)
+            return type(self).format_help(self) if snapshot is None else snapshot[1]
+        parser.format_usage = types.MethodType(format_usage, parser)
+        parser.format_help = types.MethodType(format_help, parser)
+
+    def _get_snapshot(self, key):
+        """Get the usage and the help of the parser **key** for the width of the
+        terminal (or ``None``)."""
+        if callable(self._snapshots):
+            self._snapshots = self._snapshots() or {}
+        snapshots = self._snapshots
+        if not snapshots or snapshots['prog'] != self.parser.prog:
+            return None
+        return _get_snapshot(snapshots, key)
+
+    def _get_output(self):
+        """Get the output of the current call (``None`` for the standard
+        output and error)."""
+        return getattr(self.__dict__.get('_local', None), 'output', None)
+
+    def _set_output(self, output):
+        """Set the output of the current call and return the previous one. The
+        output is local to the current thread."""
+        local = self.__dict__.get('_local', None)
+        if local is None:
+            if output is None:
+                return None
+            import threading
+            local = self.__dict__.setdefault('_local', threading.local())
+        previous = getattr(local, 'output', None)
+        local.output = output
+        return previous
+
+    def _add_parser(self, path, parser=None, section='parsers', parser_args=None):
         """Add a subparser to a parser. If **parser** is ``None``, the subparser
-        is in fact the main parser."""
+        is in fact the main parser. **section** is the type of the element in
+        the configuration (groups are also managed by this method, in which
+        case **parser_args** are the arguments of the parser containing the
+        group)."""
         # Get configuration.
         parser_conf = self._get_config(path)
+        precompiled = '/'.join(path) in self._precompiled
 
         # Check parser configuration.
-        _check_section(path, parser_conf, 'parsers')
-        if 'execute' in parser_conf:
-            exec_path, exec_conf = path + ['execute'], parser_conf['execute']
-            _check_section(exec_path, exec_conf, 'execute', one=('module', 'file'))
+        if not (precompiled or self.validated):
+            _check_section(path, parser_conf, section)
+            if 'execute' in parser_conf:
+                exec_path, exec_conf = path + ['execute'], parser_conf['execute']
+                _check_section(exec_path, exec_conf, 'execute', one=('module', 'file'))
 
         # Initialize parent parser.
         if parser is None:
             parser_obj = (argparse.ArgumentParser
-                          if parser_conf.pop('allow_abbrev', False)
+                          if parser_conf.get('allow_abbrev', False)
                           else NoAbbrevParser)
-            self.parser = parser_obj(**_gen_parser(parser_conf))
+            parser_params = (self._precompiled[''] if precompiled
+                             else _gen_parser(parser_conf))
+            self.compiled[''] = parser_params
+            self.parser = self._create_parser(parser_obj, parser_params)
             parser = self.parser
 
         # Add custom actions.
         for name, obj in ACTIONS.items():
             parser.register('action', name, obj)
+        if self.page_help:
+            parser.register('action', 'help', HelpPager)
 
         # Index parser (based on path) as it may be necessary to access it
         # later (manage case where subparsers does not have configuration).
@@ -548,6 +2264,8 @@ class CommandLine(object):
                        for idx, elt in enumerate(path)
                        if not (path[idx-1] == 'subparsers' and elt == 'parsers')]
         self._parsers['/'.join(parser_path)] = parser
+        if self._snapshots is not None and isinstance(parser, argparse.ArgumentParser):
+            self._use_snapshots(parser, '/'.join(parser_path))
 
         # Manage 'print_help' parameter which force the use '--help' if no
         # arguments is supplied.
@@ -565,19 +2283,27 @@ class CommandLine(object):
         # Get all arguments and options of the parser for some later checks.
         # If there is an error, the configuration is bad and an error will be
         # raised later.
-        if isinstance(parser, (NoAbbrevParser, argparse.ArgumentParser)):
+        if parser_args is None:
             try:
-                self._parser_args = _get_args(parser_conf)
+                parser_args = _get_args(parser_conf)
             except Exception:
-                self._parser_args = OrderedDict()
+                parser_args = OrderedDict()
 
         # Add options and arguments.
         for arg_type in ('options', 'args'):
             arg_type_path = path + [arg_type]
             arg_type_conf = parser_conf.get(arg_type, {})
-            _check_type(arg_type_path, arg_type_conf, dict)
+            if not self.validated:
+                _check_type(arg_type_path, arg_type_conf, dict)
             for arg, arg_conf in arg_type_conf.items():
-                self._add_arg(parser, arg_type_path + [arg], arg, arg_type, arg_conf)
+                self._add_arg(parser, arg_type_path + [arg], arg, arg_type,
+                              arg_conf, parser_args)
+
+        # Add the option for running the commands of a file.
+        if parser is self.parser and self.batch_option:
+            parser.add_argument('--batch', action=BatchAction, const=self,
+                                help='run the commands of FILE (- for the '
+                                     'standard input), one command per line')
 
         # Add subparsers.
         if 'subparsers' in parser_conf:
@@ -586,11 +2312,34 @@ class CommandLine(object):
         # Add groups.
         for grp_type in ('groups', 'exclusive_groups'):
             if grp_type in parser_conf:
-                _check_empty(path, parser_conf[grp_type])
-                _check_type(path, parser_conf[grp_type], list)
+                if not self.validated:
+                    _check_empty(path, parser_conf[grp_type])
+                    _check_type(path, parser_conf[grp_type], list)
                 for index, group in enumerate(parser_conf[grp_type]):
                     grp_path = path + [grp_type, '#%d' % index]
-                    self._add_group(parser, grp_path, group, grp_type)
+                    self._add_group(parser, grp_path, group, grp_type, parser_args)
+
+        # Compile post processing of the arguments of the command now that
+        # the configuration has been checked.
+        if isinstance(parser, argparse.ArgumentParser):
+            self._post_plans['/'.join(parser_path)] = _compile_post(parser_args)
+
+    def _timed_add_parser(self, path, parser=None, section='parsers', parser_args=None):
+        """`_add_parser` recording the time spent building the subtree of each
+        command in `stats`."""
+        if section != 'parsers':
+            return type(self)._add_parser(self, path, parser, section, parser_args)
+
+        # Commands are indexed before building them so they are in the order
+        # of the configuration.
+        parser_path = [elt
+                       for idx, elt in enumerate(path)
+                       if not (path[idx-1] == 'subparsers' and elt == 'parsers')]
+        name = ' '.join(parser_path[1::2])
+        self.stats.commands[name] = 0
+        start = time.perf_counter()
+        type(self)._add_parser(self, path, parser, section, parser_args)
+        self.stats.commands[name] = time.perf_counter() - start
 
     def _add_subparsers(self, parser, path, subparsers_conf):
         """Add subparsers. Subparsers can have a global configuration or
@@ -600,7 +2349,8 @@ class CommandLine(object):
         required = True
         subparsers_params = {'dest': '%s%d' % (self.keyword, self._get_cmd_number(path))}
         if 'parsers' in subparsers_conf:
-            _check_section(path, subparsers_conf, 'subparsers')
+            if not self.validated:
+                _check_section(path, subparsers_conf, 'subparsers')
 
             keywords = KEYWORDS['subparsers']['argparse']
             subparsers_params.update({keyword: subparsers_conf[keyword]
@@ -611,79 +2361,269 @@ class CommandLine(object):
             subparsers_conf = subparsers_conf['parsers']
             path.append('parsers')
 
-        # Initialize subparsers.
-        subparsers = parser.add_subparsers(**subparsers_params)
+        # Initialize subparsers. Commands of a directory are always built when
+        # they are selected as their configuration is only loaded then.
+        directory = isinstance(subparsers_conf, _CommandsDirectory)
+        if self.lazy or directory:
+            parser.register('action', 'parsers', _LazySubParsersAction)
+            subparsers = parser.add_subparsers(**subparsers_params)
+            self._lazy_actions.append(subparsers)
+        else:
+            subparsers = parser.add_subparsers(**subparsers_params)
         subparsers.required = required
 
         # Add subparsers.
-        for parser_name, parser_conf in subparsers_conf.items():
-            _check_section(path + [parser_name], parser_conf, 'parsers')
+        for parser_name in subparsers_conf:
+            parser_path = path + [parser_name]
+            if directory and parser_name not in subparsers_conf.added:
+                help = subparsers_conf.helps[parser_name]
+                subparsers.add_parser(parser_name, **({} if help is None else {'help': help}))
+                subparsers.pending[parser_name] = functools.partial(
+                    self._add_directory_parser, subparsers, parser_path, parser_name)
+                continue
+
+            parser_conf = subparsers_conf[parser_name]
+            parser_key = '/'.join(parser_path)
+            if parser_key in self._precompiled:
+                subparser_params = self._precompiled[parser_key]
+            else:
+                if not self.validated:
+                    _check_section(parser_path, parser_conf, 'parsers')
+                subparser_params = _gen_parser(parser_conf, subparser=True)
+                if self.lazy and not self.validated:
+                    # Check the configuration now, so errors are not delayed
+                    # to the use of the subcommand.
+                    _check_parser(parser_path, parser_conf)
+            self.compiled[parser_key] = subparser_params
+            subparser = self._create_parser(
+                functools.partial(subparsers.add_parser, parser_name), subparser_params)
+            if self.lazy:
+                subparsers.pending[parser_name] = functools.partial(
+                    self._add_parser, parser_path, subparser)
+            else:
+                self._add_parser(parser_path, subparser)
+
+    def _add_directory_parser(self, subparsers, path, parser_name):
+        """Load the configuration of the command **parser_name** of a directory
+        and build its parser, replacing the parser created from the manifest
+        of the directory."""
+        parser_conf = self._get_config(path)
+        parser_key = '/'.join(path)
+        if parser_key in self._precompiled:
+            subparser_params = self._precompiled[parser_key]
+        else:
+            _check_parser(path, parser_conf, load=False)
             subparser_params = _gen_parser(parser_conf, subparser=True)
-            subparser = subparsers.add_parser(parser_name, **subparser_params)
-            self._add_parser(path + [parser_name], subparser)
-
-    def _add_group(self, parser, path, conf, grp_type):
-        """Add a group (normal or exclusive) to **parser**"""
-        _check_section(path, conf, grp_type)
-        params = {keyword: conf.pop(keyword)
-                  for keyword in KEYWORDS[grp_type]['argparse']
-                  if keyword in conf}
+        self.compiled[parser_key] = subparser_params
+        subparser = self._create_parser(
+            functools.partial(_replace_subparser, subparsers, parser_name), subparser_params)
+        self._add_parser(path, subparser)
+
+    def _add_group(self, parser, path, conf, grp_type, parser_args):
+        """Add a group (normal or exclusive) to **parser**. **parser_args** are
+        the arguments of the parser."""
+        grp_key = '/'.join(path)
+        if grp_key in self._precompiled:
+            params = self._precompiled[grp_key]
+        else:
+            if not self.validated:
+                _check_section(path, conf, grp_type)
+            params = {keyword: conf[keyword]
+                      for keyword in KEYWORDS[grp_type]['argparse']
+                      if keyword in conf}
+        self.compiled[grp_key] = params
         group = getattr(parser, _GRP_METHODS[grp_type])(**params)
-        self._add_parser(path, group)
+        self._add_parser(path, group, grp_type, parser_args)
+
+    def _add_arg(self, parser, path, arg, arg_type, arg_conf, parser_args):
+        """Add an option/argument to **parser**. **parser_args** are all the
+        arguments of the parser."""
+        arg_key = '/'.join(path)
+        if arg_key in self._precompiled:
+            arg_args, arg_params, completer, completer_cache = self._precompiled[arg_key]
+            # argparse relies on the identity of SUPPRESS, which is lost when
+            # the parameters have been serialized.
+            arg_params = {param: (argparse.SUPPRESS
+                                  if isinstance(value, str) and value == argparse.SUPPRESS
+                                  else value)
+                          for param, value in arg_params.items()}
+        else:
+            arg_args, arg_params, completer, completer_cache = self._compile_arg(
+                path, arg, arg_type, arg_conf, parser_args)
+        self.compiled[arg_key] = (arg_args, arg_params, completer, completer_cache)
 
-    def _add_arg(self, parser, path, arg, arg_type, arg_conf):
-        """Add an option/argument to **parser**."""
+        # Add argument to parser (and manager completers for argcomplete).
+        if completer is not None:
+            parser.add_argument(*arg_args, **arg_params).completer = (
+                COMPLETERS[completer]
+                if completer_cache is None
+                else CachedCompleter(COMPLETERS[completer], completer, **completer_cache))
+        else:
+            parser.add_argument(*arg_args, **arg_params)
+
+    def _compile_arg(self, path, arg, arg_type, arg_conf, parser_args):
+        """Check the configuration of an option/argument and return the
+        arguments and parameters for adding it to a parser, with the name of its
+        completer and the parameters of its cache."""
         # Check configuration.
-        _check_section(path, arg_conf, arg_type)
-        for keyword in ('need', 'conflict'):
-            if keyword in arg_conf:
-                _check_type(path + [keyword], arg_conf[keyword], list)
-                for cur_arg in arg_conf[keyword]:
-                    cur_arg = cur_arg.split(':')[0]
-                    if cur_arg not in self._parser_args:
-                        err_str = _UNKNOWN_ARG.format(type='option/argument', arg=cur_arg)
-                        raise CLGError(path + [keyword], err_str)
+        if not self.validated:
+            refs = []
+            _check_arg(path, arg_conf, arg_type, refs)
+            _check_refs(refs, parser_args)
 
         # Get argument parameters.
         arg_args, arg_params = [], {}
         if arg_type == 'options':
             if 'short' in arg_conf:
-                if len(arg_conf['short']) != 1:
-                    raise CLGError(path + ['short'], _SHORT_ERR)
                 arg_args.append('-%s' % arg_conf['short'])
-                del arg_conf['short']
             arg_args.append('--%s' % _format_optname(arg))
             arg_params['dest'] = arg
         elif arg_type == 'args':
             arg_args.append(arg)
 
-        default = str(arg_conf.get('default', '?'))
-        match = str(arg_conf.get('match', '?'))
-        choices = ', '.join(map(str, arg_conf.get('choices', ['?'])))
         for param, value in sorted(arg_conf.items()):
-            if param not in KEYWORDS[arg_type]['post']:
+            if param not in KEYWORDS[arg_type]['post'] and param != 'short':
                 try:
                     arg_params[param] = {
                         'type': lambda: TYPES[value],
-                        'help': lambda: value.replace('__DEFAULT__', default)
-                                             .replace('__CHOICES__', choices)
-                                             .replace('__MATCH__', match)
-                                             .replace('__FILE__', sys.path[0])
-                                             .replace('%', '%%')
+                        'help': lambda: _format_help(value, arg_conf).replace('%', '%%')
                         }.get(param, lambda: _set_builtin(value))()
                 except KeyError:
                     raise CLGError(path, "invalid type '%s'" % value)
 
-        # Add argument to parser (and manager completers for argcomplete).
-        completer = arg_params.pop('completer', None)
-        if completer is not None:
-            parser.add_argument(*arg_args, **arg_params).completer = COMPLETERS[completer]
-        else:
-            parser.add_argument(*arg_args, **arg_params)
+        # Values of streamed arguments are converted while iterating on them
+        # and values of batch arguments are converted at once after parsing,
+        # so their choices are checked after the conversion (see
+        # **_compile_post**) and argparse only shows them.
+        stream, batch = arg_params.pop('stream', False), arg_params.pop('batch', False)
+        if stream or (batch and 'type' in arg_params):
+            choices = arg_params.pop('choices', None)
+            if choices is not None and 'metavar' not in arg_params:
+                arg_params['metavar'] = '{%s}' % ','.join(map(str, choices))
+        if stream or batch:
+            arg_params.pop('type', None)
+
+        return (arg_args, arg_params, arg_params.pop('completer', None),
+                arg_params.pop('completer_cache', None))
+
+    def build(self):
+        """Build all the subcommands that have not been built yet (only useful
+        in *lazy* mode, when the whole tree of parsers is needed)."""
+        while self._lazy_actions:
+            subparsers = self._lazy_actions.pop(0)
+            for parser_name in list(subparsers.pending):
+                subparsers.build(parser_name)
+
+    def _post_process(self, parser_path, args_values):
+        """Check values of arguments of the command **parser_path** based on
+        post processing keywords (*need*, *conflict*, *match*)."""
+        parser = self._parsers[parser_path]
+        for arg, action, checks in self._post_plans[parser_path]:
+            value = args_values[arg]
+            if not _has_value(value, action):
+                continue
+            for check in checks:
+                check[0](parser, args_values, value, *check[1:])
+
+    def _load_exec(self, path, exec_conf):
+        """Load the function to execute according to **exec_conf**. Functions
+        are cached, and functions of files are reloaded when the file
+        changes."""
+        key = '/'.join(path)
+        mtime = None
+        if 'file' in exec_conf:
+            mdl_path = _set_builtin(exec_conf['file'])
+            try:
+                mtime = os.stat(mdl_path).st_mtime_ns
+            except FileNotFoundError as err:
+                raise CLGError(path, _FILE_ERR.format(err=err.filename))
+
+        func, func_mtime = self._exec_cache.get(key, (None, None))
+        if func is None or func_mtime != mtime:
+            func = (_load_module(path, exec_conf)
+                    if 'module' in exec_conf
+                    else _load_file(path, exec_conf))
+            self._exec_cache[key] = (func, mtime)
+        return func
+
+    def _get_exec(self, path, exec_conf):
+        """Get the function to execute, waiting for its prefetch if any."""
+        prefetch = self._prefetches.pop('/'.join(path), None)
+        if prefetch is not None:
+            prefetch.join()
+        return self._load_exec(path, exec_conf)
+
+    def _prefetch(self, args):
+        """Start loading, in a background thread, the function to execute of
+        the command selected in **args**. The command-line is walked like
+        ``argparse`` does, with the completion index of the configuration:
+        values of options are skipped and the walk stops at the first argument
+        that is neither an option nor a subcommand (or at an option whose
+        number of values is variable), so values of arguments are never taken
+        for subcommands."""
+        import threading
+
+        if self._prefetch_index is None:
+            self._prefetch_index = _completion_index(self.config, load=False)
+        index = self._prefetch_index
+        path, entry, pending = (), index[()], 0
+        options = {option_string: option
+                   for option in entry['options'] for option_string in option[0]}
+        for arg in args:
+            if pending:
+                if arg.startswith('-'):
+                    break
+                pending -= 1
+            elif arg.startswith('-'):
+                option = options.get(arg.split('=', 1)[0], None)
+                if option is None or option[1] is None:
+                    break
+                pending = 0 if '=' in arg else option[1]
+            elif entry['subcommands'] is not None and arg in entry['subcommands']:
+                path += (arg,)
+                if path not in index:
+                    try:
+                        index.update(_completion_index(entry['directory'][arg], path, False))
+                    except CLGError:
+                        return
+                entry = index[path]
+                options = {option_string: option
+                           for option in entry['options'] for option_string in option[0]}
+            else:
+                break
+
+        path = [elt for name in path for elt in ('subparsers', name)]
+        parser_conf = self._get_config(path, ignore=False)
+        exec_path = path + ['execute']
+        if 'execute' not in parser_conf or '/'.join(exec_path) in self._prefetches:
+            return
+
+        def prefetch():
+            try:
+                self._load_exec(exec_path, parser_conf['execute'])
+            except Exception:
+                # Errors are raised when really executing the command.
+                pass
+        thread = threading.Thread(target=prefetch, daemon=True)
+        self._prefetches['/'.join(exec_path)] = thread
+        thread.start()
 
-    def parse(self, args=None):
-        """Parse command-line."""
-        args_values = Namespace(self.parser.parse_args(args).__dict__)
+    def _parse(self, args):
+        """Parse the command-line **args** and check the values of arguments.
+        Return the namespace of arguments, the path of the command and its
+        configuration."""
+        stats = self.stats
+        if stats is not None:
+            start = time.perf_counter()
+        if self.prefetch:
+            self._prefetch(sys.argv[1:] if args is None else args)
+        if self.slots:
+            args_values = self.parser.parse_args(args).__dict__
+            args_values = _namespace_class(tuple(args_values))(args_values)
+        else:
+            args_values = self.parser.parse_args(args, Namespace({}))
+        if stats is not None:
+            start = stats.add('parse', start)
         if self.help_cmd and args_values['%s0' % self.keyword] == 'help':
             self.print_help(args_values)
 
@@ -693,101 +2633,393 @@ class CommandLine(object):
                 for elt in ('subparsers', value)
                 if re.match('^%s[0-9]*$' % self.keyword, arg)]
         parser_conf = self._get_config(path, ignore=False)
-        parser = self._parsers['/'.join(path)]
 
         # Post processing.
-        parser_args = _get_args(parser_conf)
-        for arg, (arg_type, arg_conf) in parser_args.items():
-            if any((arg_conf.get('default', '') == '__SUPPRESS__',
-                    arg_conf.get('action', '') == 'version')):
+        self._post_process('/'.join(path), args_values)
+        if stats is not None:
+            stats.add('post', start)
+            stats.command = ' '.join(path[1::2])
+        return args_values, path, parser_conf
+
+    def _execute(self, path, parser_conf, args_values, output=None):
+        """Execute the function of the command **path**, if any, and return
+        its result (a coroutine for coroutine functions). Errors of the values
+        of a *fanout* argument are written in **output**."""
+        if 'execute' in parser_conf:
+            exec_conf = parser_conf['execute']
+            func = self._get_exec(path + ['execute'], exec_conf)
+            if 'fanout' in exec_conf:
+                func = functools.partial(_fanout, func, exec_conf['fanout'], output=output)
+            if self.stats is not None:
+                return self.stats.call('execute', func, args_values)
+            return func(args_values)
+
+    def parse(self, args=None, output=None):
+        """Parse command-line. **output** is a stream in which help, usage and
+        errors are written instead of the standard output and error. It is
+        only used for this call so the object can be used at the same time in
+        other threads.
+
+        When the function to execute is a coroutine function, it is run on a
+        new event loop (use `parse_async` from a running event loop)."""
+        try:
+            previous = self._set_output(output)
+            try:
+                args_values, path, parser_conf = self._parse(args)
+            finally:
+                self._set_output(previous)
+
+            # Execute.
+            _run_coroutine(self._execute(path, parser_conf, args_values, output))
+            return args_values
+        finally:
+            if self.stats is not None:
+                self.stats.write()
+
+    async def parse_async(self, args=None, output=None):
+        """Parse command-line like `parse` but from a running event loop: when
+        the function to execute is a coroutine function, it is awaited so many
+        commands can run concurrently. Other functions are directly called,
+        except with a *fanout* section: waiting for the values of the pool is
+        then done in the default executor of the loop so it is not blocked."""
+        try:
+            previous = self._set_output(output)
+            try:
+                args_values, path, parser_conf = self._parse(args)
+            finally:
+                self._set_output(previous)
+
+            # Execute.
+            if 'fanout' in parser_conf.get('execute', {}):
+                import asyncio
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self._execute, path, parser_conf, args_values, output)
+                return args_values
+            result = self._execute(path, parser_conf, args_values, output)
+            if result is not None:
+                import inspect
+                if inspect.iscoroutine(result):
+                    await result
+            return args_values
+        finally:
+            if self.stats is not None:
+                self.stats.write()
+
+    def parse_many(self, lines, output=None):
+        """Parse and execute many commands with the same parsers. **lines** is
+        an iterable of commands, either strings (split like a shell does, empty
+        lines and comments being ignored) or lists of arguments. It is consumed
+        lazily so it can be a file object of any size.
+
+        A **BatchResult** is yielded for each command. Errors and exits never
+        stop the iteration: the error message (what would have been printed by
+        ``argparse``) and the exit status are in the result. Other messages
+        (like help) are written in **output** (default: standard output)."""
+        import io
+        import shlex
+
+        for lineno, line in enumerate(lines, 1):
+            try:
+                argv = (shlex.split(line, comments=True)
+                        if isinstance(line, str)
+                        else list(line))
+            except ValueError as err:
+                yield BatchResult(lineno, line, None, 2, '%s\n' % err)
                 continue
-            if not _has_value(args_values[arg], arg_conf):
+            if not argv:
                 continue
 
-            for keyword in KEYWORDS[arg_type]['post']:
-                if keyword in arg_conf:
-                    post_args = (parser, parser_args, args_values, arg)
-                    getattr(_SELF, '_post_%s' % keyword)(*post_args)
-
-        # Execute.
-        if 'execute' in parser_conf:
-            for keyword in ('module', 'file'):
-                if keyword in parser_conf['execute']:
-                    exec_method = getattr(_SELF, '_exec_%s' % keyword)
-                    exec_method(path + ['execute'], parser_conf['execute'], args_values)
+            messages = io.StringIO()
+            previous = self._set_output(messages)
+            try:
+                args_values, path, parser_conf = self._parse(argv)
+                status = None
+            except SystemExit as err:
+                status, error = _exit_status(err)
+            finally:
+                self._set_output(previous)
+            if status is not None:
+                if status:
+                    error = messages.getvalue() + (error or '')
+                else:
+                    (output or sys.stdout).write(messages.getvalue())
+                yield BatchResult(lineno, argv, None, status, error)
+                continue
 
-        return args_values
+            status, error = 0, None
+            if 'execute' in parser_conf:
+                try:
+                    _run_coroutine(self._execute(path, parser_conf, args_values, messages))
+                except SystemExit as err:
+                    status, error = _exit_status(err)
+                    # Errors of streamed arguments and of the values of a
+                    # fanout argument are written in the messages of the
+                    # command.
+                    if status:
+                        error = messages.getvalue() + (error or '')
+                except Exception as err:
+                    status, error = 1, '%s: %s\n' % (err.__class__.__name__, err)
+            yield BatchResult(lineno, argv, args_values, status, error)
+
+    def parse_fanout(self, args=None, output=None):
+        """Parse command-line like `parse` and execute the function of the
+        command, which must have a *fanout* section, for each value of its
+        argument. A **FanoutResult** is yielded for each value as soon as its
+        execution is done (in the order of the values if *ordered*). Errors and
+        exits of the function never stop the iteration: the error message and
+        the exit status are in the result."""
+        previous = self._set_output(output)
+        try:
+            args_values, path, parser_conf = self._parse(args)
+        finally:
+            self._set_output(previous)
+
+        exec_path = path + ['execute']
+        exec_conf = parser_conf.get('execute', {})
+        if 'fanout' not in exec_conf:
+            raise CLGError(exec_path, _MISSING_KEYWORD.format(keyword='fanout'))
+        func = self._get_exec(exec_path, exec_conf)
+        for result in _fanout_results(func, exec_conf['fanout'], args_values):
+            yield result
 
     def print_help(self, args):
-        """Print commands' tree with theirs descriptions."""
-        # Get column at which we must start printing the description.
-        def get_size(config, path, length):
-            for param, value in config.items():
-                if param == 'subparsers':
-                    subparsers_conf = value
-                    if 'parsers' in subparsers_conf:
-                        subparsers_conf = subparsers_conf['parsers']
-                    subcommands = subparsers_conf.keys()
-                    for command in subcommands:
-                        length = max(length, 4 * len(path) + 4 + len(command))
-                        length = get_size(subparsers_conf[command], path + [command], length)
-            return length
-        desc_start = get_size(self.config, [], 0) + 4
-        desc_len = 80 - desc_start
-
-        # Print arboresence of commands with their descriptions. This use
-        # closures so we don't have to pass whatmille arguments to functions.
-        output = []
-        def parse_conf(cmd_conf, last):
-            def print_line(cmd, line, first_line, has_childs):
-                symbols = ['    ' if elt else '│   ' for elt in last[:-1]]
-                symbols.append(('└── ' if last[-1] else '├── ')
-                               if first_line
-                               else ('    ' if last[-1] else '│   '))
-                if not first_line and has_childs:
-                    symbols.append('│   ')
-                output.append('%s%s %s' % (''.join(symbols),
-                                           cmd if first_line else '',
-                                           '\033[%sG%s' % (desc_start, line)))
-
-            if 'subparsers' not in cmd_conf:
-                return
-
-            subparsers_conf = (cmd_conf['subparsers']['parsers']
-                               if 'parsers' in cmd_conf['subparsers']
-                               else cmd_conf['subparsers'])
-            last = last + [False]
-            nb_cmds = len(subparsers_conf) - 1
-            for index, cmd in enumerate(subparsers_conf):
-                cmd_conf = subparsers_conf[cmd]
-                desc = cmd_conf.get('help', '').strip().split()
-                has_childs = 'subparsers' in cmd_conf
-
-                first_line = True
-                last[-1] = index == nb_cmds
-                cur_line = ''
-                while desc:
-                    cur_word = desc.pop(0)
-                    if (len(cur_line) + 1 + len(cur_word)) > desc_len:
-                        print_line(cmd, cur_line, first_line, has_childs)
-                        first_line = False
-                        cur_line = ''
-                    cur_line += ' ' + cur_word
-                print_line(cmd, cur_line, first_line, has_childs)
-                parse_conf(cmd_conf, last)
-        parse_conf(self.config, [])
-        output = '\n'.join(output)
-        if args.page:
-            os.environ['PAGER'] = 'less -rc'
-            pydoc.pager(output)
+        """Print commands' tree with theirs descriptions. The tree can be limited
+        to the subcommands of a command (*commands* argument), to a depth
+        (*depth* option) and to the commands matching a keyword (*filter*
+        option)."""
+        # The tree is built and rendered once.
+        if self._help_tree is None:
+            self._help_tree = _HelpTree(self.config)
+        tree = self._help_tree
+
+        commands = args._get('commands') or []
+        depth = args._get('depth')
+        keyword = args._get('filter')
+        if depth is not None and depth < 1:
+            self.parser.error(_DEPTH_ERR)
+        if not commands and depth is None and keyword is None:
+            output = [tree.text]
+        else:
+            roots = None
+            if commands:
+                path = ' '.join(commands)
+                if path not in tree.paths:
+                    self.parser.error(_UNKNOWN_ARG.format(type='command', arg=path))
+                roots = [tree.paths[path]]
+            visible = None if keyword is None else tree.search(keyword)
+            output = tree.render(roots, depth, visible)
+
+        if args._get('page'):
+            _page(self.parser, output, 'less -rc')
         else:
-            print(output)
+            self.parser._print_message(''.join(output), sys.stdout)
         sys.exit(0)
 
 
+def _load_config(format, data):
+    """Load the configuration based on `format` and `data` (see **init**)."""
+    if format == 'yaml':
+        import yaml, yamlloader
+        with open(data) as fhandler:
+            return yaml.load(fhandler, Loader=yamlloader.ordereddict.CLoader)
+    elif format == 'json':
+        import json
+        with open(data) as fhandler:
+            return json.load(fhandler, object_pairs_hook=OrderedDict)
+    elif format == 'raw':
+        return data
+    raise CLGError([], 'unsupported format: %s' % format)
+
+def _get_cache_file(cache_dir, format, data):
+    """Get the path of the cache file for the configuration file **data**. Its
+    name is based on the path of the file and on a fingerprint of its content,
+    of this module version and of the registered types, actions and completers.
+    """
+    import hashlib
+    path = os.path.abspath(data)
+    stat = os.stat(path)
+    with open(path, 'rb') as fhandler:
+        content_hash = hashlib.sha256(fhandler.read()).hexdigest()
+    fingerprint = repr((format, stat.st_mtime_ns, stat.st_size, content_hash,
+                        __version__, tuple(sys.version_info[:2]), sys.path[0],
+                        sorted(TYPES), sorted(ACTIONS), sorted(COMPLETERS)))
+    return os.path.join(cache_dir, '%s-%s.pickle' % (
+        hashlib.sha256(path.encode()).hexdigest()[:16],
+        hashlib.sha256(fingerprint.encode()).hexdigest()))
+
+def _get_snapshots_file(cache_file):
+    """Get the path of the file of the help snapshots of **cache_file**."""
+    return '%s.help.pickle' % os.path.splitext(cache_file)[0]
+
+def _snapshot_width(widths):
+    """Get the width of the snapshots to use for the terminal: the largest of
+    **widths** not larger than the terminal (``None`` if the terminal is
+    smaller)."""
+    import shutil
+    columns = shutil.get_terminal_size().columns
+    return max((width for width in widths if width <= columns), default=None)
+
+def _help_snapshots(cmd, widths=_HELP_WIDTHS):
+    """Render the usage and the help of all the parsers of **cmd** for
+    terminals of **widths** columns. Snapshots are only used when the program
+    has the same name (*prog*) as when they were rendered (*argv_prog* is the
+    name of the program given by ``sys.argv`` when it is not set in the
+    configuration). *paths* are the keys of the parsers for the commands whose
+    help can be printed from the command-line without parsing it (ie: the
+    command-line is only made of subcommands followed by ``-h`` or
+    ``--help``). Snapshots of each width are pickled separately so only the
+    ones of the terminal are loaded."""
+    import pickle
+    snapshots = {'prog': cmd.parser.prog,
+                 'argv_prog': None if cmd.config.get('prog', None) else cmd.parser.prog,
+                 'page_help': cmd.page_help,
+                 'paths': {},
+                 'widths': {}}
+    index = _completion_index(cmd.config)
+    for path, entry in index.items():
+        if (all(not index[path[:idx]]['args'] for idx in range(len(path)))
+        and any(option[:2] == (['-h', '--help'], 0) for option in entry['options'])):
+            snapshots['paths'][path] = '/'.join(elt
+                                                for name in path
+                                                for elt in ('subparsers', name))
+
+    for width in widths:
+        rendered = {}
+        for key, parser in cmd._parsers.items():
+            if not isinstance(parser, argparse.ArgumentParser):
+                continue
+            parser._get_formatter = functools.partial(
+                parser.formatter_class, prog=parser.prog, width=width - 2)
+            try:
+                rendered[key] = (parser.format_usage(), parser.format_help())
+            finally:
+                del parser._get_formatter
+        snapshots['widths'][width] = pickle.dumps(rendered, pickle.HIGHEST_PROTOCOL)
+    return snapshots
+
+def _get_snapshot(snapshots, key):
+    """Get the usage and the help of the parser **key** from **snapshots** for
+    the width of the terminal (or ``None``)."""
+    width = _snapshot_width(snapshots['widths'])
+    if width is None:
+        return None
+    rendered = snapshots['widths'][width]
+    if isinstance(rendered, bytes):
+        import pickle
+        rendered = snapshots['widths'][width] = pickle.loads(rendered)
+    return rendered.get(key, None)
+
+def _snapshot_help(snapshots, argv):
+    """Get the help to print from **snapshots** if the command-line **argv**
+    is a request for the help of a command (``None`` if it is not or if
+    parsing the command-line is needed)."""
+    for index, arg in enumerate(argv):
+        if arg in ('-h', '--help'):
+            break
+    else:
+        return None
+
+    if (not snapshots
+    or snapshots['argv_prog'] not in (None, os.path.basename(sys.argv[0]))):
+        return None
+    key = snapshots['paths'].get(tuple(argv[:index]), None)
+    snapshot = None if key is None else _get_snapshot(snapshots, key)
+    return None if snapshot is None else snapshot[1]
+
+def _open_cache(path):
+    """Open the file **path** of the cache for reading. As loading pickles
+    executes code, an *OSError* is raised if the file or its directory is not
+    owned by the current user or is writable by other users."""
+    fhandler = open(path, 'rb')
+    try:
+        if hasattr(os, 'getuid'):
+            for stat in (os.stat(os.path.dirname(path)), os.fstat(fhandler.fileno())):
+                if stat.st_uid != os.getuid() or stat.st_mode & 0o022:
+                    raise PermissionError('untrusted cache file: %s' % path)
+    except BaseException:
+        fhandler.close()
+        raise
+    return fhandler
+
+def _read_snapshots(snapshots_file):
+    """Return the help snapshots from **snapshots_file** or ``None`` if it does
+    not exist, is invalid or is not trusted (see **_open_cache**)."""
+    import pickle
+    try:
+        with _open_cache(snapshots_file) as fhandler:
+            return pickle.load(fhandler)
+    except Exception:
+        return None
+
+def _write_file(path, content):
+    """Atomically write **content** in the file **path**. The directory is
+    created only accessible by the current user."""
+    import tempfile
+    directory, filename = os.path.split(path)
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    fd, tmp_file = tempfile.mkstemp(prefix='.%s' % filename, dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as fhandler:
+            fhandler.write(content)
+        os.replace(tmp_file, path)
+    except BaseException:
+        os.remove(tmp_file)
+        raise
+
+def _write_snapshots(snapshots_file, config, cmd):
+    """Write the help snapshots of **cmd** (initialized from **config**) in
+    **snapshots_file**. In *lazy* mode, the parsers are built by another
+    **CommandLine** so errors of the configuration are still raised when the
+    command is used. As snapshots are only an optimization, errors are
+    ignored."""
+    import pickle
+    try:
+        if cmd.lazy:
+            cmd = CommandLine(config, cmd.keyword, compiled=cmd.compiled)
+        _write_file(snapshots_file,
+                    pickle.dumps(_help_snapshots(cmd), pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        pass
+
+def _read_cache(cache_file, count=3):
+    """Return the completion index, the configuration and the compiled
+    parameters of the parsers from **cache_file** or ``None`` if it does not
+    exist, is invalid or is not trusted (see **_open_cache**). Only the
+    **count** first elements are read (the completion index is first so
+    completion does not load the rest)."""
+    import pickle
+    try:
+        with _open_cache(cache_file) as fhandler:
+            return [pickle.load(fhandler) for _ in range(count)]
+    except Exception:
+        return None
+
+def _write_cache(cache_file, config, compiled):
+    """Atomically write the completion index, the configuration and the
+    compiled parameters of the parsers in **cache_file** and remove outdated
+    cache files (and help snapshots) of the same configuration file. As the
+    cache is only an optimization, errors are ignored."""
+    import pickle
+    cache_dir, cache_name = os.path.split(cache_file)
+    try:
+        _write_file(cache_file, b''.join(
+            pickle.dumps(elt, pickle.HIGHEST_PROTOCOL)
+            for elt in (_completion_index(config), config, compiled)))
+
+        prefix = cache_name.split('-')[0] + '-'
+        current = os.path.splitext(cache_name)[0] + '.'
+        for filename in os.listdir(cache_dir):
+            if filename.startswith(prefix) and not filename.startswith(current):
+                try:
+                    os.remove(os.path.join(cache_dir, filename))
+                except OSError:
+                    pass
+    except (OSError, pickle.PicklingError, TypeError, AttributeError):
+        pass
+
 def init(format='yaml', data=os.path.join(sys.path[0], 'cmd.yml'),
-         completion=False, subcommands_keyword='command', deepcopy=True,
-         args=None):
+         completion=False, subcommands_keyword='command', deepcopy=False,
+         args=None, lazy=False, cache_dir=None, prefetch=False):
     """Wrapping method that initialize the command-line and export the input
     configuration and the **CommandLine** object at the module level.
 
@@ -797,21 +3029,96 @@ def init(format='yaml', data=os.path.join(sys.path[0], 'cmd.yml'),
     the program directory.
 
     `completion` parameter allows to initialize ``argcomplete`` for completion.
+    Completion requests are answered from a completion index of the
+    configuration (cached with `cache_dir`), parsers are only built when a
+    completer is needed.
+
+    `lazy` parameter only builds the parsers of the subcommands used in the
+    command-line (see **CommandLine**).
+
+    `prefetch` parameter loads the function to execute while parsing the
+    command-line (see **CommandLine**).
+
+    `cache_dir` is a directory in which the loaded configuration and the
+    compiled parameters of the parsers are cached. As long as the
+    configuration file does not change, next calls load them from the cache,
+    skipping the load and the checks of the configuration. The usage and the
+    help of all the commands are also rendered for some widths of terminal, so
+    requests for the help of a command are answered without building parsers
+    and parsers do not format them. Configurations having directories of
+    commands (see the *directory* keyword of subparsers) are not cached.
+
+    When the ``CLG_TIMINGS`` environment variable is set, the timings of the
+    phases (see **Stats**) are appended in this file as a JSON line.
     """
-    # Get command-line configuration based on format and data and initialize CommandLine.
-    if format == 'yaml':
-        import yaml, yamlloader
-        with open(data) as fhandler:
-            config = yaml.load(fhandler, Loader=yamlloader.ordereddict.CLoader)
-    elif format == 'json':
-        import json
-        with open(data) as fhandler:
-            config = json.load(fhandler, object_pairs_hook=OrderedDict)
-    elif format == 'raw':
-        config = data
+    # Get command-line configuration based on format and data and initialize
+    # CommandLine (from the cache if possible).
+    cache_file = (_get_cache_file(cache_dir, format, data)
+                  if cache_dir is not None and format in ('yaml', 'json')
+                  else None)
+    completing = completion and '_ARGCOMPLETE' in os.environ
+
+    # Print the help of a command from the snapshots, without loading the
+    # configuration.
+    if cache_file is not None and not completing:
+        argv = sys.argv[1:] if args is None else list(args)
+        if '-h' in argv or '--help' in argv:
+            snapshots = _read_snapshots(_get_snapshots_file(cache_file))
+            help = _snapshot_help(snapshots, argv)
+            if help is not None:
+                if snapshots['page_help']:
+                    _page(None, help, 'less -c')
+                else:
+                    sys.stdout.write(help)
+                sys.exit(0)
+
+    stats = _env_stats()
+    if stats is not None:
+        start = time.perf_counter()
+    cache = (_read_cache(cache_file, 1 if completing else 3)
+             if cache_file is not None
+             else None)
+    if stats is not None and cache_file is not None:
+        start = stats.add('cache', start)
+
+    # Answer completion requests without building parsers if possible.
+    if completing:
+        config = (None if cache is not None
+                  else _load_directories(_load_config(format, data)))
+        def build():
+            full_cache = _read_cache(cache_file) if config is None else None
+            cmd = (CommandLine(config, subcommands_keyword, deepcopy)
+                   if full_cache is None
+                   else CommandLine(full_cache[1], subcommands_keyword, deepcopy,
+                                    compiled=full_cache[2]))
+            setattr(_SELF, 'config', cmd.config)
+            setattr(_SELF, 'cmd', cmd)
+            return cmd.parser
+        _complete(_completion_index(config, load=False) if cache is None else cache[0],
+                  build)
+
+    if cache is not None:
+        _, config, compiled = cache
+        cmd = CommandLine(config, subcommands_keyword, deepcopy, lazy, compiled,
+                          prefetch, functools.partial(_read_snapshots,
+                                                      _get_snapshots_file(cache_file)),
+                          stats=stats)
     else:
-        raise CLGError([], 'unsupported format: %s' % format)
-    cmd = CommandLine(config, subcommands_keyword, deepcopy)
+        loaded = _load_config(format, data)
+        config = _load_directories(loaded)
+        if stats is not None:
+            stats.add('load', start)
+        cmd = CommandLine(config, subcommands_keyword, deepcopy, lazy,
+                          prefetch=prefetch, stats=stats)
+        # Commands of directories are loaded when they are used, so
+        # configurations having directories are not cached.
+        if cache_file is not None and config is loaded:
+            if stats is not None:
+                start = time.perf_counter()
+            _write_cache(cache_file, config, cmd.compiled)
+            _write_snapshots(_get_snapshots_file(cache_file), config, cmd)
+            if stats is not None:
+                stats.add('cache', start)
 
     # Activate completion if wished.
     if completion:
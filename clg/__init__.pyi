@@ -1,9 +1,12 @@
 import argparse
-from typing import Any, Callable, Iterator, NoReturn, Sequence
+from typing import Any, Callable, Iterable, Iterator, NamedTuple, NoReturn, Sequence, TextIO
 
 
+__version__: str
+
 ACTIONS: dict[str, argparse.Action] = ...
 COMPLETERS: dict[str, Callable] = ...
+BATCH_TYPES: dict[str, Callable[[list[Any]], Sequence[Any]]] = ...
 
 
 class CLGError(Exception):
@@ -17,6 +20,22 @@ class CLGError(Exception):
         ...
 
 
+class BatchResult(NamedTuple):
+    lineno: int
+    argv: list[str] | str
+    args: Namespace | SlotsNamespace | None
+    status: int
+    error: str | None
+
+
+class FanoutResult(NamedTuple):
+    index: int
+    value: Any
+    result: Any
+    status: int
+    error: str | None
+
+
 class NoAbbrevParser(argparse.ArgumentParser):
     ...
 
@@ -34,6 +53,40 @@ class HelpPager(argparse.Action):
         ...
 
 
+class BatchAction(argparse.Action):
+    def __init__(self, option_strings: Sequence[str],
+                 dest: str = ..., default: str = ...,
+                 const: CommandLine | None = ..., metavar: str = ...,
+                 help: str | None = ...
+    ) -> None:
+        ...
+
+    def __call__(self, parser: argparse.ArgumentParser, namespace: argparse.Namespace,
+                 values: str | Sequence[Any] | None, option_string: str | None = ...
+    ) -> NoReturn:
+        ...
+
+
+class CachedCompleter(object):
+    completer: Callable
+    name: str
+    ttl: float
+    key: list[str]
+    prefix: bool
+    timeout: float | None
+    dir: str
+
+    def __init__(self, completer: Callable, name: str, ttl: float = ...,
+                 key: list[str] | None = ..., prefix: bool = ...,
+                 timeout: float | None = ..., dir: str | None = ...
+    ) -> None:
+        ...
+
+    def __call__(self, prefix: str, parsed_args: argparse.Namespace | None = ...,
+                 **kwargs: Any) -> list[str] | dict[str, str]:
+        ...
+
+
 class Namespace(argparse.Namespace):
     def __init__(self, args: dict[str, Any]) -> None:
         ...
@@ -54,20 +107,98 @@ class Namespace(argparse.Namespace):
         ...
 
 
+class SlotsNamespace(object):
+    def __init__(self, args: dict[str, Any] | Iterable[tuple[str, Any]] = ...) -> None:
+        ...
+
+    def __getitem__(self, key: str) -> Any:
+        ...
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        ...
+
+    def __delitem__(self, key: str) -> None:
+        ...
+
+    def _get(self, key: str, default: Any = ...) -> Any:
+        ...
+
+    def __iter__(self) -> Iterator[tuple[str, Any]]:
+        ...
+
+    def __contains__(self, key: str) -> bool:
+        ...
+
+
+class Stats(object):
+    path: str | None
+    phases: dict[str, float]
+    commands: dict[str, float]
+    command: str | None
+
+    def __init__(self, path: str | None = ...) -> None:
+        ...
+
+    def add(self, phase: str, start: float) -> float:
+        ...
+
+    def call(self, phase: str, func: Callable, *args: Any) -> Any:
+        ...
+
+    def as_dict(self) -> dict[str, Any]:
+        ...
+
+    def write(self) -> None:
+        ...
+
+
 class CommandLine(object):
+    config: dict[str, Any]
+    compiled: dict[str, Any]
+    validated: bool
+    slots: bool
+    stats: Stats | None
+    parser: argparse.ArgumentParser
+
     def __init__(
-        self, config: dict[str, Any], keyword: str = ..., deepcopy: bool = ...
+        self, config: dict[str, Any], keyword: str = ..., deepcopy: bool = ...,
+        lazy: bool = ..., compiled: dict[str, Any] | None = ...,
+        prefetch: bool = ...,
+        snapshots: dict[str, Any] | Callable[[], dict[str, Any] | None] | None = ...,
+        validated: bool = ..., slots: bool = ..., stats: Stats | None = ...
     ) -> None:
         ...
+
+    def build(self) -> None:
+        ...
     
-    def parse(self, args: Sequence[str] | None = ...) -> Namespace:
+    def parse(self, args: Sequence[str] | None = ...,
+              output: TextIO | None = ...) -> Namespace | SlotsNamespace:
+        ...
+
+    async def parse_async(self, args: Sequence[str] | None = ...,
+                          output: TextIO | None = ...) -> Namespace | SlotsNamespace:
+        ...
+
+    def parse_many(self, lines: Iterable[str | Sequence[str]],
+                   output: TextIO | None = ...) -> Iterator[BatchResult]:
+        ...
+
+    def parse_fanout(self, args: Sequence[str] | None = ...,
+                     output: TextIO | None = ...) -> Iterator[FanoutResult]:
         ...
     
     def print_help(self, args: Namespace) -> None:
         ...
 
 
+def validate(config: dict[str, Any]) -> list[CLGError]:
+    ...
+
+
 def init(format: str = ..., data: str = ...,
-         completion: bool = ..., subcommands_keyword: str = ..., deepcopy: bool = ...
+         completion: bool = ..., subcommands_keyword: str = ..., deepcopy: bool = ...,
+         args: Sequence[str] | None = ..., lazy: bool = ...,
+         cache_dir: str | None = ..., prefetch: bool = ...
          ) -> Namespace:
     ...
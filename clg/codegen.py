@@ -0,0 +1,511 @@
+# coding: utf-8
+
+"""Generation of a standalone Python module from a configuration.
+
+The generated module builds the parsers with direct calls to ``argparse``
+(subparsers are built when they are selected, like the *lazy* mode of
+**CommandLine**), checks the *need*, *conflict* and *match* keywords with
+inlined functions and imports the functions to execute directly. It only
+depends on the standard library: the configuration is neither loaded nor
+checked at runtime.
+
+.. code-block:: bash
+
+    $ python -m clg.codegen cmd.yml -o cmd.py
+
+.. code-block:: python
+
+    import cmd
+    args = cmd.parse()
+
+The module exposes the same **parse** function (returning a **Namespace**) as
+**CommandLine**, and **get_parser** for getting the main parser. Completers
+(and so *completer_cache*) and the *add_batch_option* keyword are not
+supported. Types and actions registered in ``TYPES`` and ``ACTIONS`` are
+imported from their module, so they must not be defined in the program itself.
+"""
+
+import sys
+import inspect
+import argparse
+import builtins
+from collections import OrderedDict
+
+import clg
+
+# Marker replacing the directory of the program while building parsers, so
+# ``__FILE__`` builtins are resolved when the generated module runs.
+_FILE_MARKER = '<clg:__FILE__>'
+
+# Objects of clg copied in the generated module (in order of definition).
+_RUNTIME = ('NoAbbrevParser', '_LazySubParsersAction', 'HelpPager', 'Namespace',
+            '_has_value', '_post_need', '_post_conflict', '_post_match',
+            '_get_action', '_type_error', '_choice_error', '_post_batch',
+            '_batch_int', '_batch_float', '_post_stream', '_output_items',
+            '_stream_source', '_stream_values',
+            '_page', '_print_help', '_format_usage', '_HelpTree', '_run_coroutine',
+            '_exit_status', '_fanout_call', '_fanout_results', '_fanout')
+_CONSTANTS = {'_post_match': ['_MATCH_ERR'], '_stream_values': ['_MATCH_ERR'],
+              '_HelpTree': ['_UNKNOWN_ARG', '_DEPTH_ERR']}
+_DEPENDENCIES = {'HelpPager': ['_page'], '_post_need': ['_has_value'],
+                 '_post_conflict': ['_has_value'], '_post_match': ['_has_value'],
+                 '_post_batch': ['_has_value', '_get_action', '_type_error',
+                                 '_choice_error'],
+                 '_post_stream': ['_has_value', '_get_action', '_stream_values',
+                                  '_output_items'],
+                 '_stream_values': ['_stream_source', '_type_error', '_choice_error'],
+                 '_fanout': ['_fanout_results'],
+                 '_fanout_results': ['_fanout_call', '_exit_status']}
+
+_HEADER = '''\
+# Generated by clg {version}{source}: do not edit.
+"""Command-line parsers and execution (see **parse**)."""
+
+import os
+import re
+import sys
+import bisect
+import argparse
+import functools
+from collections import OrderedDict
+{imports}
+_PARSERS = {{}}
+'''
+
+_FOOTER = '''
+def get_parser():
+    """Get the main parser (built on the first call)."""
+    if '' not in _PARSERS:
+        _build_0(_create_0())
+    return _PARSERS['']
+
+def parse(args=None):
+    """Parse the command-line, check the values of arguments and execute the
+    function of the command (if any). Return the namespace of arguments."""
+    args_values = get_parser().parse_args(args, Namespace({{}})){help_cmd}
+    path = '/'.join(elt
+                    for arg, value in sorted(args_values) if value
+                    for elt in ('subparsers', value)
+                    if re.match({keyword_pattern}, arg))
+    if path in _POST:
+        _POST[path](_PARSERS[path], args_values)
+    if path in _EXECUTE:
+        _run_coroutine(_EXECUTE[path](args_values))
+    return args_values
+
+if __name__ == '__main__':
+    parse()
+'''
+
+_HELP_CMD = '''
+    if args_values[{keyword!r}] == 'help':
+        _print_commands(args_values)'''
+
+_PRINT_COMMANDS = '''
+_HELP_TREE = []
+
+def _print_commands(args):
+    """Print commands' tree with theirs descriptions (the *help* command)."""
+    if not _HELP_TREE:
+        _HELP_TREE.append(_HelpTree({commands}))
+    tree = _HELP_TREE[0]
+
+    commands = args._get('commands') or []
+    depth = args._get('depth')
+    keyword = args._get('filter')
+    if depth is not None and depth < 1:
+        get_parser().error(_DEPTH_ERR)
+    if not commands and depth is None and keyword is None:
+        output = [tree.text]
+    else:
+        roots = None
+        if commands:
+            path = ' '.join(commands)
+            if path not in tree.paths:
+                get_parser().error(_UNKNOWN_ARG.format(type='command', arg=path))
+            roots = [tree.paths[path]]
+        visible = None if keyword is None else tree.search(keyword)
+        output = tree.render(roots, depth, visible)
+
+    if args._get('page'):
+        _page(get_parser(), output, 'less -rc')
+    else:
+        get_parser()._print_message(''.join(output), sys.stdout)
+    sys.exit(0)
+'''
+
+_LOAD_FILE = '''
+def _load_file(path, function):
+    """Load **function** of the file **path**."""
+    import importlib.util
+    spec = importlib.util.spec_from_file_location(
+        os.path.splitext(os.path.basename(path))[0], path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return getattr(module, function)
+'''
+
+
+class _Generator(object):
+    """Generator of the source of a module from a **CommandLine** object."""
+    def __init__(self, cmd):
+        self.cmd = cmd
+        self.imports = []
+        self.runtime = set()
+        self.functions = []
+        self.post = []
+        self.execute = []
+        self.nb_builders = 0
+        self.registry = argparse.ArgumentParser(add_help=False)._registries['action']
+
+    def use(self, name):
+        """Copy the object **name** of clg (and the objects it uses) in the
+        generated module."""
+        self.runtime.add(name)
+        for dependency in _DEPENDENCIES.get(name, []):
+            self.use(dependency)
+        return name
+
+    def reference(self, path, obj):
+        """Get an expression referencing **obj** (importing its module if
+        needed)."""
+        for name in _RUNTIME:
+            if obj is getattr(clg, name):
+                return self.use(name)
+        module = getattr(obj, '__module__', None)
+        qualname = getattr(obj, '__qualname__', None)
+        if module == 'builtins' and getattr(builtins, qualname, None) is obj:
+            return qualname
+        if module == 'argparse' and getattr(argparse, qualname, None) is obj:
+            return 'argparse.%s' % qualname
+        if module in (None, '__main__') or qualname is None or '<' in qualname:
+            raise clg.CLGError(path, 'unable to import %r in the generated module' % obj)
+        name = qualname.split('.')[0]
+        alias = '_%s_%s' % (module.replace('.', '_'), name)
+        line = 'from %s import %s as %s' % (module, name, alias)
+        if line not in self.imports:
+            self.imports.append(line)
+        return alias + qualname[len(name):]
+
+    def literal(self, path, value):
+        """Get the source of **value**."""
+        if value is argparse.SUPPRESS:
+            return 'argparse.SUPPRESS'
+        if isinstance(value, str):
+            if _FILE_MARKER not in value:
+                return repr(value)
+            return '(%s)' % ' + sys.path[0] + '.join(
+                repr(part) for part in value.split(_FILE_MARKER))
+        if value is None or isinstance(value, (bool, int, float, complex, bytes)):
+            return repr(value)
+        if isinstance(value, (list, tuple, set, frozenset)):
+            elts = [self.literal(path, elt) for elt in value]
+            if isinstance(value, list):
+                return '[%s]' % ', '.join(elts)
+            if isinstance(value, tuple):
+                return '(%s)' % ''.join('%s, ' % elt for elt in elts)
+            return '%s([%s])' % (type(value).__name__, ', '.join(elts))
+        if isinstance(value, dict):
+            return '{%s}' % ', '.join('%s: %s' % (self.literal(path, key),
+                                                  self.literal(path, elt))
+                                      for key, elt in value.items())
+        if callable(value):
+            return self.reference(path, value)
+        raise clg.CLGError(path, 'unable to generate the value %r' % value)
+
+    def params(self, path, params):
+        """Get the source of keyword arguments from **params**."""
+        return ', '.join('%s=%s' % (param, self.literal(path, value))
+                         for param, value in params.items())
+
+    def parser_params(self, path, params):
+        """Get keyword arguments for creating a parser, adding a paged help
+        option if needed."""
+        paged = self.cmd.page_help and params.get('add_help', True)
+        return (self.params(path, dict(params, add_help=False) if paged else params),
+                paged)
+
+    def help_option(self, var):
+        """Get the line adding the paged help option to the parser **var**."""
+        return ("    %s.add_argument('-h', '--help', action=%s, "
+                "help=argparse._('show this help message and exit'))"
+                % (var, self.use('HelpPager')))
+
+    def add_builder(self, path, parser_conf):
+        """Add the function building the parser of **path** and return its
+        name."""
+        name = '_build_%d' % self.nb_builders
+        self.nb_builders += 1
+        lines = ['def %s(parser):' % name]
+        self.add_body(lines, 'parser', path, parser_conf, 'parsers')
+        if len(lines) == 1:
+            lines.append('    pass')
+        self.functions.append('\n'.join(lines) + '\n')
+        return name
+
+    def add_body(self, lines, var, path, conf, section):
+        """Add the lines building **var** (a parser or a group) from its
+        configuration **conf**."""
+        if section == 'parsers':
+            if conf.get('print_help', False):
+                lines.append('    %s(%s)' % (self.use('_print_help'), var))
+            if 'usage' in conf:
+                lines.append('    %s.usage = %s(%s.prog, %s)' % (
+                    var, self.use('_format_usage'), var, self.literal(path, conf['usage'])))
+            if 'negative_value' in conf:
+                lines.append('    %s._negative_number_matcher = re.compile(%s)'
+                             % (var, self.literal(path, conf['negative_value'])))
+
+        for arg_type in ('options', 'args'):
+            for arg in conf.get(arg_type, {}):
+                arg_path = path + [arg_type, arg]
+                arg_args, arg_params, _, _ = self.cmd.compiled['/'.join(arg_path)]
+                action = arg_params.get('action', None)
+                if isinstance(action, str) and action not in self.registry:
+                    arg_params = dict(arg_params, action=clg.ACTIONS[action])
+                lines.append('    %s.add_argument(%s)' % (var, ', '.join(
+                    [self.literal(arg_path, elt) for elt in arg_args]
+                    + ([self.params(arg_path, arg_params)] if arg_params else []))))
+
+        if section == 'parsers' and not path and self.cmd.batch_option:
+            raise clg.CLGError(path, 'add_batch_option is not supported by '
+                                     'generated modules')
+
+        if 'subparsers' in conf:
+            self.add_subparsers(lines, var, path + ['subparsers'], conf['subparsers'])
+
+        for grp_type in ('groups', 'exclusive_groups'):
+            for index, group in enumerate(conf.get(grp_type, [])):
+                grp_path = path + [grp_type, '#%d' % index]
+                grp_var = 'group_%d' % len(lines)
+                lines.append('    %s = %s.%s(%s)' % (
+                    grp_var, var, clg._GRP_METHODS[grp_type],
+                    self.params(grp_path, self.cmd.compiled['/'.join(grp_path)])))
+                self.add_body(lines, grp_var, grp_path, group, grp_type)
+
+        if section == 'parsers':
+            self.add_post(path, conf)
+
+    def add_subparsers(self, lines, var, path, subparsers_conf):
+        """Add the lines adding the subparsers of **var**. Subparsers are built
+        when they are selected."""
+        params = {'dest': '%s%d' % (self.cmd.keyword, self.cmd._get_cmd_number(path))}
+        required = True
+        if 'parsers' in subparsers_conf:
+            params.update((keyword, subparsers_conf[keyword])
+                          for keyword in clg.KEYWORDS['subparsers']['argparse']
+                          if keyword in subparsers_conf)
+            required = subparsers_conf.get('required', True)
+            subparsers_conf = subparsers_conf['parsers']
+            path = path + ['parsers']
+
+        lines.append("    %s.register('action', 'parsers', %s)"
+                     % (var, self.use('_LazySubParsersAction')))
+        lines.append('    subparsers = %s.add_subparsers(%s)'
+                     % (var, self.params(path, params)))
+        lines.append('    subparsers.required = %r' % required)
+        for parser_name, parser_conf in subparsers_conf.items():
+            parser_path = path + [parser_name]
+            key = '/'.join(elt for idx, elt in enumerate(parser_path)
+                           if not (parser_path[idx-1] == 'subparsers' and elt == 'parsers'))
+            params, paged = self.parser_params(parser_path,
+                                               self.cmd.compiled['/'.join(parser_path)])
+            lines.append('    subparser = subparsers.add_parser(%s)' % ', '.join(
+                [self.literal(parser_path, parser_name)] + ([params] if params else [])))
+            if paged:
+                lines.append(self.help_option('subparser'))
+            lines.append('    _PARSERS[%r] = subparser' % key)
+            lines.append('    subparsers.pending[%r] = functools.partial(%s, subparser)'
+                         % (parser_name, self.add_builder(parser_path, parser_conf)))
+
+    def add_post(self, path, conf):
+        """Add the function checking the post processing keywords of the
+        command **path** and the function executing it."""
+        key = '/'.join(elt for idx, elt in enumerate(path)
+                       if not (path[idx-1] == 'subparsers' and elt == 'parsers'))
+        plan = self.cmd._post_plans.get(key, [])
+        if plan:
+            name = '_post_%d' % len(self.post)
+            lines = ['def %s(parser, args_values):' % name]
+            for arg, action, checks in plan:
+                lines.append('    value = args_values[%r]' % arg)
+                lines.append('    if %s(value, %r):' % (self.use('_has_value'), action))
+                for check in checks:
+                    func = check[0].__name__
+                    params = list(check[1:])
+                    if func in ('_post_match', '_post_stream'):
+                        # Compiled patterns are the first parameter of match
+                        # checks and the third one of streamed arguments.
+                        idx = 0 if func == '_post_match' else 2
+                        params = [('None' if param is None
+                                   else 're.compile(%r)' % param.pattern)
+                                  if pos == idx
+                                  else self.literal(path, param)
+                                  for pos, param in enumerate(params)]
+                    else:
+                        params = [self.literal(path, param) for param in params]
+                    lines.append('        %s(parser, args_values, value, %s)'
+                                 % (self.use(func), ', '.join(params)))
+            self.functions.append('\n'.join(lines) + '\n')
+            self.post.append((key, name))
+
+        if 'execute' in conf:
+            exec_conf = conf['execute']
+            exec_path = path + ['execute']
+            function = exec_conf.get('function', 'main')
+            name = '_execute_%d' % len(self.execute)
+            if 'module' in exec_conf:
+                if not function.isidentifier():
+                    raise clg.CLGError(exec_path, 'invalid function name: %s' % function)
+                body = ['    from %s import %s' % (exec_conf['module'], function)]
+            else:
+                self.use('_load_file')
+                body = []
+                exec_file = exec_conf['file'].replace('__FILE__', _FILE_MARKER)
+                function = '_load_file(%s, %r)' % (self.literal(exec_path, exec_file),
+                                                   function)
+            if 'fanout' in exec_conf:
+                body.append('    return %s(%s, %s, args_values)' % (
+                    self.use('_fanout'), function,
+                    self.literal(exec_path + ['fanout'], exec_conf['fanout'])))
+            else:
+                body.append('    return %s(args_values)' % function)
+            self.functions.append('\n'.join(['def %s(args_values):' % name] + body) + '\n')
+            self.execute.append((key, name))
+
+    def help_tree(self, conf):
+        """Get the configuration of the commands' tree (names and descriptions
+        of commands) for the *help* command."""
+        tree = {}
+        if 'subparsers' in conf:
+            subparsers_conf = conf['subparsers']
+            subparsers_conf = subparsers_conf.get('parsers', subparsers_conf)
+            tree['subparsers'] = {name: dict(self.help_tree(subparser_conf),
+                                             help=subparser_conf.get('help', ''))
+                                  for name, subparser_conf in subparsers_conf.items()}
+        return tree
+
+    def generate(self, source=None):
+        """Generate the source of the module."""
+        cmd = self.cmd
+        root_conf = cmd.config
+        params, paged = self.parser_params([], cmd.compiled[''])
+        factory = ('argparse.ArgumentParser'
+                   if root_conf.get('allow_abbrev', False)
+                   else self.use('NoAbbrevParser'))
+        create = ['def _create_0():',
+                  '    parser = %s(%s)' % (factory, params)]
+        if paged:
+            create.append(self.help_option('parser'))
+        create.append("    _PARSERS[''] = parser")
+        create.append('    return parser')
+        self.functions.insert(0, '\n'.join(create) + '\n')
+        self.add_builder([], root_conf)
+        self.use('Namespace')
+
+        footer = ''
+        if cmd.help_cmd:
+            self.use('_HelpTree')
+            self.use('_page')
+            footer += _PRINT_COMMANDS.format(
+                commands=self.literal([], self.help_tree(root_conf)))
+        footer += '\n_POST = {%s}\n' % ', '.join('%r: %s' % elt for elt in self.post)
+        footer += '\n_EXECUTE = {%s}\n' % ', '.join('%r: %s' % elt for elt in self.execute)
+        self.use('_run_coroutine')
+        footer += _FOOTER.format(
+            help_cmd=_HELP_CMD.format(keyword='%s0' % cmd.keyword) if cmd.help_cmd else '',
+            keyword_pattern=repr('^%s[0-9]*$' % cmd.keyword))
+
+        runtime, constants = [], set()
+        for name in _RUNTIME:
+            if name in self.runtime:
+                runtime.extend('%s = %r\n' % (constant, getattr(clg, constant))
+                               for constant in _CONSTANTS.get(name, [])
+                               if constant not in constants)
+                constants.update(_CONSTANTS.get(name, []))
+                runtime.append(inspect.getsource(getattr(clg, name)))
+        if '_load_file' in self.runtime:
+            runtime.append(_LOAD_FILE.lstrip('\n'))
+        if '_fanout_results' in self.runtime:
+            self.imports.append('from collections import namedtuple')
+            runtime.append('FanoutResult = namedtuple(%r, %r)\n'
+                           % ('FanoutResult', clg.FanoutResult._fields))
+
+        header = _HEADER.format(
+            version=clg.__version__,
+            source=' from %s' % source if source else '',
+            imports=''.join('%s\n' % line for line in self.imports))
+        return '\n'.join([header] + runtime + self.functions) + footer
+
+
+class _Completers(dict):
+    """Completers used while generating a module: completers are not
+    supported so they do not need to be registered."""
+    def __missing__(self, key):
+        return None
+
+def _load_commands(config):
+    """Return **config** with all the commands of its directories loaded (see
+    the *directory* keyword of subparsers), as the generated module does not
+    read them."""
+    config = clg._load_directories(config)
+    subparsers_conf = config.get('subparsers', None)
+    if not isinstance(subparsers_conf, dict):
+        return config
+    parsers_conf = subparsers_conf.get('parsers', subparsers_conf)
+    if not isinstance(parsers_conf, dict):
+        return config
+    parsers_conf = OrderedDict((name, _load_commands(parser_conf))
+                               for name, parser_conf in parsers_conf.items())
+    if 'parsers' in subparsers_conf:
+        parsers_conf = OrderedDict(subparsers_conf, parsers=parsers_conf)
+    return OrderedDict(config, subparsers=parsers_conf)
+
+def generate(config, keyword='command', source=None):
+    """Generate the source of a standalone module from **config**. **keyword**
+    is the name used for the subcommands in the namespace of arguments (see
+    **CommandLine**) and **source** the name of the configuration file
+    (mentioned in the header of the module)."""
+    # Parsers are built with a marker as the directory of the program, so
+    # __FILE__ builtins are resolved at runtime (commands of directories are
+    # loaded before).
+    config = _load_commands(config)
+    sys_path, completers = sys.path[0], clg.COMPLETERS
+    sys.path[0], clg.COMPLETERS = _FILE_MARKER, _Completers(completers)
+    try:
+        cmd = clg.CommandLine(config, keyword)
+    finally:
+        sys.path[0], clg.COMPLETERS = sys_path, completers
+    return _Generator(cmd).generate(source)
+
+def main():
+    """Entry point: ``python -m clg.codegen [-f FORMAT] [-k KEYWORD] [-o FILE]
+    CONFIG``."""
+    parser = argparse.ArgumentParser(
+        prog='clg-codegen',
+        description='Generate a standalone Python module from a configuration.')
+    parser.add_argument('config', help='configuration file')
+    parser.add_argument('-f', '--format', choices=('yaml', 'json'),
+                        help='format of the configuration (default: from the '
+                             'extension of the file)')
+    parser.add_argument('-k', '--keyword', default='command',
+                        help='name of the subcommands in the namespace of '
+                             'arguments (default: %(default)s)')
+    parser.add_argument('-o', '--output', help='output file (default: stdout)')
+    args = parser.parse_args()
+
+    format = args.format or ('json' if args.config.endswith('.json') else 'yaml')
+    try:
+        config = clg._load_config(format, args.config)
+        source = generate(config, args.keyword, args.config)
+    except (OSError, clg.CLGError) as err:
+        parser.error(str(err))
+
+    if args.output:
+        with open(args.output, 'w') as fhandler:
+            fhandler.write(source)
+    else:
+        sys.stdout.write(source)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,362 @@
+# coding: utf-8
+
+"""Generation of static completion scripts (for *bash*, *zsh* and *fish*)
+from a configuration.
+
+Scripts are self-contained: subcommands, options and *choices* are completed by
+the shell itself, from data generated from the completion index of the
+configuration. Python is only called (through ``argcomplete``, so the program
+must be initialized with the *completion* parameter of **init** or call
+``argcomplete.autocomplete``) for options and arguments having a *completer* or
+when the command-line can not be completed without parsing it (abbreviations,
+options with a variable number of values, ...).
+
+.. code-block:: bash
+
+    $ python -m clg.completion --shell bash --prog prog cmd.yml > prog.bash
+    $ source prog.bash
+"""
+
+import re
+import sys
+import argparse
+
+import clg
+
+_BASH_SCRIPT = r"""# bash completion for {prog} (generated by clg {version})
+declare -gA _clg_{name}_data=(
+{data}
+)
+
+_clg_{name}_python() {{
+    local IFS=$'\013'
+    COMPREPLY=($(COMP_LINE="$COMP_LINE" COMP_POINT="$COMP_POINT" \
+                 _ARGCOMPLETE_COMP_WORDBREAKS="$COMP_WORDBREAKS" _ARGCOMPLETE=1 \
+                 "${{COMP_WORDS[0]}}" 8>&1 9>/dev/null 1>/dev/null 2>/dev/null))
+}}
+
+_clg_{name}_values() {{
+    local IFS=$'\n'
+    case "${{_clg_{name}_data[$1]}}" in
+        c) COMPREPLY+=($(compgen -W "${{_clg_{name}_data[$1:c]}}" -- "$2")) ;;
+        f) compopt -o filenames 2>/dev/null
+           COMPREPLY+=($(compgen -f -- "$2")) ;;
+        *) return 1 ;;
+    esac
+}}
+
+_clg_{name}_complete() {{
+    [[ -n $ZSH_VERSION ]] && setopt localoptions ksharrays
+    local cur="${{COMP_WORDS[COMP_CWORD]}}" path="" spec="" word name i
+    local -i pending=0 arg=0
+    local IFS=$'\n'
+    [[ $cur == = ]] && cur=""
+    COMPREPLY=()
+
+    for ((i = 1; i < COMP_CWORD; i++)); do
+        word="${{COMP_WORDS[i]}}"
+        [[ $word == = ]] && continue
+        if ((pending > 0)); then
+            [[ $word == -* ]] && {{ _clg_{name}_python; return; }}
+            ((pending -= 1))
+        elif [[ $word == -* ]]; then
+            name="${{word%%=*}}"
+            if [[ $word == -- || -z ${{_clg_{name}_data[$path:n:$name]+set}} ]]; then
+                _clg_{name}_python
+                return
+            fi
+            pending=${{_clg_{name}_data[$path:n:$name]}}
+            spec="$path:v:$name"
+        elif ((arg < ${{_clg_{name}_data[$path:a]:-0}})); then
+            if [[ ${{_clg_{name}_data[$path:a:$arg]}} == x ]]; then
+                _clg_{name}_python
+                return
+            fi
+            ((arg += 1))
+        elif [[ -n ${{_clg_{name}_data[$path/$word:o]+set}} ]]; then
+            path="$path/$word"
+            arg=0
+        else
+            _clg_{name}_python
+            return
+        fi
+    done
+
+    if ((pending > 0)); then
+        [[ $cur != -* ]] && _clg_{name}_values "$spec" "$cur" || _clg_{name}_python
+        return
+    fi
+
+    COMPREPLY=($(compgen -W "${{_clg_{name}_data[$path:o]}}" -- "$cur"))
+    [[ $cur == -* ]] && return
+    if ((arg < ${{_clg_{name}_data[$path:a]:-0}})); then
+        _clg_{name}_values "$path:a:$arg" "$cur" || _clg_{name}_python
+    else
+        COMPREPLY+=($(compgen -W "${{_clg_{name}_data[$path:c]}}" -- "$cur"))
+    fi
+}}
+
+complete -F _clg_{name}_complete {prog}
+"""
+
+_ZSH_SCRIPT = r"""# zsh completion for {prog} (generated by clg {version})
+autoload -U +X compinit && compinit
+autoload -U +X bashcompinit && bashcompinit
+
+{bash}"""
+
+_FISH_SCRIPT = r"""# fish completion for {prog} (generated by clg {version})
+function __clg_{name}_data
+    switch $argv[1]
+{data}
+        case '*'
+            return 1
+    end
+end
+
+function __clg_{name}_python
+    set -l cmd (commandline -opc)[1]
+    set -lx COMP_LINE (commandline -p)
+    set -lx COMP_POINT (string length -- (commandline -cp))
+    set -lx _ARGCOMPLETE 1
+    set -lx _ARGCOMPLETE_DFS \t
+    set -lx _ARGCOMPLETE_IFS \n
+    set -lx _ARGCOMPLETE_SHELL fish
+    $cmd 8>&1 9>/dev/null 1>/dev/null 2>/dev/null
+end
+
+function __clg_{name}_values
+    set -l spec (__clg_{name}_data $argv[1])
+    switch "$spec"
+        case c
+            __clg_{name}_data $argv[1]:c
+        case f
+            __fish_complete_path $argv[2]
+        case '*'
+            return 1
+    end
+end
+
+function __clg_{name}_complete
+    set -l tokens (commandline -opc)
+    set -e tokens[1]
+    set -l cur (commandline -ct)
+    set -l path ''
+    set -l spec ''
+    set -l pending 0
+    set -l arg 0
+
+    for word in $tokens
+        if test $pending -gt 0
+            if string match -q -- '-*' $word
+                __clg_{name}_python
+                return
+            end
+            set pending (math $pending - 1)
+        else if string match -q -- '-*' $word
+            set -l name (string split -m 1 -- = $word)[1]
+            set -l nvalues (__clg_{name}_data "$path:n:$name")
+            if test "$word" = '--'; or test -z "$nvalues"
+                __clg_{name}_python
+                return
+            end
+            set pending $nvalues
+            if string match -q -- '*=*' $word
+                set pending (math $pending - 1)
+            end
+            if test $pending -lt 0
+                __clg_{name}_python
+                return
+            end
+            set spec "$path:v:$name"
+        else if test $arg -lt (__clg_{name}_data "$path:a"; or echo 0)
+            if test (__clg_{name}_data "$path:a:$arg") = x
+                __clg_{name}_python
+                return
+            end
+            set arg (math $arg + 1)
+        else if __clg_{name}_data "$path/$word:o" >/dev/null
+            set path "$path/$word"
+            set arg 0
+        else
+            __clg_{name}_python
+            return
+        end
+    end
+
+    if test $pending -gt 0
+        if string match -q -- '-*' $cur
+            __clg_{name}_python
+        else
+            __clg_{name}_values $spec $cur
+            or __clg_{name}_python
+        end
+        return
+    end
+
+    if string match -q -- '-*=*' $cur
+        __clg_{name}_python
+        return
+    end
+    __clg_{name}_data "$path:o"
+    string match -q -- '-*' $cur; and return
+    if test $arg -lt (__clg_{name}_data "$path:a"; or echo 0)
+        __clg_{name}_values "$path:a:$arg" $cur
+        or __clg_{name}_python
+    else
+        __clg_{name}_data "$path:c"
+    end
+end
+
+complete -c {prog} -e
+complete -c {prog} -f -a '(__clg_{name}_complete)'
+"""
+
+
+def _quote(value):
+    """Quote **value** for *bash* and *zsh*."""
+    return "'%s'" % value.replace("'", "'\\''")
+
+def _fish_quote(value):
+    """Quote **value** for *fish*."""
+    return "'%s'" % value.replace('\\', '\\\\').replace("'", "\\'")
+
+def _value_spec(nvalues, choices, completer):
+    """Get how values of an option/argument are completed: *c* (choices), *f*
+    (files), *p* (calling Python for the completer) or *x* (a variable number
+    of values which also needs Python)."""
+    if nvalues is None:
+        return 'x'
+    if completer is not None:
+        return 'p'
+    if choices is not None:
+        return 'c'
+    return 'f'
+
+def _get_data(config):
+    """Get the data of the scripts from the completion index of **config**.
+    Keys are based on the path of the command (names of the subcommands
+    separated by a slash) and values are lists of ``(completion, help)`` or
+    strings:
+
+        * `<path>:o`: option strings of the command,
+        * `<path>:c`: subcommands of the command,
+        * `<path>:n:<option string>`: number of values of the option,
+        * `<path>:v:<option string>`: completion of the values of the option
+          (see **_value_spec**),
+        * `<path>:a`: number of arguments of the command,
+        * `<path>:a:<index>`: completion of the values of an argument,
+        * `<key>:c`: choices of an option (`<path>:v:<option string>`) or of an
+          argument (`<path>:a:<index>`).
+    """
+    data = {}
+    for path, entry in sorted(clg._completion_index(config).items()):
+        path = ''.join('/%s' % elt for elt in path)
+        data['%s:o' % path] = [(option_string, help)
+                               for option_strings, _, _, _, help, _ in entry['options']
+                               for option_string in option_strings]
+        data['%s:c' % path] = list((entry['subcommands'] or {}).items())
+        for option_strings, nvalues, choices, completer, help, _ in entry['options']:
+            for option_string in option_strings:
+                if nvalues is not None:
+                    data['%s:n:%s' % (path, option_string)] = str(nvalues)
+                if nvalues == 0:
+                    continue
+                data['%s:v:%s' % (path, option_string)] = _value_spec(nvalues, choices,
+                                                                      completer)
+                if choices is not None:
+                    data['%s:v:%s:c' % (path, option_string)] = [
+                        (str(choice), help) for choice in choices]
+        data['%s:a' % path] = str(len(entry['args']))
+        for index, (nvalues, choices, completer, help) in enumerate(entry['args']):
+            data['%s:a:%d' % (path, index)] = _value_spec(nvalues, choices, completer)
+            if choices is not None:
+                data['%s:a:%d:c' % (path, index)] = [
+                    (str(choice), help) for choice in choices]
+    return data
+
+def _script_name(prog):
+    """Get the name used in functions and variables of scripts for **prog**."""
+    return re.sub('[^A-Za-z0-9_]', '_', prog)
+
+def bash(config, prog):
+    """Generate the *bash* completion script of the program **prog** from
+    **config**."""
+    data = ['    [%s]=%s' % (_quote(key), _quote('\n'.join(completion
+                                                        for completion, _ in value)
+                                                 if isinstance(value, list)
+                                                 else value))
+            for key, value in _get_data(config).items()]
+    return _BASH_SCRIPT.format(prog=prog, name=_script_name(prog),
+                               version=clg.__version__, data='\n'.join(data))
+
+def zsh(config, prog):
+    """Generate the *zsh* completion script of the program **prog** from
+    **config** (the *bash* script run by ``bashcompinit``)."""
+    return _ZSH_SCRIPT.format(prog=prog, version=clg.__version__,
+                              bash=bash(config, prog))
+
+def fish(config, prog):
+    """Generate the *fish* completion script of the program **prog** from
+    **config**."""
+    data = []
+    for key, value in _get_data(config).items():
+        data.append('        case %s' % _fish_quote(key))
+        if isinstance(value, list):
+            if value:
+                data.append("            printf '%%s\\t%%s\\n' %s" % ' '.join(
+                    '%s %s' % (_fish_quote(completion),
+                               _fish_quote((help or '').split('\n')[0]))
+                    for completion, help in value))
+        else:
+            data.append('            echo %s' % _fish_quote(value))
+    return _FISH_SCRIPT.format(prog=prog, name=_script_name(prog),
+                               version=clg.__version__, data='\n'.join(data))
+
+SHELLS = {'bash': bash, 'zsh': zsh, 'fish': fish}
+
+def generate(config, shell, prog):
+    """Generate the completion script of the program **prog** from **config**
+    for **shell** (*bash*, *zsh* or *fish*)."""
+    try:
+        return SHELLS[shell](config, prog)
+    except KeyError:
+        raise clg.CLGError([], 'unsupported shell: %s' % shell)
+
+def main():
+    """Entry point: ``python -m clg.completion [-f FORMAT] [-s SHELL] [-p PROG]
+    [-o FILE] CONFIG``."""
+    import os
+    parser = argparse.ArgumentParser(
+        prog='clg-completion',
+        description='Generate a static completion script from a configuration.')
+    parser.add_argument('config', help='configuration file')
+    parser.add_argument('-f', '--format', choices=('yaml', 'json'),
+                        help='format of the configuration (default: from the '
+                             'extension of the file)')
+    parser.add_argument('-s', '--shell', choices=sorted(SHELLS), default='bash',
+                        help='shell of the script (default: %(default)s)')
+    parser.add_argument('-p', '--prog',
+                        help='name of the program (default: the "prog" keyword '
+                             'of the configuration or the name of the file)')
+    parser.add_argument('-o', '--output', help='output file (default: stdout)')
+    args = parser.parse_args()
+
+    format = args.format or ('json' if args.config.endswith('.json') else 'yaml')
+    try:
+        config = clg._load_config(format, args.config)
+        prog = (args.prog
+                or config.get('prog', None)
+                or os.path.splitext(os.path.basename(args.config))[0])
+        script = generate(config, args.shell, prog)
+    except (OSError, clg.CLGError) as err:
+        parser.error(str(err))
+
+    if args.output:
+        with open(args.output, 'w') as fhandler:
+            fhandler.write(script)
+    else:
+        sys.stdout.write(script)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+# coding: utf-8
+
+"""Server keeping a **CommandLine** object (and the functions to execute)
+loaded, with a thin client forwarding its command-line to it. This avoids to
+load the configuration, build parsers and import modules at each execution.
+
+The server is started by the program, with the same name as the client is
+called (the name of the program is used by ``argparse`` in messages) or with
+the *prog* keyword set in the configuration:
+
+.. code-block:: python
+
+    import clg
+    import clg.server
+
+    cmd = clg.CommandLine(config)
+    clg.server.serve(cmd, '/run/user/1000/prog.sock')
+
+Then commands are run with the client (``clg-client SOCKET [ARG ...]``, see
+the **clg_client** module, which does not import ``clg``) or the **run**
+function. For each command, the server forks a process
+that takes the standard streams, the working directory and the environment of
+the client, so help and errors are rendered as if the command was run
+in-process. The exit code of the command is returned to the client and signals
+received by the client are forwarded to the process running the command.
+
+This only works on POSIX systems (Unix sockets, ``fork`` and passing of file
+descriptors).
+"""
+
+import os
+import sys
+import array
+import marshal
+import signal
+import socket
+
+import clg
+from clg_client import _HEADER, _STATUS, _recv_exactly, run, main
+
+
+def _iter_exec(config, path=None):
+    """Iterate over the ``execute`` sections of the commands of **config**."""
+    path = path or []
+    if 'execute' in config:
+        yield path + ['execute'], config['execute']
+    subparsers_conf = config.get('subparsers', {})
+    subparsers_conf = subparsers_conf.get('parsers', subparsers_conf)
+    for parser_name, parser_conf in subparsers_conf.items():
+        for elt in _iter_exec(parser_conf, path + ['subparsers', parser_name]):
+            yield elt
+
+def _exit_status(err):
+    """Get the exit status from a ``SystemExit`` exception like the
+    interpreter does."""
+    if err.code is None:
+        return 0
+    if isinstance(err.code, int):
+        return err.code
+    sys.stderr.write('%s\n' % err.code)
+    return 1
+
+def _handle(cmd, conn):
+    """Run the command received on **conn** (in a forked process) and return
+    the exit status."""
+    header, fds = _recv_request_header(conn)
+    request = marshal.loads(_recv_exactly(conn, header))
+    conn.sendall(_STATUS.pack(os.getpid()))
+
+    # Take the standard streams, the working directory and the environment of
+    # the client.
+    for stream in (sys.stdout, sys.stderr):
+        stream.flush()
+    for target_fd, fd in enumerate(fds):
+        os.dup2(fd, target_fd)
+        os.close(fd)
+    os.chdir(request['cwd'])
+    os.environ.clear()
+    os.environ.update(request['env'])
+    sys.argv = request['argv']
+
+    try:
+        cmd.parse(request['argv'][1:])
+        status = 0
+    except SystemExit as err:
+        status = _exit_status(err)
+    except BaseException:
+        import traceback
+        traceback.print_exc()
+        status = 1
+    finally:
+        for stream in (sys.stdout, sys.stderr):
+            stream.flush()
+    return status
+
+def _recv_request_header(conn):
+    """Receive the header of a request (the size of the request) with the file
+    descriptors of the standard streams of the client."""
+    fds = array.array('i')
+    msg, ancdata, _, _ = conn.recvmsg(_HEADER.size, socket.CMSG_LEN(3 * fds.itemsize))
+    for level, msg_type, data in ancdata:
+        if level == socket.SOL_SOCKET and msg_type == socket.SCM_RIGHTS:
+            fds.frombytes(data[:len(data) - (len(data) % fds.itemsize)])
+    if len(msg) != _HEADER.size or len(fds) != 3:
+        raise EOFError('invalid request')
+    return _HEADER.unpack(msg)[0], list(fds)
+
+def _remove_stale_socket(socket_path):
+    """Remove the socket **socket_path** if no server is listening on it
+    anymore. Other files (and sockets of running servers) are kept, so
+    binding the socket fails."""
+    import stat
+    try:
+        if not stat.S_ISSOCK(os.stat(socket_path).st_mode):
+            return
+    except OSError:
+        return
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(socket_path)
+    except ConnectionRefusedError:
+        os.remove(socket_path)
+    except OSError:
+        pass
+    finally:
+        conn.close()
+
+def serve(cmd, socket_path, preload=True):
+    """Serve the **CommandLine** object **cmd** on the Unix socket
+    **socket_path**. With **preload**, the whole tree of parsers is built and
+    functions of all commands are loaded before serving. A stale socket (of a
+    server that is not running anymore) is replaced, but if a server is
+    listening on **socket_path** or if it is another file, an ``OSError`` is
+    raised."""
+    if preload:
+        cmd.build()
+        for exec_path, exec_conf in _iter_exec(cmd.config):
+            try:
+                cmd._load_exec(exec_path, exec_conf)
+            except clg.CLGError as err:
+                sys.stderr.write('unable to preload: %s\n' % err)
+    setattr(clg, 'config', cmd.config)
+    setattr(clg, 'cmd', cmd)
+
+    _remove_stale_socket(socket_path)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o077)
+    try:
+        server.bind(socket_path)
+    finally:
+        os.umask(old_umask)
+    server.listen(128)
+
+    # Processes running commands are automatically reaped.
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    try:
+        while True:
+            conn, _ = server.accept()
+            if os.fork() == 0:
+                signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+                server.close()
+                status = 1
+                try:
+                    status = _handle(cmd, conn)
+                    conn.sendall(_STATUS.pack(status))
+                finally:
+                    os._exit(status)
+            conn.close()
+    finally:
+        server.close()
+        os.remove(socket_path)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+# coding: utf-8
+
+"""Validation of configuration files without building parsers.
+
+All the errors of each file are printed (one per line, prefixed by the file),
+so this can be used in a pre-commit hook:
+
+.. code-block:: bash
+
+    $ python -m clg.validation cmd.yml
+    cmd.yml: /subparsers/list/options/all: invalid keyword 'hepl'
+    cmd.yml: /subparsers/list/options/sort/need: unknown option/argument 'field'
+
+Types registered in ``TYPES`` by the program itself are not known by this
+command: they are declared with the ``--type`` option.
+"""
+
+import sys
+import argparse
+
+import clg
+
+
+def main():
+    """Entry point: ``python -m clg.validation [-f FORMAT] [-t TYPE ...]
+    CONFIG [CONFIG ...]``."""
+    parser = argparse.ArgumentParser(
+        prog='clg-validate',
+        description='Check configuration files and print all their errors.')
+    parser.add_argument('configs', nargs='+', metavar='config',
+                        help='configuration file')
+    parser.add_argument('-f', '--format', choices=('yaml', 'json'),
+                        help='format of the configurations (default: from the '
+                             'extension of the files)')
+    parser.add_argument('-t', '--type', action='append', default=[], dest='types',
+                        metavar='TYPE', help='name of a type registered by the '
+                                             'program (can be repeated)')
+    args = parser.parse_args()
+
+    for type_name in args.types:
+        clg.TYPES.setdefault(type_name, str)
+
+    status = 0
+    for path in args.configs:
+        format = args.format or ('json' if path.endswith('.json') else 'yaml')
+        try:
+            errors = clg.validate(clg._load_config(format, path))
+        except Exception as err:
+            errors = [err]
+        for err in errors:
+            print('%s: %s' % (path, err))
+        status = status or int(bool(errors))
+    sys.exit(status)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+# coding: utf-8
+
+"""Client of the server of ``clg`` (see the **clg.server** module), forwarding
+its command-line, its standard streams, its working directory and its
+environment to the server and exiting with the exit status of the command.
+
+This module does not import ``clg``, so the client starts as fast as the
+interpreter:
+
+.. code-block:: bash
+
+    $ clg-client /run/user/1000/prog.sock list --all
+"""
+
+import os
+import sys
+import array
+import marshal
+import signal
+import socket
+import struct
+
+# Size of a request and exit status (or pid) of the process running the command.
+# Requests are encoded with ``marshal`` (builtin) as ``json`` takes most of the
+# import time of the client.
+_HEADER = struct.Struct('!I')
+_STATUS = struct.Struct('!i')
+_FORWARDED_SIGNALS = ('SIGINT', 'SIGTERM', 'SIGHUP', 'SIGQUIT', 'SIGUSR1', 'SIGUSR2')
+# Exit status of the client when the command has not been run (or has been
+# killed).
+_CLIENT_ERROR = 255
+
+
+def _recv_exactly(conn, size):
+    """Receive exactly **size** bytes from **conn**."""
+    data = b''
+    while len(data) < size:
+        chunk = conn.recv(size - len(data))
+        if not chunk:
+            raise EOFError('connection closed')
+        data += chunk
+    return data
+
+def run(socket_path, argv=None):
+    """Run a command on the server listening on **socket_path** with the
+    standard streams, the working directory and the environment of the current
+    process, and return its exit status. **argv** default to ``sys.argv``.
+    When the server can not be reached, the error is printed and *255* is
+    returned."""
+    argv = sys.argv if argv is None else argv
+    request = marshal.dumps({'argv': list(argv),
+                             'cwd': os.getcwd(),
+                             'env': dict(os.environ)})
+
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(socket_path)
+    except OSError as err:
+        conn.close()
+        sys.stderr.write('%s: unable to connect to the server on %s: %s\n'
+                         % (os.path.basename(argv[0]), socket_path, err.strerror))
+        return _CLIENT_ERROR
+
+    try:
+        fds = array.array('i', (0, 1, 2))
+        conn.sendmsg([_HEADER.pack(len(request))],
+                     [(socket.SOL_SOCKET, socket.SCM_RIGHTS, fds.tobytes())])
+        conn.sendall(request)
+
+        # Forward signals to the process running the command.
+        pid = _STATUS.unpack(_recv_exactly(conn, _STATUS.size))[0]
+        for signame in _FORWARDED_SIGNALS:
+            if hasattr(signal, signame):
+                signal.signal(getattr(signal, signame),
+                              lambda signum, frame: os.kill(pid, signum))
+
+        return _STATUS.unpack(_recv_exactly(conn, _STATUS.size))[0]
+    except EOFError:
+        # The process running the command has been killed.
+        return _CLIENT_ERROR
+    finally:
+        conn.close()
+
+def main():
+    """Entry point of the client: ``clg-client SOCKET [ARG ...]``."""
+    if len(sys.argv) < 2:
+        sys.stderr.write('usage: %s SOCKET [ARG ...]\n' % os.path.basename(sys.argv[0]))
+        sys.exit(2)
+    sys.exit(run(sys.argv[1], [sys.argv[0]] + sys.argv[2:]))
+
+if __name__ == '__main__':
+    main()
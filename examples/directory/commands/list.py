@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+
+"""Command for listing virtual machines."""
+
+from pprint import pprint
+
+def main(args):
+    pprint(vars(args))
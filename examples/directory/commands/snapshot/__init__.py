@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+
+"""Commands for managing snapshots."""
+
+from pprint import pprint
+
+def create(args):
+    pprint(vars(args))
+
+def delete(args):
+    pprint(vars(args))
@@ -0,0 +1,13 @@
+#!/usr/bin/env python
+
+import clg
+import os
+
+CMD_FILE = os.path.abspath(os.path.join(os.path.dirname(__file__), 'cmd.yml'))
+
+def main():
+    # Only the configuration of the selected command is loaded.
+    clg.init(data=CMD_FILE)
+
+if __name__ == '__main__':
+    main()
@@ -13,7 +13,9 @@ CMD = {'options':
         'organization': {'help': 'Github organization'},
         'member': {
             'help': 'Github member',
-            'completer': 'github_org_members'
+            'completer': 'github_org_members',
+            'completer_cache': {'ttl': 3600, 'key': ['organization'],
+                                'prefix': False, 'timeout': 0.5}
         }
     }
 }
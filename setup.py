@@ -4,7 +4,7 @@ from setuptools import setup
 
 setup(
     name='clg',
-    version='3.3.0',
+    version='3.4.0',
     author='François Ménabé',
     author_email='francois.menabe@gmail.com',
     url='https://clg.readthedocs.org/en/latest/',
@@ -35,4 +35,15 @@ setup(
         # in the sdist tarball)
         "clg": ["py.typed", "__init__.pyi"],
     },
-    packages=['clg'])
+    packages=['clg'],
+    py_modules=['clg_client'],
+    extras_require={
+        'completion': ['argcomplete'],
+        'test': ['pytest', 'argcomplete', 'pyyaml', 'yamlloader'],
+    },
+    entry_points={
+        'console_scripts': ['clg-completion = clg.completion:main',
+                            'clg-codegen = clg.codegen:main',
+                            'clg-validate = clg.validation:main',
+                            'clg-client = clg_client:main'],
+    })
@@ -0,0 +1,71 @@
+# coding: utf-8
+
+"""Tests of the coroutine functions to execute (**CommandLine.parse_async**
+and **CommandLine.parse**)."""
+
+import io
+import sys
+import asyncio
+
+import pytest
+
+import clg
+
+COMMANDS = '''
+import asyncio
+
+EVENTS = {}
+CALLS = []
+
+async def wait(args):
+    """Set the event of the command and wait for the one of the other
+    command (so the commands must run concurrently)."""
+    EVENTS.setdefault(args.name, asyncio.Event()).set()
+    await asyncio.wait_for(EVENTS.setdefault(args.other, asyncio.Event()).wait(), 5)
+    CALLS.append(args.name)
+
+def call(args):
+    CALLS.append(args.name)
+'''
+
+
+def calls():
+    return sys.modules['async_commands'].CALLS
+
+@pytest.fixture
+def cmd(tmp_path, monkeypatch):
+    (tmp_path / 'async_commands.py').write_text(COMMANDS)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    # The module (its events and calls) is loaded again for each test.
+    monkeypatch.delitem(sys.modules, 'async_commands', raising=False)
+    return clg.CommandLine({
+        'prog': 'cmd',
+        'subparsers': {
+            'wait': {'args': {'name': {'help': 'name'}, 'other': {'help': 'other'}},
+                     'execute': {'module': 'async_commands', 'function': 'wait'}},
+            'call': {'args': {'name': {'help': 'name'}},
+                     'execute': {'module': 'async_commands', 'function': 'call'}}}})
+
+def test_concurrent(cmd):
+    async def main():
+        return await asyncio.gather(cmd.parse_async(['wait', 'a', 'b']),
+                                    cmd.parse_async(['wait', 'b', 'a']),
+                                    cmd.parse_async(['call', 'c']))
+    results = asyncio.run(main())
+    assert [args.name for args in results] == ['a', 'b', 'c']
+    assert sorted(calls()) == ['a', 'b', 'c']
+    assert calls()[0] == 'c'
+
+def test_errors(cmd, capsys):
+    output = io.StringIO()
+    with pytest.raises(SystemExit) as err:
+        asyncio.run(cmd.parse_async(['wait', 'a'], output=output))
+    assert err.value.code == 2
+    assert output.getvalue().splitlines()[-1] == (
+        'cmd wait: error: the following arguments are required: other')
+    assert capsys.readouterr().err == ''
+
+def test_parse(cmd):
+    """`parse` runs coroutines on a new event loop."""
+    assert cmd.parse(['wait', 'a', 'a']).name == 'a'
+    assert calls() == ['a']
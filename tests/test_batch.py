@@ -0,0 +1,51 @@
+# coding: utf-8
+
+"""Tests of the *batch* keyword of options and arguments."""
+
+import array
+
+import pytest
+
+import clg
+
+IDS = {'options': {'ids': {'nargs': '+', 'type': 'int', 'batch': True,
+                           'choices': [1, 2, 3]}}}
+
+
+def parse(config, argv):
+    return clg.CommandLine(config).parse(argv)
+
+def test_convert():
+    args = parse({'options': {'ids': {'nargs': '+', 'type': 'int', 'batch': True}}},
+                 ['--ids', '1', '2'])
+    assert isinstance(args.ids, array.array)
+    assert list(args.ids) == [1, 2]
+
+def test_invalid_value(capsys):
+    with pytest.raises(SystemExit) as err:
+        parse({'options': {'ids': {'nargs': '+', 'type': 'int', 'batch': True}}},
+              ['--ids', '1', 'a'])
+    assert err.value.code == 2
+    assert "invalid int value: 'a'" in capsys.readouterr().err
+
+def test_choices():
+    assert list(parse(IDS, ['--ids', '1', '2']).ids) == [1, 2]
+
+def test_invalid_choice(capsys):
+    with pytest.raises(SystemExit) as err:
+        parse(IDS, ['--ids', '1', '5'])
+    assert err.value.code == 2
+    assert ('argument --ids: invalid choice: 5 (choose from 1, 2, 3)'
+            in capsys.readouterr().err)
+
+def test_choices_usage(capsys):
+    with pytest.raises(SystemExit):
+        parse(IDS, ['--help'])
+    assert '--ids {1,2,3} [{1,2,3} ...]' in capsys.readouterr().out
+
+def test_choices_without_type(capsys):
+    config = {'options': {'names': {'nargs': '+', 'batch': True, 'choices': ['a', 'b']}}}
+    assert parse(config, ['--names', 'a']).names == ['a']
+    with pytest.raises(SystemExit):
+        parse(config, ['--names', 'c'])
+    assert "invalid choice: 'c'" in capsys.readouterr().err
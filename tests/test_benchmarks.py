@@ -0,0 +1,17 @@
+# coding: utf-8
+
+"""Tests of the helpers of the benchmarks."""
+
+import os
+
+from benchmarks import cold_start
+
+
+def test_find_configs():
+    configs = [os.path.relpath(path, cold_start.EXAMPLES_DIR)
+               for path, _ in cold_start.find_configs()]
+    assert os.path.join('directory', 'cmd.yml') in configs
+    assert os.path.join('simple', 'simple.json') in configs
+    assert not [path for path in configs
+                if path.startswith(os.path.join('directory', 'commands'))]
+    assert configs == sorted(configs)
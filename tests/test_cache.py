@@ -0,0 +1,105 @@
+# coding: utf-8
+
+"""Tests of the cache of configurations (*cache_dir* parameter of **init**)."""
+
+import os
+
+import pytest
+
+import clg
+
+CONFIG = '''
+options:
+    name:
+        help: name
+'''
+
+posix = pytest.mark.skipif(not hasattr(os, 'getuid'), reason='POSIX only')
+
+
+@pytest.fixture
+def config(tmp_path):
+    path = tmp_path / 'cmd.yml'
+    path.write_text(CONFIG)
+    return str(path)
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    return str(tmp_path / 'cache')
+
+def cache_files(cache_dir, help=False):
+    """Return the cache files (or the help snapshots) of **cache_dir**."""
+    return sorted(filename for filename in os.listdir(cache_dir)
+                  if filename.endswith('.pickle')
+                  and filename.endswith('.help.pickle') == help)
+
+def no_load(*args, **kwargs):
+    raise AssertionError('configuration loaded')
+
+def test_cached(config, cache_dir, monkeypatch):
+    assert clg.init(data=config, cache_dir=cache_dir, args=['--name', 'a']).name == 'a'
+    assert len(cache_files(cache_dir)) == 1
+    monkeypatch.setattr(clg, '_load_config', no_load)
+    assert clg.init(data=config, cache_dir=cache_dir, args=['--name', 'b']).name == 'b'
+
+def test_help_snapshot(config, cache_dir, monkeypatch, capsys):
+    clg.init(data=config, cache_dir=cache_dir, args=[])
+    monkeypatch.setattr(clg, '_load_config', no_load)
+    with pytest.raises(SystemExit) as err:
+        clg.init(data=config, cache_dir=cache_dir, args=['--help'])
+    assert err.value.code == 0
+    assert '--name NAME' in capsys.readouterr().out
+
+def test_config_change(config, cache_dir):
+    clg.init(data=config, cache_dir=cache_dir, args=[])
+    old_files = cache_files(cache_dir)
+    with open(config, 'a') as fhandler:
+        fhandler.write('    count:\n        type: int\n')
+    assert clg.init(data=config, cache_dir=cache_dir, args=['--count', '1']).count == 1
+    new_files = cache_files(cache_dir)
+    assert len(new_files) == 1 and new_files != old_files
+    assert len(cache_files(cache_dir, help=True)) == 1
+
+def test_types_change(config, cache_dir, monkeypatch):
+    cache_file = clg._get_cache_file(cache_dir, 'yaml', config)
+    monkeypatch.setitem(clg.TYPES, 'custom', str)
+    assert clg._get_cache_file(cache_dir, 'yaml', config) != cache_file
+
+def test_invalid_cache(config, cache_dir):
+    clg.init(data=config, cache_dir=cache_dir, args=[])
+    cache_file = os.path.join(cache_dir, cache_files(cache_dir)[0])
+    with open(cache_file, 'wb') as fhandler:
+        fhandler.write(b'invalid')
+    assert clg.init(data=config, cache_dir=cache_dir, args=['--name', 'a']).name == 'a'
+
+@posix
+def test_directory_mode(config, cache_dir):
+    clg.init(data=config, cache_dir=cache_dir, args=[])
+    assert os.stat(cache_dir).st_mode & 0o777 == 0o700
+
+@posix
+@pytest.mark.parametrize('target', ['directory', 'file'])
+def test_untrusted_cache(config, cache_dir, monkeypatch, target):
+    clg.init(data=config, cache_dir=cache_dir, args=[])
+    path = (cache_dir if target == 'directory'
+            else os.path.join(cache_dir, cache_files(cache_dir)[0]))
+    os.chmod(path, os.stat(path).st_mode | 0o022)
+    monkeypatch.setattr(clg, '_load_config', no_load)
+    with pytest.raises(AssertionError):
+        clg.init(data=config, cache_dir=cache_dir, args=['--name', 'a'])
+
+@posix
+def test_other_owner(config, cache_dir, monkeypatch):
+    clg.init(data=config, cache_dir=cache_dir, args=[])
+    monkeypatch.setattr(os, 'getuid', lambda: os.stat(cache_dir).st_uid + 1)
+    monkeypatch.setattr(clg, '_load_config', no_load)
+    with pytest.raises(AssertionError):
+        clg.init(data=config, cache_dir=cache_dir, args=['--name', 'a'])
+
+@posix
+def test_untrusted_snapshots(config, cache_dir, monkeypatch, capsys):
+    clg.init(data=config, cache_dir=cache_dir, args=[])
+    os.chmod(cache_dir, 0o777)
+    monkeypatch.setattr(clg, '_load_config', no_load)
+    with pytest.raises(AssertionError):
+        clg.init(data=config, cache_dir=cache_dir, args=['--help'])
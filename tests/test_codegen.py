@@ -0,0 +1,101 @@
+# coding: utf-8
+
+"""Tests of the generated modules (**clg.codegen**): they must parse the
+command-line like **CommandLine** with the same configuration."""
+
+import os
+import copy
+import types
+
+import pytest
+
+import clg
+import clg.codegen
+
+from .test_completion_index import ROOT, EXAMPLES, EXAMPLES_TYPES
+from . import test_post
+
+
+def generated(config):
+    module = types.ModuleType('generated')
+    exec(compile(clg.codegen.generate(config), 'generated', 'exec'), module.__dict__)
+    return module
+
+def without_execute(config):
+    """Return a copy of **config** without the functions to execute, so parsing
+    the examples does not run their commands."""
+    if isinstance(config, dict):
+        return type(config)((key, without_execute(value))
+                            for key, value in config.items() if key != 'execute')
+    if isinstance(config, list):
+        return [without_execute(value) for value in config]
+    return config
+
+def outcome(parse, args, capsys):
+    """Return the values of the arguments (or the exit status) and the outputs
+    of parsing **args**."""
+    try:
+        result = ('args', vars(parse(list(args))))
+    except SystemExit as err:
+        result = ('exit', err.code)
+    output = capsys.readouterr()
+    return result + (output.out, output.err)
+
+def check(config, requests, capsys):
+    module = generated(config)
+    for args in requests:
+        expected = outcome(clg.CommandLine(copy.deepcopy(config)).parse, args, capsys)
+        assert outcome(module.parse, args, capsys) == expected, args
+
+def requests(config):
+    """Generate command-lines for each command of **config**: with no
+    arguments, the help option, unknown arguments and each option having a
+    value (with and without value)."""
+    for path, entry in clg._completion_index(config, load=False).items():
+        words = list(path)
+        yield words
+        yield words + ['--help']
+        yield words + ['--unknown']
+        yield words + ['value']
+        for option in entry['options']:
+            if option[1] == 1:
+                yield words + [option[0][-1]]
+                yield words + [option[0][-1], 'value']
+        if 'help' in (entry['subcommands'] or ()):
+            yield words + ['help']
+
+
+@pytest.mark.parametrize('example', EXAMPLES)
+def test_examples(example, monkeypatch, capsys):
+    for type_name in EXAMPLES_TYPES:
+        monkeypatch.setitem(clg.TYPES, type_name, str)
+    config = clg._load_config('yaml', os.path.join(ROOT, 'examples', example))
+    config = without_execute(config)
+    check(config, list(requests(config)), capsys)
+
+def test_post_checks(capsys):
+    check(test_post.CONFIG, [
+        ['host', '--password', 'pwd', '-u', 'root'],
+        ['host', '--password', 'pwd'],
+        ['host', '--write', '--mode', 'rw'],
+        ['host', '--write'],
+        ['host', '--quiet', '--force'],
+        ['host', '--quiet', '--tags', 'prod', 'debug'],
+        ['host', '--label', 'l', '--tags', 'dev', 'prod'],
+        ['host', '--label', 'l', '--tags'],
+        ['host', '--names', 'a', 'B1', 'c'],
+        ['host!'],
+        ['--password', 'pwd', '--quiet', '--force', 'host!'],
+    ], capsys)
+
+def test_execute(tmp_path, monkeypatch, capsys):
+    (tmp_path / 'commands.py').write_text(
+        'def main(args):\n'
+        '    print(sorted(vars(args).items()))\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    config = {'options': {'name': {'default': 'a'}},
+              'subparsers': {'run': {'execute': {'module': 'commands'},
+                                     'args': {'count': {'type': 'int'}}},
+                             'list': {'help': 'list'}}}
+    check(config, [['run', '1'], ['--name', 'b', 'run', '2'], ['list'], ['run', 'x']],
+          capsys)
@@ -0,0 +1,132 @@
+# coding: utf-8
+
+"""Tests of the cache of completers (*completer_cache* keyword)."""
+
+import os
+import sys
+import time
+import subprocess
+
+import clg
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROGRAM = '''
+import time
+import clg
+
+def complete(prefix, **kwargs):
+    with open({calls!r}, 'a') as fhandler:
+        fhandler.write('call\\n')
+    time.sleep(0.5)
+    return ['alpha', 'beta']
+
+clg.COMPLETERS['slow'] = complete
+clg.init(format='raw', completion=True, data={{
+    'options': {{'name': {{'completer': 'slow',
+                         'completer_cache': {{'ttl': 3600, 'timeout': 0.2,
+                                              'dir': {dir!r}}}}}}}}})
+'''
+
+
+class Completer(object):
+    """Completer counting its calls and taking **delay** seconds."""
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.calls = 0
+
+    def __call__(self, prefix, **kwargs):
+        self.calls += 1
+        time.sleep(self.delay)
+        return [word for word in ('alpha', 'beta', 'gamma') if word.startswith(prefix)]
+
+def wait_cache(cache_dir, timeout=5):
+    """Wait for a cache file to be written in **cache_dir**."""
+    end = time.time() + timeout
+    while time.time() < end:
+        if os.path.isdir(cache_dir) and any(filename.endswith('.json')
+                                            for filename in os.listdir(cache_dir)):
+            return True
+        time.sleep(0.05)
+    return False
+
+def test_ttl(tmp_path):
+    completer = Completer()
+    cached = clg.CachedCompleter(completer, 'words', ttl=3600, dir=str(tmp_path))
+    assert cached('a') == ['alpha']
+    assert cached('a') == ['alpha']
+    assert completer.calls == 1
+    assert cached('b') == ['beta']
+    assert completer.calls == 2
+
+def test_expired(tmp_path):
+    completer = Completer()
+    cached = clg.CachedCompleter(completer, 'words', ttl=0, dir=str(tmp_path))
+    cached('a')
+    cached('a')
+    assert completer.calls == 2
+
+def test_no_prefix(tmp_path):
+    completer = Completer()
+    cached = clg.CachedCompleter(completer, 'words', prefix=False, dir=str(tmp_path))
+    assert cached('a') == ['alpha']
+    assert cached('g') == ['gamma']
+    assert completer.calls == 1
+
+def test_timeout_fills_cache(tmp_path):
+    completer = Completer(delay=0.5)
+    cached = clg.CachedCompleter(completer, 'words', ttl=3600, timeout=0.2,
+                                 dir=str(tmp_path))
+    start = time.time()
+    assert cached('a') == []
+    assert time.time() - start < 0.5
+    assert wait_cache(str(tmp_path))
+    assert cached('a') == ['alpha']
+    assert completer.calls == 1
+
+def test_timeout_stale(tmp_path):
+    cached = clg.CachedCompleter(Completer(), 'words', ttl=0, timeout=0.1,
+                                 dir=str(tmp_path))
+    cached('a')
+    cached.completer = Completer(delay=0.5)
+    start = time.time()
+    assert cached('a') == ['alpha']
+    assert time.time() - start < 0.5
+
+def test_timeout_single_call(tmp_path):
+    """The completer is not called again while a previous call is running."""
+    completer = Completer(delay=0.5)
+    cached = clg.CachedCompleter(completer, 'words', ttl=3600, timeout=0.1,
+                                 dir=str(tmp_path))
+    start = time.time()
+    assert cached('a') == []
+    assert cached('a') == []
+    assert time.time() - start < 0.5
+    assert completer.calls == 1
+    assert wait_cache(str(tmp_path))
+    assert cached('a') == ['alpha']
+    assert completer.calls == 1
+
+def test_shell_completion(tmp_path):
+    """Completion requests of the shell exit as soon as completions are
+    printed, so the cache is filled by a background process calling the
+    completer once."""
+    calls, cache_dir, output = (str(tmp_path / name) for name in ('calls', 'cache', 'output'))
+    program = tmp_path / 'prog.py'
+    program.write_text(PROGRAM.format(calls=calls, dir=cache_dir))
+    env = dict(os.environ, PYTHONPATH=ROOT, _ARGCOMPLETE='1', COMP_LINE='prog --name ',
+               COMP_POINT='12', _ARGCOMPLETE_STDOUT_FILENAME=output)
+
+    def complete():
+        subprocess.run([sys.executable, str(program)], env=env, check=True)
+        with open(output) as fhandler:
+            return fhandler.read().split('\013')
+
+    start = time.time()
+    assert complete() == ['']
+    assert complete() == ['']
+    assert time.time() - start < 2
+    assert wait_cache(cache_dir)
+    assert sorted(complete()) == ['alpha', 'beta']
+    with open(calls) as fhandler:
+        assert len(fhandler.readlines()) == 1
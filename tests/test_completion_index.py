@@ -0,0 +1,102 @@
+# coding: utf-8
+
+"""Tests of the completion index, answering completion requests without
+building parsers: its completions must be the ones of ``argcomplete`` with the
+parsers."""
+
+import os
+import sys
+import argparse
+import subprocess
+
+import pytest
+
+import clg
+
+argcomplete = pytest.importorskip('argcomplete')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXAMPLES = ['simple/simple.yml', 'subparsers/subparsers.yml', 'groups/groups.yml',
+            'exclusive_groups/exclusive_groups.yml', 'builtins/builtins.yml',
+            'ldap/cmd.yml', 'kvm/cmd.yml', 'backups/cmd.yml']
+# Types registered by the programs of the examples.
+EXAMPLES_TYPES = ('Date', 'Format', 'Disk', 'Interface')
+
+
+@pytest.fixture(params=EXAMPLES)
+def config(request, monkeypatch, tmp_path):
+    for type_name in EXAMPLES_TYPES:
+        monkeypatch.setitem(clg.TYPES, type_name, str)
+    # Values without choices are completed with the files of the directory.
+    (tmp_path / 'file').write_text('')
+    monkeypatch.chdir(tmp_path)
+    return clg._load_config('yaml', os.path.join(ROOT, 'examples', request.param))
+
+def requests(index):
+    """Generate completion requests (words and prefix) for each command of
+    **index**: its options, subcommands and arguments and the values of its
+    options."""
+    for path, entry in index.items():
+        words = list(path)
+        for prefix in ('', '-', '--', 'a'):
+            yield words, prefix
+        for option in entry['options']:
+            if option[1] == 1:
+                yield words + [option[0][-1]], ''
+        if entry['subcommands']:
+            yield words + [list(entry['subcommands'])[-1]], ''
+
+def argcomplete_completions(config, words, prefix):
+    # Parsers are patched by the first finder using them, so a new parser is
+    # needed for each request.
+    finder = argcomplete.CompletionFinder(clg.CommandLine(config).parser)
+    completions = finder._get_completions(['prog'] + words, prefix, '', None)
+    return completions, [finder._display_completions.get(elt, '') for elt in completions]
+
+def index_completions(index, words, prefix):
+    completions = clg._index_completions(index, words, prefix)
+    if completions is None:
+        return None
+    finder = argcomplete.CompletionFinder(argparse.ArgumentParser())
+    finder._display_completions.update(completions)
+    completions = finder.quote_completions(
+        finder.filter_completions([elt for elt, _ in completions]), '', None)
+    return completions, [finder._display_completions.get(elt, '') for elt in completions]
+
+def test_same_completions(config):
+    index = clg._completion_index(config)
+    answered = 0
+    for words, prefix in requests(index):
+        completions = index_completions(index, words, prefix)
+        if completions is not None:
+            answered += 1
+            assert completions == argcomplete_completions(config, words, prefix), (
+                words, prefix)
+    assert answered
+
+def test_fallback(monkeypatch):
+    """The parsers are built when a completer is needed."""
+    monkeypatch.setitem(clg.COMPLETERS, 'names', lambda prefix, **kwargs: ['alpha'])
+    config = {'options': {'name': {'completer': 'names'},
+                          'mode': {'choices': ['ro', 'rw']}}}
+    index = clg._completion_index(config)
+    assert clg._index_completions(index, ['--name'], '') is None
+    assert clg._index_completions(index, ['--mode'], 'r') == [('ro', ''), ('rw', '')]
+    assert argcomplete_completions(config, ['--name'], '')[0] == ['alpha ']
+
+def test_init(tmp_path):
+    """Completion requests are answered by **init** without building parsers
+    (the invalid type would be reported when building them)."""
+    config, program, output = (str(tmp_path / name)
+                               for name in ('cmd.json', 'prog.py', 'output'))
+    with open(config, 'w') as fhandler:
+        fhandler.write('{"options": {"count": {"type": "unknown"}},'
+                       ' "subparsers": {"start": {"help": "start"}, "stop": {}}}')
+    with open(program, 'w') as fhandler:
+        fhandler.write('import clg\nclg.init(format="json", data=%r, completion=True)\n'
+                       % config)
+    env = dict(os.environ, PYTHONPATH=ROOT, _ARGCOMPLETE='1', COMP_LINE='prog st',
+               COMP_POINT='7', _ARGCOMPLETE_STDOUT_FILENAME=output)
+    subprocess.run([sys.executable, program], env=env, check=True)
+    with open(output) as fhandler:
+        assert fhandler.read().split('\013') == ['start', 'stop']
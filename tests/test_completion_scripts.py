@@ -0,0 +1,112 @@
+# coding: utf-8
+
+"""Tests of the static completion scripts (**clg.completion**): completions of
+the shells must be the ones of ``argcomplete`` with the parsers."""
+
+import os
+import sys
+import shlex
+import shutil
+import subprocess
+
+import pytest
+
+import clg
+import clg.completion
+
+from .test_completion_index import ROOT, config, requests, argcomplete_completions
+
+# Completions of the shells when Python is called.
+PYTHON = '__python__'
+
+BASH_DRIVER = r'''
+source {script}
+_clg_prog_python() {{ COMPREPLY=({python}); }}
+while IFS= read -r line; do
+    eval "COMP_WORDS=($line)"
+    COMP_CWORD=$((${{#COMP_WORDS[@]}} - 1))
+    _clg_prog_complete
+    (IFS=$'\013'; printf '%s\n' "${{COMPREPLY[*]}}")
+done
+'''
+
+FISH_DRIVER = r'''
+source {script}
+function __clg_prog_python; echo {python}; end
+while read -l line
+    set -g words (string split ' ' -- $line)
+    function commandline
+        switch "$argv"
+            case -opc
+                printf '%s\n' $words[1..-2]
+            case -ct
+                echo -- $words[-1]
+        end
+    end
+    string join \v -- (__clg_prog_complete | string split -f1 \t)
+end
+'''
+
+
+def shell_completions(shell, driver, script, lines, tmp_path):
+    """Complete **lines** (lists of words) with the completion **script** of
+    **shell**. Return the completions of each line (or *None* when Python is
+    called)."""
+    script_file, driver_file = tmp_path / 'script', tmp_path / 'driver'
+    script_file.write_text(script)
+    driver_file.write_text(driver.format(script=script_file, python=PYTHON))
+    process = subprocess.run(
+        [shell, str(driver_file)], check=True, universal_newlines=True,
+        input=''.join('%s\n' % ' '.join(map(shlex.quote, ['prog'] + words))
+                      for words in lines),
+        stdout=subprocess.PIPE)
+    results = []
+    for line in process.stdout.split('\n')[:len(lines)]:
+        completions = line.split('\013') if line else []
+        results.append(None if PYTHON in completions else sorted(completions))
+    return results
+
+def check(shell, driver, script, config, tmp_path):
+    lines = [words + [prefix] for words, prefix in requests(clg._completion_index(config))]
+    answered = 0
+    for words, completions in zip(lines, shell_completions(shell, driver, script,
+                                                           lines, tmp_path)):
+        if completions is not None:
+            answered += 1
+            expected = argcomplete_completions(config, words[:-1], words[-1])[0]
+            assert completions == sorted(elt.rstrip(' ') for elt in expected), words
+    assert answered
+
+def test_bash(config, tmp_path):
+    check('bash', BASH_DRIVER, clg.completion.bash(config, 'prog'), config, tmp_path)
+
+@pytest.mark.skipif(shutil.which('zsh') is None, reason='zsh is not installed')
+def test_zsh(config, tmp_path):
+    check('zsh', BASH_DRIVER, clg.completion.zsh(config, 'prog'), config, tmp_path)
+
+@pytest.mark.skipif(shutil.which('fish') is None, reason='fish is not installed')
+def test_fish(config, tmp_path):
+    check('fish', FISH_DRIVER, clg.completion.fish(config, 'prog'), config, tmp_path)
+
+def test_same_data(config):
+    """The scripts of all the shells are generated from the same data."""
+    data = clg.completion._get_data(config)
+    bash, fish = clg.completion.bash(config, 'prog'), clg.completion.fish(config, 'prog')
+    for key in data:
+        assert '[%s]=' % clg.completion._quote(key) in bash
+        assert 'case %s\n' % clg.completion._fish_quote(key) in fish
+
+def test_command(tmp_path):
+    config = tmp_path / 'cmd.json'
+    config.write_text('{"prog": "my-prog", "options": {"mode": {"choices": ["ro", "rw"]}}}')
+    output = subprocess.run(
+        [sys.executable, '-m', 'clg.completion', '--shell', 'bash', str(config)],
+        env=dict(os.environ, PYTHONPATH=ROOT), check=True,
+        stdout=subprocess.PIPE, universal_newlines=True).stdout
+    assert output.startswith('# bash completion for my-prog (generated by clg %s)'
+                             % clg.__version__)
+    assert 'complete -F _clg_my_prog_complete my-prog\n' in output
+
+def test_unsupported_shell():
+    with pytest.raises(clg.CLGError):
+        clg.completion.generate({}, 'tcsh', 'prog')
@@ -0,0 +1,79 @@
+# coding: utf-8
+
+"""Tests of the configuration given to **CommandLine**: it is never modified
+and it is only copied with *deepcopy*."""
+
+import os
+import copy
+
+import pytest
+
+import clg
+
+from .test_completion_index import ROOT, EXAMPLES, EXAMPLES_TYPES
+
+CONFIG = {
+    'add_help_cmd': True,
+    'page_help': True,
+    'print_help': True,
+    'options': {'user': {'short': 'u', 'help': 'user', 'default': 'root'},
+                'password': {'need': ['user']}},
+    'subparsers': {'run': {'args': {'count': {'type': 'int', 'nargs': '*'}},
+                           'options': {'mode': {'choices': ['ro', 'rw']}}},
+                   'list': {'help': 'list', 'exclusive_groups': [
+                       {'options': {'all': {'action': 'store_true'},
+                                    'name': {'help': 'name'}}}]}},
+}
+
+
+@pytest.fixture(params=EXAMPLES)
+def config(request, monkeypatch):
+    for type_name in EXAMPLES_TYPES:
+        monkeypatch.setitem(clg.TYPES, type_name, str)
+    return clg._load_config('yaml', os.path.join(ROOT, 'examples', request.param))
+
+@pytest.mark.parametrize('deepcopy', [False, True])
+@pytest.mark.parametrize('lazy', [False, True])
+def test_unchanged(config, deepcopy, lazy):
+    expected = copy.deepcopy(config)
+    cmd = clg.CommandLine(config, deepcopy=deepcopy, lazy=lazy)
+    cmd.build()
+    assert config == expected
+
+@pytest.mark.parametrize('deepcopy', [False, True])
+def test_unchanged_parse(deepcopy, capsys):
+    config = copy.deepcopy(CONFIG)
+    cmd = clg.CommandLine(config, deepcopy=deepcopy, lazy=True)
+    assert cmd.parse(['-u', 'admin', '--password', 'pwd', 'run', '1', '2']).count == [1, 2]
+    assert cmd.parse(['list', '--all']).all is True
+    with pytest.raises(SystemExit):
+        cmd.parse(['help'])
+    capsys.readouterr()
+    assert config == CONFIG
+    assert cmd.config is not config
+    assert 'help' in cmd.config['subparsers'] and 'help' not in config['subparsers']
+
+def test_deepcopy(monkeypatch):
+    """With *deepcopy*, the program can modify the configuration of the
+    command, and references of YAML anchors are copied for each of them."""
+    for type_name in EXAMPLES_TYPES:
+        monkeypatch.setitem(clg.TYPES, type_name, str)
+    config = clg._load_config('yaml', os.path.join(ROOT, 'examples', 'kvm', 'cmd.yml'))
+    assert (config['subparsers']['deploy']['groups'][0]['options']
+            is config['subparsers']['migrate']['groups'][0]['options'])
+    expected = copy.deepcopy(config)
+    cmd = clg.CommandLine(config, deepcopy=True)
+    options = [cmd.config['subparsers'][name]['groups'][0]['options']
+               for name in ('deploy', 'migrate')]
+    assert options[0] == options[1] and options[0] is not options[1]
+    options[0].clear()
+    assert options[1]
+    cmd.config['subparsers']['deploy']['help'] = 'Deploy.'
+    assert config == expected
+
+def test_shallow_copy():
+    """Without *deepcopy*, only the top-level dictionary is copied."""
+    config = copy.deepcopy(CONFIG)
+    cmd = clg.CommandLine(config)
+    assert cmd.config is not config
+    assert cmd.config['options'] is config['options']
@@ -0,0 +1,83 @@
+# coding: utf-8
+
+"""Tests of the *directory* and *package* keywords of subparsers."""
+
+import os
+import re
+import sys
+import subprocess
+
+import pytest
+
+import clg
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXAMPLE = os.path.join(ROOT, 'examples', 'directory', 'directory.py')
+
+
+def run_example(*args):
+    """Run the *directory* example and return its exit status and output
+    (without the escape sequences aligning descriptions)."""
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    process = subprocess.run([sys.executable, EXAMPLE] + list(args), env=env,
+                             stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                             universal_newlines=True)
+    return process.returncode, re.sub(r' *\033\[\d+G *', '  ', process.stdout)
+
+def test_example_help():
+    status, output = run_example('help')
+    assert status == 0
+    assert output.splitlines() == [
+        "├── help  Print commands' tree with theirs descriptions.",
+        '├── list  List virtual machines.',
+        '├── start  Start virtual machines.',
+        '└── snapshot  Manage snapshots of virtual machines.',
+        '    ├── create  Create a snapshot.',
+        '    └── delete  Delete a snapshot.']
+
+def test_example_help_command():
+    status, output = run_example('help', 'snapshot')
+    assert status == 0
+    assert output.splitlines() == [
+        '└── snapshot  Manage snapshots of virtual machines.',
+        '    ├── create  Create a snapshot.',
+        '    └── delete  Delete a snapshot.']
+
+def test_example_help_filter():
+    status, output = run_example('help', '-f', 'create')
+    assert status == 0
+    assert output.splitlines() == [
+        '└── snapshot  Manage snapshots of virtual machines.',
+        '    └── create  Create a snapshot.']
+
+def test_example_execute():
+    status, output = run_example('snapshot', 'delete', '-f', 'vm', 'snap')
+    assert status == 0
+    assert "'command1': 'delete'" in output
+    assert "'force': True" in output
+
+@pytest.fixture
+def directory(tmp_path):
+    """Directory of commands whose configuration files are invalid, so they
+    can not be loaded, with a manifest for *snapshot* subcommands."""
+    (tmp_path / 'manifest.yml').write_text('list: List.\nsnapshot: Snapshots.\n')
+    (tmp_path / 'list.yml').write_text('{invalid')
+    (tmp_path / 'snapshot.yml').write_text('{invalid')
+    (tmp_path / 'snapshot').mkdir()
+    (tmp_path / 'snapshot' / 'manifest.yml').write_text('create: Create.\n')
+    return tmp_path
+
+def test_help_reads_manifests_only(directory, capsys):
+    cmd = clg.CommandLine({'add_help_cmd': True,
+                           'subparsers': {'directory': str(directory)}})
+    with pytest.raises(SystemExit) as err:
+        cmd.parse(['help', '-f', 'create'])
+    assert err.value.code == 0
+    output = capsys.readouterr().out
+    assert 'snapshot' in output and 'create' in output and 'list' not in output
+
+def test_load_error(directory):
+    cmd = clg.CommandLine({'subparsers': {'directory': str(directory)}})
+    with pytest.raises(clg.CLGError) as err:
+        cmd.parse(['list'])
+    assert err.value.path == ['subparsers', 'parsers', 'list']
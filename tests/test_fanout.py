@@ -0,0 +1,129 @@
+# coding: utf-8
+
+"""Tests of the *fanout* keyword of the execute section."""
+
+import io
+import sys
+import time
+import asyncio
+import threading
+
+import pytest
+
+import clg
+
+COMMANDS = '''
+import sys
+import threading
+
+EVENT = threading.Event()
+
+def double(args):
+    return int(args.values) * 2
+
+def check(args):
+    if args.values == 'error':
+        raise ValueError('invalid value')
+    if args.values.startswith('exit'):
+        sys.exit(int(args.values[4:]))
+
+def wait(args):
+    if not EVENT.wait(5):
+        sys.exit(4)
+'''
+
+
+@pytest.fixture
+def module(tmp_path, monkeypatch):
+    (tmp_path / 'fanout_commands.py').write_text(COMMANDS)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    return 'fanout_commands'
+
+def command(module, function, **fanout):
+    return clg.CommandLine({
+        'args': {'values': {'nargs': '+'}},
+        'execute': {'module': module, 'function': function,
+                    'fanout': dict(fanout, arg='values')}})
+
+def test_ordered(module):
+    results = list(command(module, 'double', workers=4).parse_fanout(['3', '1', '2']))
+    assert [(result.index, result.value, result.result) for result in results] == [
+        (0, '3', 6), (1, '1', 2), (2, '2', 4)]
+    assert all(result.status == 0 and result.error is None for result in results)
+
+def test_unordered(module):
+    results = command(module, 'double', ordered=False).parse_fanout(['1', '2', '3'])
+    assert sorted(result.result for result in results) == [2, 4, 6]
+
+def test_process_pool(module):
+    results = command(module, 'double', pool='process', workers=2).parse_fanout(['1', '2'])
+    assert [result.result for result in results] == [2, 4]
+
+def test_errors(module):
+    results = list(command(module, 'check').parse_fanout(['ok', 'error', 'exit3']))
+    assert [result.status for result in results] == [0, 1, 3]
+    assert results[1].error == 'ValueError: invalid value\n'
+
+def test_output(module, capsys):
+    output = io.StringIO()
+    with pytest.raises(SystemExit) as err:
+        command(module, 'check').parse(['ok', 'error', 'exit3'], output=output)
+    assert err.value.code == 3
+    assert output.getvalue() == 'error: ValueError: invalid value\nexit3: exit status 3\n'
+    assert capsys.readouterr().err == ''
+
+def test_parse_many(module, capsys):
+    results = list(command(module, 'check').parse_many(['ok ok', 'ok exit2']))
+    assert [result.status for result in results] == [0, 2]
+    assert results[1].error == 'exit2: exit status 2\n'
+    assert capsys.readouterr().err == ''
+
+def test_parse_async(module, monkeypatch):
+    """Values are waited without blocking the event loop."""
+    monkeypatch.delitem(sys.modules, module, raising=False)
+    cmd = command(module, 'wait')
+    async def main():
+        task = asyncio.ensure_future(cmd.parse_async(['a', 'b']))
+        await asyncio.sleep(0.1)
+        sys.modules[module].EVENT.set()
+        return await task
+    assert asyncio.run(main()).values == ['a', 'b']
+
+def test_backpressure():
+    """Values are read as workers are available (at most two values by
+    worker are submitted)."""
+    read = []
+    def values():
+        for value in range(100):
+            read.append(value)
+            yield value
+    started = threading.Event()
+    release = threading.Event()
+    def func(args):
+        started.set()
+        release.wait()
+        return args.values
+
+    results = clg._fanout_results(func, {'arg': 'values', 'workers': 2},
+                                  clg.Namespace({'values': values()}))
+    consumer = threading.Thread(target=lambda: next(results))
+    consumer.start()
+    started.wait()
+    time.sleep(0.2)
+    assert len(read) == 4
+    release.set()
+    consumer.join()
+    assert [result.value for result in results] == list(range(1, 100))
+
+def test_missing_fanout():
+    cmd = clg.CommandLine({'args': {'values': {'nargs': '+'}},
+                           'execute': {'module': 'fanout_commands'}})
+    with pytest.raises(clg.CLGError):
+        list(cmd.parse_fanout(['1']))
+
+@pytest.mark.parametrize('fanout', [{'pool': 'fork'}, {'workers': 0}, {'arg': 'unknown'}])
+def test_invalid(fanout):
+    with pytest.raises(clg.CLGError):
+        clg.CommandLine({'args': {'values': {'nargs': '+'}},
+                         'execute': {'module': 'fanout_commands',
+                                     'fanout': dict({'arg': 'values'}, **fanout)}})
@@ -0,0 +1,52 @@
+# coding: utf-8
+
+"""Tests of the ``help`` command (*add_help_cmd* keyword)."""
+
+import types
+
+import pytest
+
+import clg
+import clg.codegen
+
+CONFIG = {'add_help_cmd': True,
+          'subparsers': {'list': {'help': 'List.',
+                                  'subparsers': {'users': {'help': 'List users.'}}},
+                         'add': {'help': 'Add.'}}}
+
+
+def parse(argv):
+    with pytest.raises(SystemExit) as err:
+        clg.CommandLine(CONFIG).parse(argv)
+    return err.value.code
+
+def generated():
+    module = types.ModuleType('generated')
+    exec(compile(clg.codegen.generate(CONFIG), 'generated', 'exec'), module.__dict__)
+    return module
+
+def test_tree(capsys):
+    assert parse(['help']) == 0
+    output = capsys.readouterr().out
+    assert 'users' in output and 'add' in output
+
+def test_depth(capsys):
+    assert parse(['help', '--depth', '1']) == 0
+    output = capsys.readouterr().out
+    assert 'list' in output and 'users' not in output
+
+@pytest.mark.parametrize('depth', ['0', '-3'])
+def test_invalid_depth(depth, capsys):
+    assert parse(['help', '--depth=%s' % depth]) == 2
+    assert '--depth: this must be a positive integer' in capsys.readouterr().err
+
+@pytest.mark.parametrize('depth', ['0', '-3'])
+def test_generated_invalid_depth(depth, capsys):
+    with pytest.raises(SystemExit) as err:
+        generated().parse(['help', '--depth=%s' % depth])
+    assert err.value.code == 2
+    assert '--depth: this must be a positive integer' in capsys.readouterr().err
+
+def test_unknown_command(capsys):
+    assert parse(['help', 'remove']) == 2
+    assert "unknown command 'remove'" in capsys.readouterr().err
@@ -0,0 +1,81 @@
+# coding: utf-8
+
+"""Tests of the *lazy* mode of **CommandLine**."""
+
+import io
+import os
+
+import pytest
+
+import clg
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXAMPLE = os.path.join(ROOT, 'examples', 'subparsers', 'subparsers.yml')
+
+CONFIG = {
+    'prog': 'prog',
+    'options': {'verbose': {'action': 'store_true'}},
+    'subparsers': {
+        'vm': {'subparsers': {
+            'start': {'args': {'name': {'help': 'name'}},
+                      'options': {'mode': {'choices': ['cold', 'warm']}}},
+            'stop': {'options': {'force': {'action': 'store_true'},
+                                 'timeout': {'type': 'int', 'default': 10}}}}},
+        'list': {'options': {'all': {'action': 'store_true', 'conflict': ['limit']},
+                             'limit': {'type': 'int'}}}}}
+
+
+def parse(config, args, **kwargs):
+    """Parse **args** with a new **CommandLine** and return the arguments or
+    the exit status and the output."""
+    output = io.StringIO()
+    try:
+        return vars(clg.CommandLine(config, **kwargs).parse(args, output=output))
+    except SystemExit as err:
+        return err.code, output.getvalue()
+
+@pytest.mark.parametrize('args', [
+    [],
+    ['--verbose', 'vm', 'start', 'vm1', '--mode', 'cold'],
+    ['vm', 'stop', '--force'],
+    ['vm', 'stop', '--timeout', 'x'],
+    ['vm', 'start', '--mode', 'hot', 'vm1'],
+    ['vm', 'restart'],
+    ['list', '--all', '--limit', '1'],
+    ['list', '--help'],
+    ['vm', 'start', '--help'],
+])
+def test_same_result(args):
+    assert parse(CONFIG, args, lazy=True) == parse(CONFIG, args)
+
+@pytest.mark.parametrize('args', [['a', '1'], ['--foo', 'b', '--baz', 'X'],
+                                  ['b', '--baz', 'W'], ['c'], ['a', '--help']])
+def test_example(args):
+    config = clg._load_config('yaml', EXAMPLE)
+    assert parse(config, args, lazy=True) == parse(config, args)
+
+def test_only_selected_built():
+    cmd = clg.CommandLine(CONFIG, lazy=True)
+    assert list(cmd._parsers) == ['']
+    cmd.parse(['vm', 'stop'])
+    assert list(cmd._parsers) == ['', 'subparsers/vm', 'subparsers/vm/subparsers/stop']
+    cmd.build()
+    assert len(cmd._parsers) == 5
+
+def test_configuration_checked():
+    with pytest.raises(clg.CLGError):
+        clg.CommandLine({'subparsers': {'run': {'options': {'name': {'type': 'unknown'}}}}},
+                        lazy=True)
+
+def test_argcomplete(monkeypatch):
+    """``argcomplete`` can be used directly with the parser of a lazy
+    **CommandLine**."""
+    argcomplete = pytest.importorskip('argcomplete')
+    monkeypatch.setenv('_ARGCOMPLETE', '1')
+    monkeypatch.setenv('COMP_LINE', 'prog vm start --mode ')
+    monkeypatch.setenv('COMP_POINT', str(len('prog vm start --mode ')))
+    cmd = clg.CommandLine(CONFIG, lazy=True)
+    output = io.StringIO()
+    with pytest.raises(SystemExit):
+        argcomplete.autocomplete(cmd.parser, output_stream=output, exit_method=exit)
+    assert output.getvalue().split('\013') == ['cold', 'warm']
@@ -0,0 +1,89 @@
+# coding: utf-8
+
+"""Tests of the namespaces of arguments (**Namespace** and
+**SlotsNamespace**)."""
+
+import copy
+import pickle
+
+import pytest
+
+import clg
+
+CONFIG = {
+    'options': {'name': {'help': 'name'},
+                'count': {'type': 'int', 'default': 1},
+                'all': {'action': 'store_true'}},
+    'subparsers': {'list': {'args': {'path': {'nargs': '?'}}},
+                   'run': {'options': {'not-an-identifier': {'help': 'name'}}}},
+}
+
+
+@pytest.fixture(params=[False, True], ids=['dict', 'slots'])
+def cmd(request):
+    return clg.CommandLine(CONFIG, slots=request.param)
+
+def test_class():
+    args = clg.CommandLine(CONFIG, slots=True).parse(['list'])
+    assert isinstance(args, clg.SlotsNamespace)
+    assert not hasattr(args, '__weakref__')
+    other = clg.CommandLine(CONFIG, slots=True).parse(['--all', 'list', 'path'])
+    assert type(other) is type(args)
+
+def test_not_identifier():
+    """Commands having arguments that can not be slots use **Namespace**."""
+    args = clg.CommandLine(CONFIG, slots=True).parse(['run', '--not-an-identifier', 'a'])
+    assert type(args) is clg.Namespace
+    assert args['not-an-identifier'] == 'a'
+
+def test_attributes(cmd):
+    args = cmd.parse(['--name', 'a', 'list', 'path'])
+    assert (args.name, args.count, args.all, args.path) == ('a', 1, False, 'path')
+    assert args.command0 == 'list'
+    args.count = 2
+    assert args.count == 2
+    with pytest.raises(AttributeError):
+        args.unknown
+
+def test_vars(cmd):
+    args = cmd.parse(['--count', '3', 'list'])
+    expected = {'name': None, 'count': 3, 'all': False, 'command0': 'list', 'path': None}
+    assert vars(args) == expected
+    assert args.__dict__ == expected
+    assert dict(args) == expected
+    assert list(args) == list(expected.items())
+
+def test_items(cmd):
+    args = cmd.parse(['--all', 'list'])
+    assert args['all'] is True
+    assert args._get('all') is True
+    assert args._get('unknown', 'default') == 'default'
+    assert 'all' in args and 'unknown' not in args
+    args['all'] = False
+    assert args.all is False
+    with pytest.raises(KeyError):
+        args['unknown']
+    with pytest.raises(KeyError):
+        args['unknown'] = 1
+    del args['name']
+    assert 'name' not in args
+    assert args._get('name') is None
+    with pytest.raises(KeyError):
+        del args['name']
+
+def test_equality():
+    args = clg.CommandLine(CONFIG, slots=True).parse(['--name', 'a', 'list'])
+    assert args == clg.CommandLine(CONFIG).parse(['--name', 'a', 'list'])
+    assert args != clg.CommandLine(CONFIG).parse(['--name', 'b', 'list'])
+    assert repr(args) == ("Namespace(name='a', count=1, all=False, command0='list', "
+                          "path=None)")
+
+def test_pickle(cmd):
+    args = cmd.parse(['--name', 'a', 'list'])
+    del args['path']
+    for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+        loaded = pickle.loads(pickle.dumps(args, protocol))
+        assert type(loaded) is type(args)
+        assert vars(loaded) == vars(args)
+        assert 'path' not in loaded
+    assert vars(copy.deepcopy(args)) == vars(args)
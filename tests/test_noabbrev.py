@@ -0,0 +1,91 @@
+# coding: utf-8
+
+"""Tests of the lookup of options of **NoAbbrevParser**."""
+
+import pytest
+
+import clg
+
+
+def parser(prefix_chars='-'):
+    """Return a parser whose options have one and two prefix characters."""
+    char = prefix_chars[0]
+    parser = clg.NoAbbrevParser(prog='prog', prefix_chars=prefix_chars)
+    parser.add_argument(char + 'n', char * 2 + 'name')
+    parser.add_argument(char * 2 + 'names', nargs='*')
+    parser.add_argument(char + 'v', action='store_true')
+    parser.add_argument(char + 'verbose', action='store_true')
+    parser.add_argument(char + 'vx', dest='vx')
+    parser.add_argument('pos', nargs='?')
+    return parser
+
+def parse(parser, args, capsys):
+    """Return the non default values of the arguments or the error."""
+    try:
+        return {dest: value
+                for dest, value in vars(parser.parse_args(args)).items()
+                if value not in (None, False)}
+    except SystemExit:
+        return capsys.readouterr().err.splitlines()[-1]
+
+@pytest.mark.parametrize('args, result', [
+    (['--name', 'a'], {'name': 'a'}),
+    (['--name=a'], {'name': 'a'}),
+    (['--names', 'a', 'b'], {'names': ['a', 'b']}),
+    (['--names=a'], {'names': ['a']}),
+    (['--nam', 'a'], 'prog: error: unrecognized arguments: --nam'),
+    (['-n', 'a'], {'name': 'a'}),
+    (['-na'], {'name': 'a'}),
+    (['-n=a'], {'name': 'a'}),
+    (['-v'], {'v': True}),
+    (['-verbose'], {'verbose': True}),
+    (['-vx', 'b'], {'vx': 'b'}),
+    (['-vxb'], "prog: error: argument -v: ignored explicit argument 'xb'"),
+    (['-verb'], 'prog: error: ambiguous option: -verb could match -v, -verbose'),
+    (['-ve'], 'prog: error: ambiguous option: -ve could match -v, -verbose'),
+    (['x'], {'pos': 'x'}),
+    (['-'], {'pos': '-'}),
+    (['--'], {}),
+])
+def test_options(args, result, capsys):
+    assert parse(parser(), args, capsys) == result
+
+@pytest.mark.parametrize('args, result', [
+    (['++name', 'a'], {'name': 'a'}),
+    (['+na'], {'name': 'a'}),
+    (['+verbose'], {'verbose': True}),
+    (['+vx', 'c'], {'vx': 'c'}),
+    (['++nam', 'a'], 'prog: error: unrecognized arguments: ++nam'),
+    (['-n', 'a'], 'prog: error: unrecognized arguments: a'),
+])
+def test_prefix_chars(args, result, capsys):
+    assert parse(parser('+'), args, capsys) == result
+
+def test_added_options(capsys):
+    """The index of options is rebuilt when options are added."""
+    cur_parser = parser()
+    assert parse(cur_parser, ['-va'], capsys) == (
+        "prog: error: argument -v: ignored explicit argument 'a'")
+    cur_parser.add_argument('-va', action='store_true')
+    assert parse(cur_parser, ['-va'], capsys) == {'va': True}
+
+def test_many_options(capsys):
+    cur_parser = clg.NoAbbrevParser(prog='prog')
+    for idx in range(2000):
+        cur_parser.add_argument('-o%d' % idx, '--option%d' % idx)
+    assert parse(cur_parser, ['-o1999', 'a', '--option10=b', '-o5', 'c'], capsys) == {
+        'option1999': 'a', 'option10': 'b', 'option5': 'c'}
+    assert parse(cur_parser, ['-o5c'], capsys) == 'prog: error: unrecognized arguments: -o5c'
+    assert parse(cur_parser, ['--option1'], capsys) == (
+        'prog: error: argument -o1/--option1: expected one argument')
+    assert parse(cur_parser, ['--option'], capsys) == (
+        'prog: error: unrecognized arguments: --option')
+
+@pytest.mark.parametrize('allow_abbrev, result', [
+    (False, 'cmd: error: unrecognized arguments: --nam a'),
+    (True, {'name': 'a'}),
+])
+def test_allow_abbrev(allow_abbrev, result, capsys):
+    cmd = clg.CommandLine({'prog': 'cmd', 'allow_abbrev': allow_abbrev,
+                           'options': {'name': {'help': 'name'}}})
+    assert parse(cmd.parser, ['--nam', 'a'], capsys) == result
@@ -0,0 +1,86 @@
+# coding: utf-8
+
+"""Tests of **CommandLine.parse_many**."""
+
+import io
+
+import pytest
+
+import clg
+
+COMMANDS = '''
+import sys
+
+def add(args):
+    if args.name == 'root':
+        sys.exit('user root already exists')
+    if args.name == 'error':
+        raise ValueError('invalid name')
+'''
+
+
+@pytest.fixture
+def config(tmp_path):
+    module = tmp_path / 'commands.py'
+    module.write_text(COMMANDS)
+    return {'prog': 'cmd',
+            'subparsers': {'add': {'args': {'name': {'help': 'name'}},
+                                   'execute': {'file': str(module), 'function': 'add'}},
+                           'list': {'options': {'all': {'action': 'store_true'}}}}}
+
+@pytest.fixture
+def cmd(config):
+    return clg.CommandLine(config)
+
+def test_status(cmd):
+    results = list(cmd.parse_many(['add user', 'list --all', 'add root', 'add error',
+                                   'remove user']))
+    assert [(result.lineno, result.status) for result in results] == [
+        (1, 0), (2, 0), (3, 1), (4, 1), (5, 2)]
+    assert results[0].args.name == 'user' and results[1].args.all is True
+    assert results[2].error == 'user root already exists\n'
+    assert results[3].error == 'ValueError: invalid name\n'
+    assert results[4].args is None
+    assert results[4].error.startswith('usage: ')
+    assert "invalid choice: 'remove'" in results[4].error
+
+def test_lines(cmd):
+    lines = io.StringIO('# comment\n\nadd "first user"\nadd "unterminated\n')
+    results = list(cmd.parse_many(lines))
+    assert [(result.lineno, result.status) for result in results] == [(3, 0), (4, 2)]
+    assert results[0].args.name == 'first user'
+    assert results[1].argv == 'add "unterminated\n'
+
+def test_argv(cmd):
+    results = list(cmd.parse_many([['add', 'a b']]))
+    assert results[0].argv == ['add', 'a b']
+    assert results[0].args.name == 'a b'
+
+def test_help(cmd, capsys):
+    output = io.StringIO()
+    results = list(cmd.parse_many(['list --help', 'list'], output=output))
+    assert [(result.status, result.error) for result in results] == [(0, None), (0, None)]
+    assert output.getvalue().startswith('usage: ')
+    assert capsys.readouterr().out == ''
+
+def test_batch_option(config, tmp_path, capsys):
+    """Errors of the *--batch* option are written in the output of the
+    call."""
+    commands = tmp_path / 'commands'
+    commands.write_text('add user\nadd root\nlist --help\nadd error\n')
+    cmd = clg.CommandLine(dict(config, add_batch_option=True))
+    output = io.StringIO()
+    with pytest.raises(SystemExit) as err:
+        cmd.parse(['--batch', str(commands)], output=output)
+    assert err.value.code == 1
+    lines = output.getvalue().splitlines()
+    assert lines[0] == '%s:2: user root already exists' % commands
+    assert lines[1].startswith('usage: cmd list')
+    assert lines[-1] == '%s:4: ValueError: invalid name' % commands
+    assert capsys.readouterr() == ('', '')
+
+    with pytest.raises(SystemExit):
+        cmd.parse(['--batch', str(commands)])
+    assert capsys.readouterr().err.splitlines() == [
+        '%s:2: user root already exists' % commands,
+        '%s:4: ValueError: invalid name' % commands]
@@ -0,0 +1,93 @@
+# coding: utf-8
+
+"""Tests of the post processing keywords (*need*, *conflict* and *match*)."""
+
+import pytest
+
+import clg
+
+CONFIG = {
+    'prog': 'cmd',
+    'options': {
+        'user': {'short': 'u', 'help': 'user'},
+        'mode': {'choices': ['ro', 'rw']},
+        'tags': {'nargs': '*'},
+        'force': {'action': 'store_true'},
+        'password': {'need': ['user']},
+        'write': {'action': 'store_true', 'need': ['mode:rw']},
+        'quiet': {'action': 'store_true', 'conflict': ['force', 'tags:debug']},
+        'label': {'need': ['tags:prod']},
+        'names': {'nargs': '*', 'match': '^[a-z]+$'},
+    },
+    'args': {
+        'host': {'match': r'^\w+$'},
+    },
+}
+
+
+@pytest.fixture
+def cmd():
+    return clg.CommandLine(CONFIG)
+
+def error(cmd, capsys, args):
+    with pytest.raises(SystemExit) as err:
+        cmd.parse(args)
+    assert err.value.code == 2
+    return capsys.readouterr().err.splitlines()[-1]
+
+@pytest.mark.parametrize('args', [
+    ['host'],
+    ['host', '--password', 'pwd', '-u', 'root'],
+    ['host', '--write', '--mode', 'rw'],
+    ['host', '--quiet'],
+    ['host', '--quiet', '--tags', 'prod', 'test'],
+    ['host', '--label', 'l', '--tags', 'dev', 'prod'],
+    ['host', '--names', 'a', 'b'],
+    ['host', '--names'],
+])
+def test_valid(cmd, args):
+    assert cmd.parse(args).host == 'host'
+
+@pytest.mark.parametrize('args, msg', [
+    (['host', '--password', 'pwd'],
+     "option '--password' need option '-u/--user'"),
+    (['host', '--write'],
+     "option '--write' need option '--mode'"),
+    (['host', '--quiet', '--force'],
+     "option '--quiet' conflict with option '--force'"),
+    (['host', '--quiet', '--tags', 'prod', 'debug'],
+     "option '--quiet' conflict with value 'debug' of option '--tags'"),
+    (['host', '--label', 'l', '--tags', 'dev'],
+     "option '--label' need option '--tags' with value 'prod'"),
+    (['host', '--label', 'l', '--tags'],
+     "option '--label' need option '--tags'"),
+    (['host', '--names', 'a', 'B1', 'c'],
+     "value 'B1' of options 'names' does not match pattern '^[a-z]+$'"),
+    (['host!'],
+     r"value 'host!' of args 'host' does not match pattern '^\w+$'"),
+])
+def test_errors(cmd, capsys, args, msg):
+    assert error(cmd, capsys, args) == 'cmd: error: %s' % msg
+
+def test_arguments_order(cmd, capsys):
+    """Arguments are checked in the order of the configuration."""
+    assert error(cmd, capsys, ['--password', 'pwd', '--quiet', '--force', 'host!']) == (
+        "cmd: error: option '--password' need option '-u/--user'")
+
+def test_subcommand():
+    cmd = clg.CommandLine({'subparsers': {'run': {
+        'options': {'user': {'help': 'user'}, 'password': {'need': ['user']}}}}})
+    assert cmd.parse(['run', '--password', 'pwd', '--user', 'root']).password == 'pwd'
+
+@pytest.mark.parametrize('arg_conf, msg', [
+    ({'match': '[a-z'},
+     "/options/host/match: invalid pattern '[a-z': unterminated character set at position 0"),
+    ({'need': ['unknown']},
+     "/options/host/need: unknown option/argument 'unknown'"),
+    ({'conflict': ['unknown:value']},
+     "/options/host/conflict: unknown option/argument 'unknown'"),
+])
+def test_build_errors(arg_conf, msg):
+    with pytest.raises(clg.CLGError) as err:
+        clg.CommandLine({'options': {'host': arg_conf}})
+    assert str(err.value) == msg
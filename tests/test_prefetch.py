@@ -0,0 +1,90 @@
+# coding: utf-8
+
+"""Tests of the cache of the functions to execute and of their prefetch."""
+
+import os
+import sys
+
+import pytest
+
+import clg
+
+MODULE = '''
+import os
+
+LOADED = os.environ.get('CLG_TEST_LOADED')
+if LOADED:
+    with open(LOADED, 'a') as fhandler:
+        fhandler.write(__name__ + '\\n')
+
+def main(args):
+    args.result = {result!r}
+'''
+
+
+@pytest.fixture
+def modules(tmp_path, monkeypatch):
+    """Create the modules *start*, *stop* and *list* in **tmp_path** and
+    return a function listing the loaded modules."""
+    for name in ('start', 'stop', 'list'):
+        (tmp_path / ('prefetch_%s.py' % name)).write_text(MODULE.format(result=name))
+        monkeypatch.delitem(sys.modules, 'prefetch_%s' % name, raising=False)
+    loaded = tmp_path / 'loaded'
+    loaded.write_text('')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setenv('CLG_TEST_LOADED', str(loaded))
+    return lambda: loaded.read_text().split()
+
+def command(**kwargs):
+    execute = lambda name: {'module': 'prefetch_%s' % name}
+    return clg.CommandLine({
+        'options': {'name': {'help': 'name'},
+                    'tags': {'nargs': '*'},
+                    'verbose': {'action': 'store_true'}},
+        'subparsers': {
+            'vm': {'options': {'host': {'short': 'H'}},
+                   'subparsers': {
+                       'start': {'args': {'names': {'nargs': '*'}},
+                                 'execute': execute('start')},
+                       'stop': {'execute': execute('stop')}}},
+            'list': {'execute': execute('list')}}}, **kwargs)
+
+@pytest.mark.parametrize('args, prefetched', [
+    (['vm', 'start'], 'start'),
+    (['--verbose', 'vm', '-H', 'stop', 'start'], 'start'),
+    (['--name', 'list', 'vm', '--host=list', 'stop'], 'stop'),
+    (['--name=vm', 'list'], 'list'),
+    (['vm', 'start', 'stop', 'list'], 'start'),
+    (['--tags', 'list', 'vm', 'stop'], None),
+    (['--unknown', 'list'], None),
+    (['list', '--', 'vm'], 'list'),
+])
+def test_prefetch(modules, args, prefetched):
+    cmd = command(prefetch=True)
+    cmd._prefetch(args)
+    for thread in cmd._prefetches.values():
+        thread.join()
+    assert modules() == ([] if prefetched is None else ['prefetch_%s' % prefetched])
+
+def test_parse(modules):
+    cmd = command(prefetch=True)
+    assert cmd.parse(['--name', 'list', 'vm', 'start', 'stop']).result == 'start'
+    assert modules() == ['prefetch_start']
+    assert not cmd._prefetches
+
+def test_cache(modules):
+    cmd = command()
+    assert cmd.parse(['list']).result == 'list'
+    assert cmd.parse(['list']).result == 'list'
+    assert cmd.parse(['vm', 'stop']).result == 'stop'
+    assert modules() == ['prefetch_list', 'prefetch_stop']
+
+def test_file_reloaded(tmp_path):
+    path = tmp_path / 'commands.py'
+    path.write_text('def main(args):\n    args.result = 1\n')
+    cmd = clg.CommandLine({'execute': {'file': str(path)}})
+    assert cmd.parse([]).result == 1
+    path.write_text('def main(args):\n    args.result = 2\n')
+    stat = os.stat(str(path))
+    os.utime(str(path), ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert cmd.parse([]).result == 2
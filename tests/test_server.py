@@ -0,0 +1,139 @@
+# coding: utf-8
+
+"""Tests of the server (**clg.server**) and of its client (**clg_client**)."""
+
+import os
+import sys
+import time
+import socket
+import subprocess
+
+import pytest
+
+import clg
+import clg.server
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLIENT = os.path.join(ROOT, 'clg_client.py')
+
+COMMAND = '''
+import os
+import sys
+
+def main(args):
+    print('%s in %s' % (args.name, os.getcwd()))
+    sys.exit(args.status)
+'''
+
+SERVER = '''
+import clg
+import clg.server
+
+cmd = clg.CommandLine({{'prog': 'prog',
+                       'options': {{'status': {{'type': 'int', 'default': 0}}}},
+                       'args': {{'name': {{'help': 'name'}}}},
+                       'execute': {{'file': {module!r}}}}})
+clg.server.serve(cmd, {socket!r})
+'''
+
+CONFIG = {'args': {'name': {'help': 'name'}}}
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason='POSIX only')
+
+
+def wait_server(socket_path, timeout=10):
+    """Wait for a server to listen on **socket_path**."""
+    end = time.time() + timeout
+    while time.time() < end:
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            conn.connect(socket_path)
+            return
+        except OSError:
+            time.sleep(0.05)
+        finally:
+            conn.close()
+    raise AssertionError('server not started')
+
+@pytest.fixture
+def socket_path(tmp_path):
+    return str(tmp_path / 'prog.sock')
+
+def start_server(directory, socket_path):
+    """Start a server (with its command in **directory**) in a new process."""
+    module = directory / 'command.py'
+    module.write_text(COMMAND)
+    process = subprocess.Popen(
+        [sys.executable, '-c', SERVER.format(module=str(module), socket=socket_path)],
+        env=dict(os.environ, PYTHONPATH=ROOT))
+    try:
+        wait_server(socket_path)
+    except AssertionError:
+        process.kill()
+        process.wait()
+        raise
+    return process
+
+@pytest.fixture
+def server(tmp_path, socket_path):
+    process = start_server(tmp_path, socket_path)
+    yield process
+    process.kill()
+    process.wait()
+
+def client(socket_path, *args, **kwargs):
+    return subprocess.run([sys.executable, CLIENT, socket_path] + list(args),
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          universal_newlines=True, **kwargs)
+
+def test_client_does_not_import_clg():
+    process = subprocess.run(
+        [sys.executable, '-c', 'import sys, clg_client; print("clg" in sys.modules)'],
+        cwd=ROOT, stdout=subprocess.PIPE, universal_newlines=True)
+    assert process.stdout.strip() == 'False'
+
+def test_run(server, socket_path, tmp_path):
+    process = client(socket_path, 'vm1', cwd=str(tmp_path))
+    assert process.returncode == 0
+    assert process.stdout == 'vm1 in %s\n' % tmp_path
+
+def test_exit_status(server, socket_path):
+    process = client(socket_path, '--status', '3', 'vm1')
+    assert process.returncode == 3
+    assert process.stdout.startswith('vm1 in ')
+
+def test_usage_error(server, socket_path):
+    process = client(socket_path, '--unknown')
+    assert process.returncode == 2
+    assert process.stderr.startswith('usage: prog')
+
+def test_no_server(socket_path):
+    process = client(socket_path, 'vm1')
+    assert process.returncode == 255
+    assert 'unable to connect to the server on %s' % socket_path in process.stderr
+    assert 'Traceback' not in process.stderr
+
+def test_running_server(server, socket_path):
+    with pytest.raises(OSError):
+        clg.server.serve(clg.CommandLine(CONFIG), socket_path, preload=False)
+    assert client(socket_path, 'vm1').returncode == 0
+
+def test_regular_file(socket_path):
+    with open(socket_path, 'w') as fhandler:
+        fhandler.write('data')
+    with pytest.raises(OSError):
+        clg.server.serve(clg.CommandLine(CONFIG), socket_path, preload=False)
+    with open(socket_path) as fhandler:
+        assert fhandler.read() == 'data'
+
+def test_stale_socket(tmp_path, socket_path):
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(socket_path)
+    stale.close()
+    assert os.path.exists(socket_path)
+    server = start_server(tmp_path, socket_path)
+    try:
+        assert client(socket_path, 'vm1').returncode == 0
+    finally:
+        server.kill()
+        server.wait()
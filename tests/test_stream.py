@@ -0,0 +1,75 @@
+# coding: utf-8
+
+"""Tests of the *stream* keyword of options and arguments."""
+
+import io
+import sys
+
+import pytest
+
+import clg
+
+INTS = {'args': {'ints': {'nargs': '+', 'stream': True, 'type': 'int',
+                          'choices': [1, 2, 3]}}}
+
+
+@pytest.fixture
+def items(tmp_path):
+    path = tmp_path / 'items.txt'
+    path.write_text('1\n\n2\n')
+    return str(path)
+
+def test_file(items):
+    args = clg.CommandLine(INTS).parse(['3', '@%s' % items])
+    assert list(args.ints) == [3, 1, 2]
+
+def test_stdin(monkeypatch):
+    monkeypatch.setattr(sys, 'stdin', io.StringIO('2\n3\n'))
+    assert list(clg.CommandLine(INTS).parse(['-']).ints) == [2, 3]
+
+def test_lazy(tmp_path):
+    path = tmp_path / 'items.txt'
+    path.write_text('1\n5\n')
+    ints = clg.CommandLine(INTS).parse(['@%s' % path]).ints
+    assert next(ints) == 1
+    with pytest.raises(SystemExit) as err:
+        next(ints)
+    assert err.value.code == 2
+
+def test_invalid_choice(capsys):
+    ints = clg.CommandLine(INTS).parse(['1', '4']).ints
+    with pytest.raises(SystemExit):
+        list(ints)
+    assert 'invalid choice: 4 (choose from 1, 2, 3)' in capsys.readouterr().err
+
+def test_invalid_match(capsys):
+    config = {'args': {'vms': {'nargs': '+', 'stream': True, 'match': '^vm'}}}
+    vms = clg.CommandLine(config).parse(['vm1', 'host']).vms
+    with pytest.raises(SystemExit):
+        list(vms)
+    assert 'host' in capsys.readouterr().err
+
+def test_missing_file(tmp_path, capsys):
+    ints = clg.CommandLine(INTS).parse(['@%s' % (tmp_path / 'missing')]).ints
+    with pytest.raises(SystemExit):
+        list(ints)
+    assert "can't open" in capsys.readouterr().err
+
+def test_output(tmp_path, capsys):
+    """Errors are written in the output of the call, even when values are
+    read after the call."""
+    output = io.StringIO()
+    ints = clg.CommandLine(INTS).parse(['1', '4'], output=output).ints
+    with pytest.raises(SystemExit):
+        list(ints)
+    assert 'invalid choice: 4' in output.getvalue()
+    assert capsys.readouterr().err == ''
+
+def test_parse_many(tmp_path, capsys):
+    module = tmp_path / 'command.py'
+    module.write_text('def main(args):\n    return list(args.ints)\n')
+    config = dict(INTS, execute={'file': str(module)})
+    results = list(clg.CommandLine(config).parse_many(['1 2', '1 4']))
+    assert [result.status for result in results] == [0, 2]
+    assert 'invalid choice: 4' in results[1].error
+    assert capsys.readouterr().err == ''
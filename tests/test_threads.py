@@ -0,0 +1,62 @@
+# coding: utf-8
+
+"""Tests of a **CommandLine** shared by many threads, each call writing its
+help, usage and errors in its own output."""
+
+import io
+import threading
+
+import pytest
+
+import clg
+
+CONFIG = {
+    'prog': 'cmd',
+    'subparsers': {'run': {'options': {'mode': {'choices': ['ro', 'rw']},
+                                       'count': {'type': 'int'}}},
+                   'list': {'help': 'List.'}},
+}
+NB_THREADS = 8
+NB_CALLS = 50
+
+
+def test_outputs():
+    cmd = clg.CommandLine(CONFIG, lazy=True)
+    barrier = threading.Barrier(NB_THREADS)
+    outputs = [io.StringIO() for _ in range(NB_THREADS)]
+    results = [[] for _ in range(NB_THREADS)]
+
+    def parse(idx):
+        barrier.wait()
+        for call in range(NB_CALLS):
+            args = [['run', '--mode', 'x%d' % idx],
+                    ['run', '--count', str(idx)],
+                    ['list', '--help']][call % 3]
+            try:
+                results[idx].append(cmd.parse(args, output=outputs[idx]).count)
+            except SystemExit as err:
+                results[idx].append(err.code)
+
+    threads = [threading.Thread(target=parse, args=(idx,)) for idx in range(NB_THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for idx, output in enumerate(outputs):
+        assert results[idx] == [[2, idx, 0][call % 3] for call in range(NB_CALLS)]
+        errors = [line for line in output.getvalue().splitlines() if 'error:' in line]
+        assert len(errors) == len(range(0, NB_CALLS, 3))
+        assert all(error.startswith("cmd run: error: argument --mode: invalid choice: "
+                                    "'x%d'" % idx) for error in errors)
+        assert output.getvalue().count('usage: cmd list [-h]') == len(range(2, NB_CALLS, 3))
+
+def test_standard_outputs(capsys):
+    """Without output, messages are written in the standard output and
+    error."""
+    cmd = clg.CommandLine(CONFIG)
+    with pytest.raises(SystemExit):
+        cmd.parse(['run', '--mode', 'x'], output=io.StringIO())
+    with pytest.raises(SystemExit):
+        cmd.parse(['run', '--mode', 'x'])
+    assert "invalid choice: 'x'" in capsys.readouterr().err
@@ -0,0 +1,74 @@
+# coding: utf-8
+
+"""Tests of the timings of the phases (**Stats** and the ``CLG_TIMINGS``
+environment variable)."""
+
+import os
+import sys
+import json
+import subprocess
+
+import pytest
+
+import clg
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CONFIG = {'options': {'count': {'type': 'int', 'default': 1}},
+          'subparsers': {'run': {'execute': {'module': 'timings_commands'}},
+                         'list': {'help': 'list'}}}
+
+
+@pytest.fixture
+def timings(tmp_path, monkeypatch):
+    (tmp_path / 'timings_commands.py').write_text('def main(args):\n    pass\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    path = tmp_path / 'timings'
+    monkeypatch.setenv('CLG_TIMINGS', str(path))
+    return path
+
+def read(path):
+    with open(str(path)) as fhandler:
+        return [json.loads(line) for line in fhandler]
+
+def test_phases(timings):
+    cmd = clg.CommandLine(CONFIG)
+    cmd.parse(['run'])
+    cmd.parse(['--count', '2', 'list'])
+    lines = read(timings)
+    assert len(lines) == 2
+    for line in lines:
+        assert list(line) == ['time', 'pid', 'prog', 'command', 'phases', 'commands']
+        assert line['pid'] == os.getpid()
+        assert all(duration >= 0 for duration in line['phases'].values())
+    assert [line['command'] for line in lines] == ['run', 'list']
+    assert list(lines[0]['phases']) == ['load', 'deepcopy', 'validate', 'build', 'parse',
+                                        'post', 'execute']
+    assert list(lines[0]['commands']) == ['', 'run', 'list']
+    # Durations of the command-lines are summed.
+    assert lines[1]['phases']['parse'] >= lines[0]['phases']['parse']
+
+def test_lazy(timings):
+    cmd = clg.CommandLine(CONFIG, lazy=True)
+    cmd.parse(['list'])
+    assert list(read(timings)[0]['commands']) == ['', 'list']
+
+def test_disabled(monkeypatch):
+    monkeypatch.delenv('CLG_TIMINGS', raising=False)
+    assert clg.CommandLine(CONFIG).stats is None
+    stats = clg.Stats()
+    cmd = clg.CommandLine({'options': {'count': {'type': 'int'}}}, stats=stats)
+    cmd.parse(['--count', '1'])
+    assert cmd.stats is stats and list(stats.phases)[-2:] == ['parse', 'post']
+
+def test_init(timings, tmp_path):
+    """Timings of programs using **init**."""
+    config, program = tmp_path / 'cmd.json', tmp_path / 'prog.py'
+    config.write_text(json.dumps(CONFIG))
+    program.write_text('import clg\nclg.init(format="json", data=%r)\n' % str(config))
+    subprocess.run([sys.executable, str(program), 'run'], check=True, cwd=str(tmp_path),
+                   env=dict(os.environ, PYTHONPATH=ROOT))
+    line, = read(timings)
+    assert line['prog'] == 'prog.py'
+    assert line['command'] == 'run'
+    assert {'load', 'build', 'parse', 'post', 'execute'} <= set(line['phases'])
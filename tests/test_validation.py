@@ -0,0 +1,102 @@
+# coding: utf-8
+
+"""Tests of the validation of configurations (**validate** and
+**clg.validation**)."""
+
+import os
+import sys
+import subprocess
+
+import pytest
+
+import clg
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXAMPLES = os.path.join(ROOT, 'examples')
+
+# Types registered by the programs of the examples.
+EXAMPLES_TYPES = ('Date', 'Format', 'Disk', 'Interface')
+
+# Configurations having one error and the error raised for them (as when only
+# the first error was reported).
+INVALID = [
+    ({'options': {'name': {'type': 'unknown'}}},
+     "/options/name: invalid type 'unknown'"),
+    ({'options': {'name': {'short': 'ab'}}},
+     '/options/name/short: this must be a single letter'),
+    ({'options': {'name': {'invalid': 1}}},
+     "/options/name: invalid keyword 'invalid'"),
+    ({'options': {'name': {'need': ['other']}}},
+     "/options/name/need: unknown option/argument 'other'"),
+    ({'groups': [{'options': {'name': {'conflict': ['other']}}}]},
+     "/groups/#0/options/name/conflict: unknown option/argument 'other'"),
+    ({'options': 'name'},
+     "/options: this section is not of type 'dict'"),
+    ({'subparsers': {'run': {'execute': {'module': 'a', 'file': 'b'}}}},
+     "/subparsers/run/execute: this section need (only) one of theses "
+     "keywords: 'module', 'file'"),
+    ({'add_help_cmd': True},
+     '/: unable to add help command: no subparsers'),
+]
+
+
+@pytest.mark.parametrize('config, msg', INVALID)
+def test_single_error(config, msg):
+    assert [str(err) for err in clg.validate(config)] == [msg]
+    with pytest.raises(clg.CLGError) as err:
+        clg.CommandLine(config)
+    assert str(err.value) == msg
+
+def test_all_errors():
+    config = {
+        'options': {'name': {'type': 'unknown', 'short': 'ab'},
+                    'force': {'need': ['other']}},
+        'subparsers': {
+            'run': {'options': {'mode': {'invalid': 1}}},
+            'list': {'execute': {'module': 'a', 'file': 'b'},
+                     'args': {'name': {'match': '[a'}}}}}
+    errors = clg.validate(config)
+    assert [str(err) for err in errors] == [
+        '/options/name/short: this must be a single letter',
+        "/options/name: invalid type 'unknown'",
+        "/options/force/need: unknown option/argument 'other'",
+        "/subparsers/run/options/mode: invalid keyword 'invalid'",
+        "/subparsers/list/execute: this section need (only) one of theses "
+        "keywords: 'module', 'file'",
+        "/subparsers/list/args/name/match: invalid pattern '[a': unterminated "
+        "character set at position 0"]
+    assert all(isinstance(err, clg.CLGError) for err in errors)
+    with pytest.raises(clg.CLGError) as err:
+        clg.CommandLine(config)
+    assert str(err.value) == str(errors[0])
+
+def test_validated():
+    config = {'options': {'name': {'help': 'name'}}}
+    assert clg.validate(config) == []
+    assert clg.CommandLine(config, validated=True).parse(['--name', 'a']).name == 'a'
+
+def examples():
+    for directory in sorted(os.listdir(EXAMPLES)):
+        for filename in sorted(os.listdir(os.path.join(EXAMPLES, directory))):
+            if os.path.splitext(filename)[1] in ('.yml', '.yaml', '.json'):
+                yield os.path.join(directory, filename)
+
+@pytest.mark.parametrize('config', list(examples()))
+def test_examples(config):
+    types = [arg for type_name in EXAMPLES_TYPES for arg in ('-t', type_name)]
+    directory, filename = os.path.split(os.path.join(EXAMPLES, config))
+    process = subprocess.run([sys.executable, '-m', 'clg.validation'] + types + [filename],
+                             cwd=directory, env=dict(os.environ, PYTHONPATH=ROOT),
+                             stdout=subprocess.PIPE, universal_newlines=True)
+    assert (process.returncode, process.stdout) == (0, '')
+
+def test_command_errors(tmp_path):
+    config = tmp_path / 'cmd.json'
+    config.write_text('{"options": {"name": {"type": "unknown", "need": ["other"]}}}')
+    process = subprocess.run([sys.executable, '-m', 'clg.validation', str(config)],
+                             env=dict(os.environ, PYTHONPATH=ROOT),
+                             stdout=subprocess.PIPE, universal_newlines=True)
+    assert process.returncode == 1
+    assert process.stdout.splitlines() == [
+        "%s: /options/name: invalid type 'unknown'" % config,
+        "%s: /options/name/need: unknown option/argument 'other'" % config]